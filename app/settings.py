@@ -47,14 +47,16 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_api_key',
     'rest_hooks',
-    'core',
+    'core.apps.CoreConfig',
     'cbdata',
-    'chatbot',
+    'chatbot.apps.ChatbotConfig',
     'whitenoise.runserver_nostatic',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -146,6 +148,149 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 AUTH_USER_MODEL = 'core.User'
 
 
+# Caches
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+
+# Local memory is per process, so set REDIS_URL to share the cache
+# between workers. Heroku sets it when a Redis add-on is attached.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL'),
+    }
+
+
+# ---- Chatbot Cache Settings ----
+
+CHATBOT_CACHE_ALIAS = 'default'
+
+# Seconds a rendered response is kept, bounding staleness between workers
+CHATBOT_CACHE_TIMEOUT = int(os.environ.get('CHATBOT_CACHE_TIMEOUT', 300))
+
+# Days the change log is kept for by prune_changelog; syncs from a
+# cursor older than that start again
+CHATBOT_CHANGELOG_DAYS = 30
+
+# Build chatbot lists straight from .values() rather than through the
+# DRF serializers, for the views that have a fast serializer
+CHATBOT_FAST_SERIALIZERS = True
+
+# Companies whose job search index each process keeps in memory, and
+# the seconds an index is used before being rebuilt. The index is only
+# rebuilt early when this process sees the company's cache version
+# change, which a per-process cache such as LocMem never shows it, so
+# the timeout bounds how stale it gets like CHATBOT_CACHE_TIMEOUT.
+CHATBOT_JOBSEARCH_MAX_COMPANIES = 200
+
+CHATBOT_JOBSEARCH_TIMEOUT = CHATBOT_CACHE_TIMEOUT
+
+
+# ---- Instrumentation Settings ----
+
+# Send each request's query count and timings back in a Server-Timing
+# header. Histograms of them are always kept, at /api/metrics/requests.
+INSTRUMENTATION_SERVER_TIMING = DEBUG or \
+    os.environ.get('SERVER_TIMING') == 'True'
+
+
+# ---- Metrics Settings ----
+
+# Directory where each worker process writes its metrics, so /metrics
+# adds up every gunicorn worker. gunicorn.conf.py empties it when
+# gunicorn starts. Without it, /metrics reports only the process serving
+# the scrape.
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+
+# Seconds between each worker writing out its metrics
+METRICS_FLUSH_INTERVAL = 5
+
+# Bearer token a scraper presents to /metrics, which staff users can
+# read without
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+
+# ---- Compression Settings ----
+
+# Bytes a JSON response body needs before it is gzip or brotli
+# compressed. brotli is used when installed and the client accepts it.
+# Other responses, like the admin's HTML, are never compressed.
+COMPRESSION_MIN_SIZE = 1024
+
+
+# ---- REST Framework Settings ----
+
+# orjson is used for JSON when installed, with the same output as DRF's
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+
+# ---- API Key Settings ----
+
+# Seconds a verified API key is trusted without checking its hash again,
+# which also bounds how long a revoked key works on other workers
+API_KEY_CACHE_TIMEOUT = 60
+
+
+# ---- Chatbot Data Settings ----
+
+# Most items accepted by a single batch post
+CBDATA_BATCH_MAX_SIZE = 500
+
+# 'sync' writes posted data straight to the database, 'spool' appends it
+# to local files that the drain_cbdata command writes in bulk
+CBDATA_INGEST_MODE = os.environ.get('CBDATA_INGEST_MODE', 'sync')
+
+CBDATA_SPOOL_DIR = os.environ.get(
+    'CBDATA_SPOOL_DIR',
+    os.path.join(BASE_DIR, 'spool')
+)
+
+CBDATA_SPOOL_FSYNC = True
+
+CBDATA_SPOOL_BATCH_SIZE = 1000
+
+# Seconds new chatbot data is left before update_rollups counts it, and
+# the seconds of data it counts per transaction
+CBDATA_ROLLUP_LAG = 300
+
+CBDATA_ROLLUP_STEP = 24 * 60 * 60
+
+# Months of chatbot data partitions manage_partitions creates ahead, and
+# the months of data it keeps attached (None keeps every partition)
+CBDATA_PARTITION_MONTHS = 3
+
+CBDATA_PARTITION_RETAIN = None
+
+# Days of chatbot data expire_cbdata keeps for companies without their
+# own retention (None keeps it all), where it archives the older data,
+# and the rows it archives and deletes per transaction. The archive must
+# be durable storage, such as a mounted volume: a dyno's own disk is
+# wiped when it restarts. expire_cbdata won't run until it is set.
+CBDATA_RETENTION_DAYS = None
+
+CBDATA_ARCHIVE_DIR = os.environ.get('CBDATA_ARCHIVE_DIR')
+
+CBDATA_ARCHIVE_BATCH_SIZE = 5000
+
+# Rows fetched per round trip when streaming a chatbot data export
+CBDATA_EXPORT_CHUNK_SIZE = 2000
+
+
 # ---- REST Hook Settings ----
 
 HOOK_EVENTS = {
@@ -168,6 +313,31 @@ HOOK_EVENTS = {
     'question.removed': 'core.Question.deleted',
 }
 
+# Hooks are posted by background threads once the change is committed
+HOOK_DELIVERER = 'core.hooks.deliver_hook'
+
+HOOK_DELIVERY_WORKERS = 4
+
+# Seconds to wait for a subscriber before retrying
+HOOK_DELIVERY_TIMEOUT = 5
+
+# Retries of a failed delivery, the first after HOOK_DELIVERY_BACKOFF
+# seconds and each later one after twice as long
+HOOK_DELIVERY_RETRIES = 3
+
+HOOK_DELIVERY_BACKOFF = 2
+
+# Most deliveries waiting in each process before new ones are dropped
+HOOK_DELIVERY_MAX_QUEUED = 10000
+
+# Seconds a company's changes are collected for before one notification
+# listing the changed resources is sent (0 sends one per change)
+HOOK_DEBOUNCE_WINDOW = 2
+
+# Seconds an exiting process waits for its queued deliveries, kept well
+# inside the 30 seconds gunicorn and Heroku allow a process to stop in
+HOOK_SHUTDOWN_TIMEOUT = 10
+
 
 # ---- Heroku Settings ----
 
@@ -16,8 +16,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('cbdata.urls')),
     path('api/', include('chatbot.urls')),
+    path('api/', include('core.urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
@@ -0,0 +1,56 @@
+import csv
+import json
+
+from django.conf import settings
+
+from rest_framework.utils.encoders import JSONEncoder
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """File-like object that returns what is written instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def export_fields(model):
+    """Return the columns exported for a chatbot data model"""
+    return [
+        field.attname for field in model._meta.concrete_fields
+        if field.name != 'company'
+    ]
+
+
+def export_queryset(model, company_pk, start=None, end=None):
+    """Return the company's chatbot data dated in [start, end) in order"""
+    queryset = model.objects.filter(company_id=company_pk)
+    if start is not None:
+        queryset = queryset.filter(date_time__gte=start)
+    if end is not None:
+        queryset = queryset.filter(date_time__lt=end)
+
+    return queryset.order_by('date_time', 'pk')
+
+
+def export_lines(queryset, file_format, chunk_size=None):
+    """Yield the queryset's rows as CSV or JSON lines
+
+    Rows are fetched chunk_size at a time with a server-side cursor where
+    the database has them, so memory use doesn't grow with the export.
+    """
+    chunk_size = chunk_size or settings.CBDATA_EXPORT_CHUNK_SIZE
+    fields = export_fields(queryset.model)
+
+    if file_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for row in queryset.values_list(*fields).iterator(chunk_size):
+            yield writer.writerow(row)
+    else:
+        for row in queryset.values(*fields).iterator(chunk_size):
+            yield json.dumps(row, cls=JSONEncoder) + '\n'
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cbdata import spool
+
+
+class Command(BaseCommand):
+    """Write spooled chatbot data to the database in bulk
+
+    Run it on the same machine as the web workers, as the spool files are
+    local to them.
+    """
+    help = 'Write spooled chatbot data to the database in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Rows written per insert'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep draining every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to wait between drains with --loop'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            created = spool.drain(batch_size=options['batch_size'])
+            self.stdout.write(f'Drained { created } chatbot data items')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,25 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from cbdata.retention import expire_data
+
+
+class Command(BaseCommand):
+    """Archive and delete chatbot data past each company's retention"""
+    help = 'Archive and delete chatbot data past each company\'s retention'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Rows archived and deleted per transaction'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            expired = expire_data(batch_size=options['batch_size'])
+        except ImproperlyConfigured as e:
+            raise CommandError(e)
+
+        for name, rows in expired.items():
+            self.stdout.write(f'Expired { rows } { name } rows')
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import CbBrowsingData, CbJobsData, CbQnsData
+
+from cbdata.export import EXPORT_FORMATS, export_lines, export_queryset
+from cbdata.serializers import CbDataExportQuerySerializer
+
+EXPORT_MODELS = {
+    model._meta.model_name: model
+    for model in (CbJobsData, CbQnsData, CbBrowsingData)
+}
+
+
+class Command(BaseCommand):
+    """Stream a company's chatbot data to a CSV or JSON lines file"""
+    help = 'Stream a company\'s chatbot data to a CSV or JSON lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=list(EXPORT_MODELS))
+        parser.add_argument('company', help='Company to export data for')
+        parser.add_argument(
+            '--file-format',
+            choices=list(EXPORT_FORMATS),
+            default='csv'
+        )
+        parser.add_argument(
+            '--start',
+            help='Export data dated from this time (ISO 8601)'
+        )
+        parser.add_argument(
+            '--end',
+            help='Export data dated before this time (ISO 8601)'
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write to (default: standard output)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Rows fetched per round trip'
+        )
+
+    def handle(self, *args, **options):
+        query = {
+            field: options[field] for field in ('start', 'end')
+            if options[field]
+        }
+        serializer = CbDataExportQuerySerializer(data=query)
+        if not serializer.is_valid():
+            raise CommandError(serializer.errors)
+
+        queryset = export_queryset(
+            EXPORT_MODELS[options['model']],
+            options['company'],
+            start=serializer.validated_data.get('start'),
+            end=serializer.validated_data.get('end')
+        )
+        lines = export_lines(
+            queryset,
+            options['file_format'],
+            chunk_size=options['chunk_size']
+        )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+        else:
+            self.stdout.writelines(lines)
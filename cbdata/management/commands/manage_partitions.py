@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from cbdata import partitions
+
+
+class Command(BaseCommand):
+    """Create upcoming chatbot data partitions and detach old ones
+
+    Run it at least monthly, so new data never lands in the default
+    partition.
+    """
+    help = 'Create upcoming chatbot data partitions and detach old ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=settings.CBDATA_PARTITION_MONTHS,
+            help='Months of partitions to create after this one'
+        )
+        parser.add_argument(
+            '--retain',
+            type=int,
+            default=settings.CBDATA_PARTITION_RETAIN,
+            help='Months of data to keep attached (default: all)'
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Drop the old partitions instead of leaving them detached'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning needs PostgreSQL')
+
+        now = datetime.now(timezone.utc)
+        for model in partitions.PARTITIONED_MODELS:
+            with transaction.atomic():
+                created = partitions.create_partitions(
+                    model, options['months'], now=now
+                )
+            for name in created:
+                self.stdout.write(f'Created partition { name }')
+
+            if options['retain'] is None:
+                continue
+
+            before = partitions.add_months(now, -options['retain'])
+            with transaction.atomic():
+                detached = partitions.detach_partitions(
+                    model, before, drop=options['drop']
+                )
+            action = 'Dropped' if options['drop'] else 'Detached'
+            for name in detached:
+                self.stdout.write(f'{ action } partition { name }')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from cbdata.rollups import update_rollups
+
+
+class Command(BaseCommand):
+    """Add new chatbot data to the daily rollups"""
+    help = 'Add new chatbot data to the daily rollups'
+
+    def handle(self, *args, **options):
+        for name, groups in update_rollups().items():
+            self.stdout.write(f'Updated { groups } { name } rollup rows')
@@ -0,0 +1,134 @@
+import re
+from datetime import datetime, timezone
+
+from django.db import connection
+from django.utils.dateparse import parse_datetime
+
+from core.models import CbBrowsingData, CbJobsData, CbQnsData
+
+PARTITIONED_MODELS = (CbJobsData, CbQnsData, CbBrowsingData)
+
+UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def add_months(value, months):
+    """Return the first of the month the given months after value"""
+    month = value.month - 1 + months
+    return value.replace(
+        year=value.year + month // 12, month=month % 12 + 1, day=1,
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def partition_name(model, month):
+    """Return the name of the model's partition for a month"""
+    return f'{ model._meta.db_table }_p' + month.strftime('%Y%m')
+
+
+def get_partitions(model):
+    """Return the (name, upper bound) of each of the model's partitions
+
+    The upper bound is None for the default partition.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname, '
+            'pg_get_expr(child.relpartbound, child.oid) '
+            'FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = %s::regclass '
+            'ORDER BY child.relname',
+            [model._meta.db_table]
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = UPPER_BOUND.search(bound)
+        upper = parse_datetime(match.group(1)) if match else None
+        partitions.append((name, upper))
+
+    return partitions
+
+
+def create_partition(model, start, default=None):
+    """Create the model's partition for the month from start
+
+    date_time is set by clients, so rows dated in a month with no
+    partition yet are in the default partition. PostgreSQL won't create
+    a partition overlapping them, so they are moved out first and back
+    into the new partition after. Run it in a transaction.
+    """
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    end = add_months(start, 1)
+
+    with connection.cursor() as cursor:
+        if default is not None:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE "moved" AS '
+                f'WITH "rows" AS (DELETE FROM { qn(default) } '
+                'WHERE "date_time" >= %s AND "date_time" < %s '
+                'RETURNING *) SELECT * FROM "rows"',
+                [start.isoformat(), end.isoformat()]
+            )
+
+        cursor.execute(
+            f'CREATE TABLE { qn(partition_name(model, start)) } '
+            f'PARTITION OF { table } FOR VALUES FROM (%s) TO (%s)',
+            [start.isoformat(), end.isoformat()]
+        )
+
+        if default is not None:
+            cursor.execute(f'INSERT INTO { table } SELECT * FROM "moved"')
+            cursor.execute('DROP TABLE "moved"')
+
+
+def create_partitions(model, months, now=None):
+    """Create the model's missing partitions up to months after this one
+
+    Months already covered by a partition, including the legacy one,
+    are skipped.
+    """
+    now = now or datetime.now(timezone.utc)
+    partitions = get_partitions(model)
+    covered = max((upper for name, upper in partitions if upper),
+                  default=None)
+    default = next((name for name, upper in partitions if upper is None),
+                   None)
+
+    created = []
+    for offset in range(months + 1):
+        start = add_months(now, offset)
+        if covered and start < covered:
+            continue
+
+        create_partition(model, start, default)
+        created.append(partition_name(model, start))
+
+    return created
+
+
+def detach_partitions(model, before, drop=False):
+    """Detach the model's partitions that end on or before a date
+
+    Detached partitions are left as plain tables to archive, unless
+    drop is set.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+
+    detached = []
+    for name, upper in get_partitions(model):
+        if upper is None or upper > before:
+            continue
+
+        quoted = connection.ops.quote_name(name)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'ALTER TABLE { table } DETACH PARTITION { quoted }'
+            )
+            if drop:
+                cursor.execute(f'DROP TABLE { quoted }')
+        detached.append(name)
+
+    return detached
@@ -0,0 +1,111 @@
+import gzip
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.models import Company, RollupWatermark
+
+from cbdata.rollups import ROLLUPS
+
+
+def get_retention_days(company):
+    """Return the days of chatbot data kept for the company, or None"""
+    if company.data_retention_days is not None:
+        return company.data_retention_days
+
+    return settings.CBDATA_RETENTION_DAYS
+
+
+def archive_path(model, company_pk, now):
+    """Return the archive file for a run over one company's data"""
+    return os.path.join(
+        settings.CBDATA_ARCHIVE_DIR,
+        model._meta.model_name,
+        str(company_pk),
+        now.strftime('%Y%m%dT%H%M%S') + '.jsonl.gz'
+    )
+
+
+def expire_company_data(rollup, company, cutoff, now, batch_size):
+    """Archive then delete the company's data dated before the cutoff
+
+    Each batch is written and synced to the archive before it is
+    deleted, so a failed run can only repeat rows in the archive, not
+    lose them. Rows the rollup hasn't counted yet are left alone, which
+    is every row until it has run once.
+    """
+    watermark = RollupWatermark.objects.filter(name=rollup.name).first()
+    if watermark is None:
+        return 0
+
+    queryset = rollup.source.objects.filter(
+        company=company,
+        date_time__lt=cutoff,
+        created_at__lte=watermark.processed_until
+    ).order_by('date_time', 'pk')
+
+    archive = None
+    expired = 0
+    try:
+        while True:
+            rows = list(queryset.values()[:batch_size])
+            if not rows:
+                break
+
+            if archive is None:
+                path = archive_path(rollup.source, company.pk, now)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                archive = gzip.open(path, 'at', encoding='utf-8')
+
+            archive.write(''.join(
+                json.dumps(row, cls=JSONEncoder) + '\n' for row in rows
+            ))
+            archive.flush()
+            os.fsync(archive.fileno())
+
+            with transaction.atomic():
+                rollup.source.objects.filter(
+                    pk__in=[row['id'] for row in rows]
+                ).delete()
+            expired += len(rows)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    return expired
+
+
+def expire_data(batch_size=None, now=None):
+    """Archive and delete chatbot data older than each company's retention
+
+    Returns the rows expired for each chatbot data model. Nothing is
+    deleted unless CBDATA_ARCHIVE_DIR names where to archive it.
+    """
+    if not settings.CBDATA_ARCHIVE_DIR:
+        raise ImproperlyConfigured(
+            'Set CBDATA_ARCHIVE_DIR to durable storage to expire data.'
+        )
+
+    batch_size = batch_size or settings.CBDATA_ARCHIVE_BATCH_SIZE
+    now = now or timezone.now()
+
+    expired = {rollup.name: 0 for rollup in ROLLUPS}
+    for company in Company.objects.all():
+        days = get_retention_days(company)
+        if days is None:
+            continue
+
+        cutoff = now - timedelta(days=days)
+        for rollup in ROLLUPS:
+            expired[rollup.name] += expire_company_data(
+                rollup, company, cutoff, now, batch_size
+            )
+
+    return expired
@@ -0,0 +1,167 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.models import CbBrowsingData, CbBrowsingDailyRollup, CbJobsData, \
+                        CbJobsDailyRollup, CbQnsData, CbQnsDailyRollup, \
+                        RollupWatermark
+
+
+class Rollup:
+    """How a chatbot data model is counted into its daily rollup"""
+
+    def __init__(self, name, source, target, dimensions, counts):
+        self.name = name
+        self.source = source
+        self.target = target
+        self.dimensions = dimensions
+        self.counts = counts
+
+    @property
+    def key_fields(self):
+        return ('company_id', 'date', *self.dimensions)
+
+    def get_key(self, values):
+        """Return the rollup row key for a dict or rollup object"""
+        if isinstance(values, dict):
+            return tuple(values[field] for field in self.key_fields)
+
+        return tuple(getattr(values, field) for field in self.key_fields)
+
+
+ROLLUPS = (
+    Rollup(
+        name='cbjobsdata',
+        source=CbJobsData,
+        target=CbJobsDailyRollup,
+        dimensions=('specialism_search', 'location_search'),
+        counts={
+            'sessions': Count('pk'),
+            'found_job': Count('pk', filter=Q(found_job=True)),
+            'saw_benefits': Count('pk', filter=Q(saw_benefits=True)),
+            'saw_company_video': Count(
+                'pk', filter=Q(saw_company_video=True)
+            ),
+            'saw_job_video': Count('pk', filter=Q(saw_job_video=True)),
+            'add_to_pipeline': Count('pk', filter=Q(add_to_pipeline=True)),
+            'joined_pipeline': Count('pk', filter=Q(joined_pipeline=True)),
+        }
+    ),
+    Rollup(
+        name='cbqnsdata',
+        source=CbQnsData,
+        target=CbQnsDailyRollup,
+        dimensions=(),
+        counts={
+            'conversations': Count('pk'),
+            'has_question': Count('pk', filter=Q(has_question=True)),
+            'question_helpful': Count(
+                'pk', filter=Q(question_helpful=True)
+            ),
+            'wants_reply': Count('pk', filter=Q(wants_reply=True)),
+        }
+    ),
+    Rollup(
+        name='cbbrowsingdata',
+        source=CbBrowsingData,
+        target=CbBrowsingDailyRollup,
+        dimensions=('why_on_site',),
+        counts={
+            'conversations': Count('pk'),
+            'is_browsing': Count('pk', filter=Q(is_browsing=True)),
+        }
+    ),
+)
+
+
+def add_window(rollup, start, end):
+    """Add the data created in (start, end] to the rollup's counts"""
+    rows = list(
+        rollup.source.objects
+        .filter(created_at__gt=start, created_at__lte=end)
+        .annotate(date=TruncDate('date_time'))
+        .values(*rollup.key_fields)
+        .annotate(**rollup.counts)
+        .order_by()
+    )
+    if not rows:
+        return 0
+
+    existing = {
+        rollup.get_key(obj): obj
+        for obj in rollup.target.objects.select_for_update().filter(
+            company_id__in={row['company_id'] for row in rows},
+            date__in={row['date'] for row in rows}
+        )
+    }
+
+    created = []
+    updated = []
+    for row in rows:
+        obj = existing.get(rollup.get_key(row))
+        if obj is None:
+            created.append(rollup.target(**row))
+            continue
+
+        for field in rollup.counts:
+            setattr(obj, field, getattr(obj, field) + row[field])
+        updated.append(obj)
+
+    rollup.target.objects.bulk_create(created)
+    rollup.target.objects.bulk_update(updated, list(rollup.counts))
+
+    return len(rows)
+
+
+def update_rollup(rollup, until):
+    """Add chatbot data created since the watermark up to until
+
+    The data is added one window at a time. Each window locks the
+    watermark, starts from it and moves it on in the same transaction,
+    so overlapping runs wait for each other and no row is counted twice.
+    """
+    if not RollupWatermark.objects.filter(name=rollup.name).exists():
+        first = rollup.source.objects.order_by('created_at') \
+                                     .values_list('created_at', flat=True) \
+                                     .first()
+        if first is None:
+            return 0
+        RollupWatermark.objects.get_or_create(
+            name=rollup.name,
+            defaults={'processed_until': first - timedelta(microseconds=1)}
+        )
+
+    step = timedelta(seconds=settings.CBDATA_ROLLUP_STEP)
+    groups = 0
+    while True:
+        with transaction.atomic():
+            watermark = RollupWatermark.objects.select_for_update() \
+                                               .get(name=rollup.name)
+            start = watermark.processed_until
+            if start >= until:
+                break
+
+            end = min(start + step, until)
+            groups += add_window(rollup, start, end)
+            watermark.processed_until = end
+            watermark.save(update_fields=['processed_until'])
+
+    return groups
+
+
+def update_rollups():
+    """Bring every rollup up to date, leaving recent rows to settle
+
+    Rows are only counted once they are CBDATA_ROLLUP_LAG seconds old, so
+    inserts still in flight when the command runs aren't skipped.
+    """
+    until = timezone.now() - timedelta(seconds=settings.CBDATA_ROLLUP_LAG)
+
+    return {
+        rollup.name: update_rollup(rollup, until)
+        for rollup in ROLLUPS
+    }
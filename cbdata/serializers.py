@@ -1,7 +1,13 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
 from rest_framework import serializers
 
 from core.models import CbJobsData, CbQnsData, CbBrowsingData
 
+from cbdata.export import EXPORT_FORMATS
+
 
 class CbJobsDataCreateSerializer(serializers.ModelSerializer):
     """Serilizer to create chatbot job data objects"""
@@ -25,3 +31,38 @@ class CbBrowsingDataCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = CbBrowsingData
         exclude = ("company",)
+
+
+class CbJobsFunnelQuerySerializer(serializers.Serializer):
+    """Serializer to validate the query of a chatbot job funnel"""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    specialism_search = serializers.CharField(required=False)
+    location_search = serializers.CharField(required=False)
+
+    def validate(self, data):
+        """Default to the last 90 days and check the range is in order"""
+        data.setdefault('end', timezone.now().date())
+        data.setdefault('start', data['end'] - timedelta(days=89))
+
+        if data['start'] > data['end']:
+            raise serializers.ValidationError('start must not be after end')
+
+        return data
+
+
+class CbDataExportQuerySerializer(serializers.Serializer):
+    """Serializer to validate the query of a chatbot data export"""
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    file_format = serializers.ChoiceField(
+        choices=list(EXPORT_FORMATS),
+        default='csv'
+    )
+
+    def validate(self, data):
+        """Check the range is in order"""
+        if 'start' in data and 'end' in data and data['start'] > data['end']:
+            raise serializers.ValidationError('start must not be after end')
+
+        return data
@@ -0,0 +1,177 @@
+import fcntl
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.models import Company
+
+from cbdata.serializers import CbJobsDataCreateSerializer, \
+                               CbQnsDataCreateSerializer, \
+                               CbBrowsingDataCreateSerializer
+
+
+logger = logging.getLogger(__name__)
+
+SPOOL_SERIALIZERS = {
+    'cbjobsdata': CbJobsDataCreateSerializer,
+    'cbqnsdata': CbQnsDataCreateSerializer,
+    'cbbrowsingdata': CbBrowsingDataCreateSerializer,
+}
+
+_lock = threading.Lock()
+
+
+def spool_path():
+    """Return the spool file this process appends to"""
+    name = f'{ socket.gethostname() }-{ os.getpid() }.jsonl'
+    return os.path.join(settings.CBDATA_SPOOL_DIR, name)
+
+
+def _open_locked(path):
+    """Open and lock a spool file, retrying if it is renamed while waiting"""
+    while True:
+        f = open(path, 'a', encoding='utf-8')
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            if os.stat(path).st_ino == os.fstat(f.fileno()).st_ino:
+                return f
+        except FileNotFoundError:
+            pass
+        f.close()
+
+
+def append(name, company_pk, items):
+    """Append validated chatbot data items to this process's spool file
+
+    Each item is given its id here, so draining a file again after a
+    crash inserts nothing twice.
+    """
+    lines = ''.join(
+        json.dumps(
+            {'model': name, 'company': company_pk, 'id': uuid.uuid4(),
+             'data': item},
+            cls=JSONEncoder
+        ) + '\n'
+        for item in items
+    )
+    os.makedirs(settings.CBDATA_SPOOL_DIR, exist_ok=True)
+
+    with _lock:
+        with _open_locked(spool_path()) as f:
+            f.write(lines)
+            f.flush()
+            if settings.CBDATA_SPOOL_FSYNC:
+                os.fsync(f.fileno())
+
+
+def _read_records(path):
+    """Return the records in a spool file, skipping unreadable lines"""
+    records = []
+    with open(path, encoding='utf-8') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        for number, line in enumerate(f, start=1):
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning('Skipping bad line %s in %s', number, path)
+
+    return records
+
+
+def _build_objects(records):
+    """Return the model objects for the records, grouped by model"""
+    company_pks = {record['company'] for record in records}
+    companies = {
+        str(pk): company
+        for pk, company in Company.objects.in_bulk(company_pks).items()
+    }
+
+    objs = {}
+    for record in records:
+        serializer_class = SPOOL_SERIALIZERS.get(record['model'])
+        company = companies.get(record['company'])
+        if serializer_class is None or company is None:
+            logger.warning(
+                'Dropping %s item for unknown company %s',
+                record['model'], record['company']
+            )
+            continue
+
+        serializer = serializer_class(data=record['data'])
+        if not serializer.is_valid():
+            logger.warning('Dropping invalid %s item: %s',
+                           record['model'], serializer.errors)
+            continue
+
+        model = serializer_class.Meta.model
+        fields = dict(serializer.validated_data, company=company)
+        if 'id' in record:
+            fields['id'] = record['id']
+        objs.setdefault(model, []).append(model(**fields))
+
+    return objs
+
+
+@contextmanager
+def _drain_lock():
+    """Hold the spool directory's lock, so only one drain runs at a time"""
+    os.makedirs(settings.CBDATA_SPOOL_DIR, exist_ok=True)
+    fd = os.open(settings.CBDATA_SPOOL_DIR, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def drain(batch_size=None):
+    """Write every spooled item to the database and remove drained files
+
+    Files are renamed before they are read so new items go to a new file.
+    A file is only removed once its items are committed, so a failure
+    part way through means it is drained again rather than lost. Items
+    already committed by then are skipped by their ids. Files left by a
+    failed drain are drained first, and each rename is to a new name, so
+    a later drain of the same spool file can't replace one. Drains wait
+    for each other, so two never pick up the same files.
+    """
+    with _drain_lock():
+        return _drain(batch_size or settings.CBDATA_SPOOL_BATCH_SIZE)
+
+
+def _drain(batch_size):
+    draining = os.path.join(settings.CBDATA_SPOOL_DIR, '*.draining')
+    paths = sorted(glob.glob(draining))
+
+    pattern = os.path.join(settings.CBDATA_SPOOL_DIR, '*.jsonl')
+    for path in glob.glob(pattern):
+        renamed = f'{ path }.{ uuid.uuid4().hex }.draining'
+        os.rename(path, renamed)
+        paths.append(renamed)
+
+    created = 0
+    for path in paths:
+        objs = _build_objects(_read_records(path))
+
+        with transaction.atomic():
+            for model, model_objs in objs.items():
+                model.objects.bulk_create(
+                    model_objs,
+                    batch_size=batch_size,
+                    ignore_conflicts=True
+                )
+                created += len(model_objs)
+
+        os.remove(path)
+
+    return created
@@ -5,9 +5,7 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from rest_framework_api_key.models import APIKey
-
-from core.models import CbBrowsingData, Company
+from core.models import CbBrowsingData, Company, CompanyAPIKey
 
 
 def sample_browsing_data(company, **params):
@@ -43,15 +41,18 @@ class PrivateCbQnsDataApiTests(TestCase):
     """Test the private cbbrowsingdata API"""
 
     def setUp(self):
-        api_key, key = APIKey.objects.create_key(name="tests")
+        self.company = Company.objects.create(company_name='PiedPiper')
+        api_key, key = CompanyAPIKey.objects.create_key(
+            name="tests",
+            company=self.company
+        )
 
         self.client = APIClient()
         self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + key)
 
     def test_post_browsing_data_successful(self):
         """Test posting new browsing data from the chatbot"""
-        company = Company.objects.create(company_name='PiedPiper')
-        keywords = {'company_pk': company.id}
+        keywords = {'company_pk': self.company.id}
         POSTBROWSINGDATA_URL = reverse('cbdata:cbbrowsingdata-create',
                                        kwargs=keywords)
         payload = {
@@ -71,8 +72,7 @@ class PrivateCbQnsDataApiTests(TestCase):
 
     def test_create_browsingdata_invalid(self):
         """Test posting new browsing data with invalid payload"""
-        company = Company.objects.create(company_name='PiedPiper')
-        keywords = {'company_pk': company.id}
+        keywords = {'company_pk': self.company.id}
         POSTBROWSINGDATA_URL = reverse('cbdata:cbqnsdata-create',
                                        kwargs=keywords)
         payload = {
@@ -0,0 +1,164 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import CbBrowsingData, CbJobsData, CbQnsData, Company, \
+                        CompanyAPIKey
+
+
+def get_url(name, company):
+    """Returns the batch url to post to for the company"""
+
+    keywords = {'company_pk': company.id}
+    return reverse(f'cbdata:{ name }-batch-create', kwargs=keywords)
+
+
+def sample_jobs_payload(**params):
+    """Create and return a sample job data payload"""
+    defaults = {
+        'chatbot_user_id': 'abc123-3',
+        'date_time': '2019-12-03T12:34:56Z',
+        'specialism_search': 'Product',
+        'location_search': 'London',
+        'role_type_search': 'Individual contributor',
+        'found_job': True
+    }
+    defaults.update(params)
+
+    return defaults
+
+
+class PublicCbDataBatchApiTests(TestCase):
+    """Test the publicly available batch cbdata API"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_permission_required(self):
+        """Test that permission is required for posting a batch"""
+        company = Company.objects.create(company_name='PiedPiper')
+
+        res = self.client.post(
+            get_url('cbjobsdata', company),
+            [sample_jobs_payload()],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class PrivateCbDataBatchApiTests(TestCase):
+    """Test the private batch cbdata API"""
+
+    def setUp(self):
+        self.company = Company.objects.create(company_name='PiedPiper')
+        api_key, key = CompanyAPIKey.objects.create_key(
+            name="tests",
+            company=self.company
+        )
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + key)
+
+    def test_post_jobs_batch_successful(self):
+        """Test posting a batch of job data in a fixed number of queries"""
+        payload = [
+            sample_jobs_payload(chatbot_user_id=f'user-{ i }')
+            for i in range(10)
+        ]
+
+        # API key and the bulk insert with its savepoint
+        with self.assertNumQueries(4):
+            res = self.client.post(
+                get_url('cbjobsdata', self.company),
+                payload,
+                format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {'created': 10, 'errors': []})
+        self.assertEqual(
+            CbJobsData.objects.filter(company=self.company).count(),
+            10
+        )
+
+    def test_post_qns_and_browsing_batch_successful(self):
+        """Test posting batches of question and browsing data"""
+        item = {'chatbot_user_id': 'abc123-3',
+                'date_time': '2019-12-03T12:34:56Z'}
+
+        res1 = self.client.post(
+            get_url('cbqnsdata', self.company),
+            [dict(item, has_question=True)],
+            format='json'
+        )
+        res2 = self.client.post(
+            get_url('cbbrowsingdata', self.company),
+            [dict(item, is_browsing=True)],
+            format='json'
+        )
+
+        self.assertEqual(res1.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res2.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(CbQnsData.objects.get().has_question)
+        self.assertTrue(CbBrowsingData.objects.get().is_browsing)
+
+    def test_post_batch_partially_invalid(self):
+        """Test that valid items are saved and invalid ones reported"""
+        payload = [
+            sample_jobs_payload(),
+            sample_jobs_payload(specialism_search=''),
+            sample_jobs_payload(),
+        ]
+
+        res = self.client.post(
+            get_url('cbjobsdata', self.company),
+            payload,
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(len(res.data['errors']), 1)
+        self.assertEqual(res.data['errors'][0]['index'], 1)
+        self.assertIn('specialism_search', res.data['errors'][0]['errors'])
+        self.assertEqual(CbJobsData.objects.count(), 2)
+
+    def test_post_batch_all_invalid(self):
+        """Test that a batch with no valid items is rejected"""
+        payload = [sample_jobs_payload(date_time='')]
+
+        res = self.client.post(
+            get_url('cbjobsdata', self.company),
+            payload,
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(CbJobsData.objects.exists())
+
+    def test_post_batch_not_a_list(self):
+        """Test that posting a single object to the batch is rejected"""
+        res = self.client.post(
+            get_url('cbjobsdata', self.company),
+            sample_jobs_payload(),
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(CBDATA_BATCH_MAX_SIZE=2)
+    def test_post_batch_too_large(self):
+        """Test that a batch over the maximum size is rejected"""
+        payload = [sample_jobs_payload() for i in range(3)]
+
+        res = self.client.post(
+            get_url('cbjobsdata', self.company),
+            payload,
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(CbJobsData.objects.exists())
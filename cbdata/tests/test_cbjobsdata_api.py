@@ -5,9 +5,7 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from rest_framework_api_key.models import APIKey
-
-from core.models import CbJobsData, Company
+from core.models import CbJobsData, Company, CompanyAPIKey
 
 
 def sample_jobs_data(company, **params):
@@ -45,15 +43,18 @@ class PrivateCbJobsDataApiTests(TestCase):
     """Test the private cbjobsdata API"""
 
     def setUp(self):
-        api_key, key = APIKey.objects.create_key(name="tests")
+        self.company = Company.objects.create(company_name='PiedPiper')
+        api_key, key = CompanyAPIKey.objects.create_key(
+            name="tests",
+            company=self.company
+        )
 
         self.client = APIClient()
         self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + key)
 
     def test_post_job_data_successful(self):
         """Test posting new job data from the chatbot"""
-        company = Company.objects.create(company_name='PiedPiper')
-        keywords = {'company_pk': company.id}
+        keywords = {'company_pk': self.company.id}
         POSTJOBSDATA_URL = reverse('cbdata:cbjobsdata-create',
                                    kwargs=keywords)
         payload = {
@@ -76,8 +77,7 @@ class PrivateCbJobsDataApiTests(TestCase):
 
     def test_create_jobsdata_invalid(self):
         """Test posting new jobs data with invalid payload"""
-        company = Company.objects.create(company_name='PiedPiper')
-        keywords = {'company_pk': company.id}
+        keywords = {'company_pk': self.company.id}
         POSTJOBSDATA_URL = reverse('cbdata:cbjobsdata-create',
                                    kwargs=keywords)
         payload = {
@@ -91,10 +91,28 @@ class PrivateCbJobsDataApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_post_jobsdata_other_company_forbidden(self):
+        """Test that the API key can't post data for another company"""
+        company2 = Company.objects.create(company_name='Hooli')
+        keywords = {'company_pk': company2.id}
+        POSTJOBSDATA_URL = reverse('cbdata:cbjobsdata-create',
+                                   kwargs=keywords)
+        payload = {
+            'chatbot_user_id': 'abc123-3',
+            'date_time': '2019-12-03T12:34:56Z',
+            'specialism_search': 'Product',
+            'location_search': 'London',
+            'role_type_search': 'Individual contributor'
+        }
+
+        res = self.client.post(POSTJOBSDATA_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(CbJobsData.objects.exists())
+
     """
     - Authorised user cannot post
     - Admin user cannot post
     - Authorized API Key can post
     - Authorized API Key cannot post invalid data
-    - API Key cannot post for another company
     """
@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Company, CompanyAPIKey
+
+from cbdata.tests.test_cbjobsdata_api import sample_jobs_data
+
+
+def get_url(company):
+    """Returns the job data export url for the company"""
+
+    keywords = {'company_pk': company.id}
+    return reverse('cbdata:cbjobsdata-export', kwargs=keywords)
+
+
+def read_content(res):
+    """Return the streamed content of a response as text"""
+    return b''.join(res.streaming_content).decode('utf-8')
+
+
+class PublicCbDataExportApiTests(TestCase):
+    """Test the publicly available export API"""
+
+    def setUp(self):
+        self.company = Company.objects.create(company_name='PiedPiper')
+        self.client = APIClient()
+
+    def test_permission_required(self):
+        """Test that permission is required to export data"""
+        res = self.client.get(get_url(self.company))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_company_api_key_refused(self):
+        """Test the company's widget API key can't export its data"""
+        api_key, key = CompanyAPIKey.objects.create_key(
+            name="tests",
+            company=self.company
+        )
+        self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + key)
+
+        res = self.client.get(get_url(self.company))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_staff_required(self):
+        """Test that users who aren't staff can't export data"""
+        user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass'
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(get_url(self.company))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class PrivateCbDataExportApiTests(TestCase):
+    """Test the private export API"""
+
+    def setUp(self):
+        self.company = Company.objects.create(company_name='PiedPiper')
+        user = get_user_model().objects.create_superuser(
+            'admin@email.com',
+            'testpass'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_export_csv(self):
+        """Test the company's data is streamed as CSV in date order"""
+        sample_jobs_data(self.company, date_time='2019-12-04T09:00:00Z',
+                         location_search='Berlin')
+        sample_jobs_data(self.company)
+        company2 = Company.objects.create(company_name='Hooli')
+        sample_jobs_data(company2)
+
+        res = self.client.get(get_url(self.company))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(read_content(res))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['location_search'], 'London')
+        self.assertEqual(rows[1]['location_search'], 'Berlin')
+        self.assertNotIn('company_id', rows[0])
+
+    def test_export_jsonl_in_range(self):
+        """Test the data in a range can be streamed as JSON lines"""
+        sample_jobs_data(self.company, date_time='2019-12-04T09:00:00Z')
+        sample_jobs_data(self.company)
+
+        res = self.client.get(get_url(self.company), {
+            'file_format': 'jsonl',
+            'start': '2019-12-04T00:00:00Z',
+        })
+
+        lines = read_content(res).splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(
+            json.loads(lines[0])['date_time'],
+            '2019-12-04T09:00:00Z'
+        )
+
+    def test_export_unknown_company(self):
+        """Test that exporting a company that doesn't exist is not found"""
+        url = get_url(self.company)
+        self.company.delete()
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_invalid_format(self):
+        """Test that an unknown file format is rejected"""
+        res = self.client.get(get_url(self.company), {'file_format': 'xls'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExportCommandTests(TestCase):
+    """Test the export_cbdata command"""
+
+    def test_export_command(self):
+        """Test the command writes the company's data as CSV"""
+        company = Company.objects.create(company_name='PiedPiper')
+        sample_jobs_data(company)
+        out = io.StringIO()
+
+        call_command('export_cbdata', 'cbjobsdata', str(company.pk),
+                     stdout=out)
+
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['specialism_search'], 'Product')
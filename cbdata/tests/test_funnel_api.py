@@ -0,0 +1,158 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import CbJobsDailyRollup, Company, CompanyAPIKey
+
+
+def get_url(company):
+    """Returns the funnel url for the company"""
+
+    keywords = {'company_pk': company.id}
+    return reverse('cbdata:cbjobsdata-funnel', kwargs=keywords)
+
+
+def sample_rollup(company, date, **params):
+    """Create and return a sample job data rollup"""
+    defaults = {
+        'specialism_search': 'Product',
+        'location_search': 'London',
+        'sessions': 10,
+        'found_job': 6,
+        'saw_benefits': 4,
+        'saw_job_video': 3,
+        'add_to_pipeline': 2,
+        'joined_pipeline': 1
+    }
+    defaults.update(params)
+
+    return CbJobsDailyRollup.objects.create(
+        company=company,
+        date=date,
+        **defaults
+    )
+
+
+class PublicCbJobsFunnelApiTests(TestCase):
+    """Test the publicly available funnel API"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_permission_required(self):
+        """Test that permission is required for the funnel"""
+        company = Company.objects.create(company_name='PiedPiper')
+
+        res = self.client.get(get_url(company))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_company_api_key_refused(self):
+        """Test the company's widget API key can't read its funnel"""
+        company = Company.objects.create(company_name='PiedPiper')
+        api_key, key = CompanyAPIKey.objects.create_key(
+            name="tests",
+            company=company
+        )
+        self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + key)
+
+        res = self.client.get(get_url(company))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_staff_required(self):
+        """Test that users who aren't staff can't read the funnel"""
+        company = Company.objects.create(company_name='PiedPiper')
+        user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass'
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(get_url(company))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class PrivateCbJobsFunnelApiTests(TestCase):
+    """Test the private funnel API"""
+
+    def setUp(self):
+        self.company = Company.objects.create(company_name='PiedPiper')
+        user = get_user_model().objects.create_superuser(
+            'admin@email.com',
+            'testpass'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_funnel_summed_over_range(self):
+        """Test that the funnel sums the rollups in the date range"""
+        sample_rollup(self.company, datetime.date(2020, 1, 1))
+        sample_rollup(self.company, datetime.date(2020, 1, 2),
+                      location_search='Berlin')
+        sample_rollup(self.company, datetime.date(2020, 2, 1))
+        company2 = Company.objects.create(company_name='Hooli')
+        sample_rollup(company2, datetime.date(2020, 1, 1))
+
+        res = self.client.get(
+            get_url(self.company),
+            {'start': '2020-01-01', 'end': '2020-01-31'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['funnel'], {
+            'sessions': 20,
+            'found_job': 12,
+            'saw_benefits': 8,
+            'saw_job_video': 6,
+            'add_to_pipeline': 4,
+            'joined_pipeline': 2
+        })
+
+    def test_funnel_filtered_by_search(self):
+        """Test that the funnel can be limited to a location search"""
+        sample_rollup(self.company, datetime.date(2020, 1, 1))
+        sample_rollup(self.company, datetime.date(2020, 1, 1),
+                      location_search='Berlin', sessions=5)
+
+        res = self.client.get(
+            get_url(self.company),
+            {'start': '2020-01-01', 'end': '2020-01-01',
+             'location_search': 'Berlin'}
+        )
+
+        self.assertEqual(res.data['funnel']['sessions'], 5)
+
+    def test_funnel_empty_range(self):
+        """Test that a range with no data returns zero counts"""
+        res = self.client.get(get_url(self.company))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['funnel']['sessions'], 0)
+        self.assertEqual(res.data['end'] - res.data['start'],
+                         datetime.timedelta(days=89))
+
+    def test_funnel_invalid_range(self):
+        """Test that a start after the end is rejected"""
+        res = self.client.get(
+            get_url(self.company),
+            {'start': '2020-02-01', 'end': '2020-01-01'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_company(self):
+        """Test that an unknown company returns 404"""
+        url = get_url(self.company)
+        self.company.delete()
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
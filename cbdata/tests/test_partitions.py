@@ -0,0 +1,140 @@
+from datetime import datetime, timezone
+from importlib import import_module
+from io import StringIO
+from unittest import mock, skipIf, skipUnless
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from cbdata.partitions import add_months, create_partitions, \
+                              get_partitions, partition_name
+from cbdata.tests.test_cbjobsdata_api import sample_jobs_data
+from core.models import CbJobsData, Company
+
+
+class PartitionTests(TestCase):
+    """Test the chatbot data partition helpers"""
+
+    def test_add_months(self):
+        """Test months are added across year ends"""
+        value = datetime(2020, 11, 17, 9, 30, tzinfo=timezone.utc)
+
+        self.assertEqual(
+            add_months(value, 0),
+            datetime(2020, 11, 1, tzinfo=timezone.utc)
+        )
+        self.assertEqual(
+            add_months(value, 3),
+            datetime(2021, 2, 1, tzinfo=timezone.utc)
+        )
+        self.assertEqual(
+            add_months(value, -11),
+            datetime(2019, 12, 1, tzinfo=timezone.utc)
+        )
+
+    def test_partition_name(self):
+        """Test partitions are named after the table and month"""
+        month = datetime(2021, 2, 1, tzinfo=timezone.utc)
+
+        self.assertEqual(
+            partition_name(CbJobsData, month),
+            'core_cbjobsdata_p202102'
+        )
+
+    @skipIf(connection.vendor == 'postgresql', 'Partitioning runs here')
+    def test_command_needs_postgresql(self):
+        """Test the command refuses to run on other databases"""
+        with self.assertRaises(CommandError):
+            call_command('manage_partitions')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Partitioning needs PostgreSQL')
+class PostgresPartitionTests(TestCase):
+    """Test the partitioned tables and the command that manages them"""
+
+    def setUp(self):
+        self.company = Company.objects.create(company_name='PiedPiper')
+        self.now = datetime.now(timezone.utc)
+        self.cutoff = add_months(self.now, 1)
+
+    def get_partition(self, data):
+        """Return the partition a row is stored in"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT tableoid::regclass::text FROM core_cbjobsdata '
+                'WHERE id = %s',
+                [data.id]
+            )
+            return cursor.fetchone()[0]
+
+    def test_tables_partitioned(self):
+        """Test the migration leaves a legacy, monthly and default partition"""
+        partitions = dict(get_partitions(CbJobsData))
+
+        self.assertEqual(partitions['core_cbjobsdata_legacy'], self.cutoff)
+        self.assertIsNone(partitions['core_cbjobsdata_default'])
+        self.assertIn(partition_name(CbJobsData, self.cutoff), partitions)
+
+    def test_rows_stored_by_month(self):
+        """Test rows go to the partition for their month"""
+        old = sample_jobs_data(self.company, date_time=self.now)
+        new = sample_jobs_data(
+            self.company, date_time=add_months(self.now, 2)
+        )
+
+        self.assertEqual(self.get_partition(old), 'core_cbjobsdata_legacy')
+        self.assertEqual(
+            self.get_partition(new),
+            partition_name(CbJobsData, add_months(self.now, 2))
+        )
+
+    def test_default_rows_moved_to_new_partition(self):
+        """Test rows dated past the partitions move into new ones"""
+        later = add_months(self.now, 8)
+        data = sample_jobs_data(self.company, date_time=later)
+        self.assertEqual(self.get_partition(data), 'core_cbjobsdata_default')
+
+        create_partitions(CbJobsData, 8, now=self.now)
+
+        self.assertEqual(
+            self.get_partition(data),
+            partition_name(CbJobsData, later)
+        )
+        self.assertEqual(CbJobsData.objects.count(), 1)
+
+    def test_migration_skips_partitioned_tables(self):
+        """Test running the partition swap again leaves the tables alone"""
+        migration = import_module('core.migrations.0005_partition_cbdata')
+
+        with connection.schema_editor() as schema_editor:
+            migration.partition_table(schema_editor, CbJobsData)
+
+        self.assertIn(
+            'core_cbjobsdata_legacy', dict(get_partitions(CbJobsData))
+        )
+
+    @mock.patch('cbdata.management.commands.manage_partitions.datetime')
+    def test_command_creates_and_drops_partitions(self, mock_datetime):
+        """Test the command adds partitions ahead and drops old ones"""
+        later = add_months(self.now, 14)
+        mock_datetime.now.return_value = later
+        out = StringIO()
+
+        call_command(
+            'manage_partitions', months=1, retain=12, drop=True, stdout=out
+        )
+
+        partitions = dict(get_partitions(CbJobsData))
+        self.assertIn(partition_name(CbJobsData, later), partitions)
+        self.assertIn(
+            partition_name(CbJobsData, add_months(later, 1)), partitions
+        )
+        self.assertNotIn('core_cbjobsdata_legacy', partitions)
+        self.assertNotIn(
+            partition_name(CbJobsData, self.cutoff), partitions
+        )
+        self.assertIn(
+            'Dropped partition core_cbjobsdata_legacy', out.getvalue()
+        )
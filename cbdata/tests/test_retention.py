@@ -0,0 +1,129 @@
+import glob
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import CbJobsData, Company, RollupWatermark
+
+from cbdata.tests.test_cbjobsdata_api import sample_jobs_data
+
+
+class RetentionTests(TestCase):
+    """Test archiving and deleting expired chatbot data"""
+
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+        settings_override = override_settings(
+            CBDATA_ARCHIVE_DIR=self.archive_dir,
+            CBDATA_RETENTION_DAYS=None
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.company = Company.objects.create(
+            company_name='PiedPiper',
+            data_retention_days=30
+        )
+        self.old_date = timezone.now() - timedelta(days=40)
+
+    def roll_up_all(self):
+        """Mark every row created so far as counted by the rollups"""
+        for name in ('cbjobsdata', 'cbqnsdata', 'cbbrowsingdata'):
+            RollupWatermark.objects.update_or_create(
+                name=name,
+                defaults={'processed_until': timezone.now()}
+            )
+
+    def expire_cbdata(self, **options):
+        """Run the expire_cbdata command without printing its output"""
+        call_command('expire_cbdata', stdout=StringIO(), **options)
+
+    def read_archive(self):
+        """Return the rows in the company's job data archives"""
+        pattern = os.path.join(
+            self.archive_dir, 'cbjobsdata', str(self.company.pk), '*.gz'
+        )
+        rows = []
+        for path in glob.glob(pattern):
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                rows.extend(json.loads(line) for line in f)
+
+        return rows
+
+    def test_old_data_archived_and_deleted(self):
+        """Test data past the retention is archived in batches then deleted"""
+        for i in range(5):
+            sample_jobs_data(self.company, date_time=self.old_date)
+        recent = sample_jobs_data(self.company, date_time=timezone.now())
+        self.roll_up_all()
+
+        self.expire_cbdata(batch_size=2)
+
+        self.assertEqual(list(CbJobsData.objects.all()), [recent])
+        rows = self.read_archive()
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['company_id'], str(self.company.pk))
+
+    def test_companies_without_retention_kept(self):
+        """Test data is kept when neither company nor setting expire it"""
+        company2 = Company.objects.create(company_name='Hooli')
+        sample_jobs_data(company2, date_time=self.old_date)
+
+        self.roll_up_all()
+        self.expire_cbdata()
+
+        self.assertEqual(CbJobsData.objects.filter(company=company2).count(),
+                         1)
+
+    def test_default_retention_used(self):
+        """Test the setting applies to companies without their own"""
+        company2 = Company.objects.create(company_name='Hooli')
+        sample_jobs_data(company2, date_time=self.old_date)
+        self.roll_up_all()
+
+        with self.settings(CBDATA_RETENTION_DAYS=30):
+            self.expire_cbdata()
+
+        self.assertFalse(CbJobsData.objects.filter(company=company2).exists())
+
+    def test_data_not_rolled_up_kept(self):
+        """Test data created after the rollup watermark isn't expired"""
+        RollupWatermark.objects.create(
+            name='cbjobsdata',
+            processed_until=timezone.now() - timedelta(hours=1)
+        )
+        sample_jobs_data(self.company, date_time=self.old_date)
+
+        self.expire_cbdata()
+
+        self.assertEqual(CbJobsData.objects.count(), 1)
+        self.assertEqual(self.read_archive(), [])
+
+    def test_data_kept_before_first_rollup(self):
+        """Test nothing is expired from a table with no rollup watermark"""
+        sample_jobs_data(self.company, date_time=self.old_date)
+
+        self.expire_cbdata()
+
+        self.assertEqual(CbJobsData.objects.count(), 1)
+        self.assertEqual(self.read_archive(), [])
+
+    def test_archive_dir_required(self):
+        """Test nothing is deleted without somewhere to archive it"""
+        sample_jobs_data(self.company, date_time=self.old_date)
+
+        with self.settings(CBDATA_ARCHIVE_DIR=None):
+            with self.assertRaises(CommandError):
+                self.expire_cbdata()
+
+        self.assertEqual(CbJobsData.objects.count(), 1)
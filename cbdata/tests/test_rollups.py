@@ -0,0 +1,150 @@
+import datetime
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core.models import CbBrowsingData, CbBrowsingDailyRollup, CbJobsData, \
+                        CbJobsDailyRollup, CbQnsData, CbQnsDailyRollup, \
+                        Company
+
+from cbdata.rollups import ROLLUPS, update_rollup
+from cbdata.tests.test_cbjobsdata_api import sample_jobs_data
+
+
+def make_settled(model):
+    """Move the data's creation time back past the rollup lag"""
+    model.objects.update(created_at=timezone.now() - timedelta(hours=1))
+
+
+class RollupTests(TestCase):
+    """Test rolling up chatbot data into daily counts"""
+
+    def setUp(self):
+        self.company = Company.objects.create(company_name='PiedPiper')
+
+    def update_rollups(self):
+        """Run the update_rollups command without printing its output"""
+        call_command('update_rollups', stdout=StringIO())
+
+    def test_jobs_data_rolled_up(self):
+        """Test job data is counted by day, specialism and location"""
+        sample_jobs_data(self.company, found_job=True)
+        sample_jobs_data(self.company, found_job=False, joined_pipeline=True)
+        sample_jobs_data(self.company, date_time='2019-12-04T09:00:00Z')
+        sample_jobs_data(self.company, location_search='Berlin')
+        make_settled(CbJobsData)
+
+        self.update_rollups()
+
+        rollup = CbJobsDailyRollup.objects.get(
+            company=self.company,
+            date=datetime.date(2019, 12, 3),
+            location_search='London'
+        )
+        self.assertEqual(rollup.sessions, 2)
+        self.assertEqual(rollup.found_job, 1)
+        self.assertEqual(rollup.joined_pipeline, 1)
+        self.assertEqual(CbJobsDailyRollup.objects.count(), 3)
+
+    def test_only_new_data_added(self):
+        """Test that a second run only adds data created since the first"""
+        sample_jobs_data(self.company, found_job=True)
+        make_settled(CbJobsData)
+        self.update_rollups()
+
+        sample_jobs_data(self.company, found_job=True)
+        later = timezone.now() + timedelta(minutes=10)
+        with mock.patch('cbdata.rollups.timezone.now', return_value=later):
+            self.update_rollups()
+            self.update_rollups()
+
+        rollup = CbJobsDailyRollup.objects.get()
+        self.assertEqual(rollup.sessions, 2)
+        self.assertEqual(rollup.found_job, 2)
+
+    def test_recent_data_left_to_settle(self):
+        """Test that data newer than the lag isn't counted yet"""
+        sample_jobs_data(self.company)
+
+        self.update_rollups()
+
+        self.assertFalse(CbJobsDailyRollup.objects.exists())
+
+    def test_questions_and_browsing_rolled_up(self):
+        """Test question and browsing data are counted by day"""
+        for helpful in (True, False):
+            CbQnsData.objects.create(
+                company=self.company,
+                chatbot_user_id='abc123',
+                date_time='2020-01-04T09:43:56Z',
+                has_question=True,
+                question_helpful=helpful
+            )
+        CbBrowsingData.objects.create(
+            company=self.company,
+            chatbot_user_id='abc123',
+            date_time='2020-01-04T09:43:56Z',
+            is_browsing=True,
+            why_on_site='Looking for a job'
+        )
+        make_settled(CbQnsData)
+        make_settled(CbBrowsingData)
+
+        self.update_rollups()
+
+        qns_rollup = CbQnsDailyRollup.objects.get()
+        self.assertEqual(qns_rollup.conversations, 2)
+        self.assertEqual(qns_rollup.has_question, 2)
+        self.assertEqual(qns_rollup.question_helpful, 1)
+        browsing_rollup = CbBrowsingDailyRollup.objects.get()
+        self.assertEqual(browsing_rollup.why_on_site, 'Looking for a job')
+        self.assertEqual(browsing_rollup.is_browsing, 1)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Needs row locks')
+class ConcurrentRollupTests(TransactionTestCase):
+    """Test overlapping rollup runs against a real database"""
+
+    @override_settings(CBDATA_ROLLUP_STEP=60)
+    def test_overlapping_runs_count_once(self):
+        """Test that two runs at once add each window only once"""
+        company = Company.objects.create(company_name='PiedPiper')
+        rollup = next(r for r in ROLLUPS if r.name == 'cbjobsdata')
+        now = timezone.now()
+
+        def add_data(minutes):
+            data = sample_jobs_data(company)
+            CbJobsData.objects.filter(pk=data.pk).update(
+                created_at=now - timedelta(minutes=minutes)
+            )
+
+        # An earlier run leaves a rollup row for the new data to add to
+        add_data(61)
+        update_rollup(rollup, now - timedelta(minutes=60))
+        for minutes in range(1, 60):
+            add_data(minutes)
+
+        errors = []
+
+        def run():
+            try:
+                update_rollup(rollup, now)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(CbJobsDailyRollup.objects.get().sessions, 60)
@@ -0,0 +1,161 @@
+import fcntl
+import io
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import CbJobsData, CbQnsData, Company, CompanyAPIKey
+
+from cbdata import spool
+
+
+class SpoolIngestTests(TestCase):
+    """Test spooling chatbot data and draining it to the database"""
+
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir)
+        settings_override = override_settings(
+            CBDATA_INGEST_MODE='spool',
+            CBDATA_SPOOL_DIR=self.spool_dir,
+            CBDATA_SPOOL_FSYNC=False
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.company = Company.objects.create(company_name='PiedPiper')
+        api_key, key = CompanyAPIKey.objects.create_key(
+            name="tests",
+            company=self.company
+        )
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + key)
+
+        self.payload = {
+            'chatbot_user_id': 'abc123-3',
+            'date_time': '2019-12-03T12:34:56Z',
+            'specialism_search': 'Product',
+            'location_search': 'London',
+            'role_type_search': 'Individual contributor',
+            'found_job': True
+        }
+
+    def drain(self):
+        """Run the drain command without printing its output"""
+        call_command('drain_cbdata', stdout=io.StringIO())
+
+    def test_post_spooled_then_drained(self):
+        """Test that a post is accepted and only saved once drained"""
+        url = reverse('cbdata:cbjobsdata-create',
+                      kwargs={'company_pk': self.company.id})
+
+        res = self.client.post(url, self.payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(CbJobsData.objects.exists())
+
+        self.drain()
+
+        job_data = CbJobsData.objects.get()
+        self.assertEqual(job_data.company, self.company)
+        self.assertTrue(job_data.found_job)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_post_invalid_not_spooled(self):
+        """Test that invalid data is still rejected when spooling"""
+        url = reverse('cbdata:cbjobsdata-create',
+                      kwargs={'company_pk': self.company.id})
+        self.payload['date_time'] = ''
+
+        res = self.client.post(url, self.payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_batch_spooled_then_drained(self):
+        """Test that a batch is queued and drained to each model"""
+        jobs_url = reverse('cbdata:cbjobsdata-batch-create',
+                           kwargs={'company_pk': self.company.id})
+        qns_url = reverse('cbdata:cbqnsdata-batch-create',
+                          kwargs={'company_pk': self.company.id})
+
+        res = self.client.post(jobs_url, [self.payload] * 3, format='json')
+        self.client.post(
+            qns_url,
+            [{'chatbot_user_id': 'abc123-3',
+              'date_time': '2019-12-03T12:34:56Z'}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['queued'], 3)
+
+        self.drain()
+
+        self.assertEqual(CbJobsData.objects.count(), 3)
+        self.assertEqual(CbQnsData.objects.count(), 1)
+
+    def test_drain_skips_unknown_company_and_bad_lines(self):
+        """Test that unusable spooled items are dropped"""
+        spool.append('cbjobsdata', uuid.uuid4(), [self.payload])
+        spool.append('cbjobsdata', self.company.id, [self.payload])
+        with open(spool.spool_path(), 'a') as f:
+            f.write('{"model": "cbjobs')
+
+        self.drain()
+
+        self.assertEqual(CbJobsData.objects.get().company, self.company)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_failed_drain_kept(self):
+        """Test that items left by a failed drain are drained next time"""
+        spool.append('cbjobsdata', self.company.id, [self.payload])
+        with mock.patch.object(
+            CbJobsData.objects, 'bulk_create', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                spool.drain()
+        spool.append('cbjobsdata', self.company.id, [self.payload])
+
+        self.drain()
+
+        self.assertEqual(CbJobsData.objects.count(), 2)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_drain_after_crash_not_duplicated(self):
+        """Test that a file drained again after its commit adds no rows"""
+        spool.append('cbjobsdata', self.company.id, [self.payload] * 2)
+        with mock.patch('cbdata.spool.os.remove', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                spool.drain()
+
+        self.drain()
+
+        self.assertEqual(CbJobsData.objects.count(), 2)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_drains_wait_for_each_other(self):
+        """Test that a drain waits while another holds the spool"""
+        fd = os.open(self.spool_dir, os.O_RDONLY)
+        self.addCleanup(os.close, fd)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+        thread = threading.Thread(target=spool.drain)
+        thread.start()
+        thread.join(0.2)
+        self.assertTrue(thread.is_alive())
+
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
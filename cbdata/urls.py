@@ -1,7 +1,11 @@
 from django.urls import path
 
 from cbdata.views import CbJobsDataCreateView, CbQnsDataCreateView, \
-                         CbBrowsingDataCreateView
+                         CbBrowsingDataCreateView, CbJobsDataBatchCreateView, \
+                         CbQnsDataBatchCreateView, \
+                         CbBrowsingDataBatchCreateView, CbJobsFunnelView, \
+                         CbJobsDataExportView, CbQnsDataExportView, \
+                         CbBrowsingDataExportView
 
 
 app_name = 'cbdata'
@@ -22,4 +26,39 @@ urlpatterns = [
         CbBrowsingDataCreateView.as_view(),
         name='cbbrowsingdata-create'
     ),
+    path(
+        'cbjobsdata/<uuid:company_pk>/batch',
+        CbJobsDataBatchCreateView.as_view(),
+        name='cbjobsdata-batch-create'
+    ),
+    path(
+        'cbqnsdata/<uuid:company_pk>/batch',
+        CbQnsDataBatchCreateView.as_view(),
+        name='cbqnsdata-batch-create'
+    ),
+    path(
+        'cbbrowsingdata/<uuid:company_pk>/batch',
+        CbBrowsingDataBatchCreateView.as_view(),
+        name='cbbrowsingdata-batch-create'
+    ),
+    path(
+        'cbjobsdata/<uuid:company_pk>/funnel',
+        CbJobsFunnelView.as_view(),
+        name='cbjobsdata-funnel'
+    ),
+    path(
+        'cbjobsdata/<uuid:company_pk>/export',
+        CbJobsDataExportView.as_view(),
+        name='cbjobsdata-export'
+    ),
+    path(
+        'cbqnsdata/<uuid:company_pk>/export',
+        CbQnsDataExportView.as_view(),
+        name='cbqnsdata-export'
+    ),
+    path(
+        'cbbrowsingdata/<uuid:company_pk>/export',
+        CbBrowsingDataExportView.as_view(),
+        name='cbbrowsingdata-export'
+    ),
 ]
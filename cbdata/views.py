@@ -1,25 +1,131 @@
-from rest_framework import generics
-from rest_framework.generics import get_object_or_404
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 
-from rest_framework_api_key.permissions import HasAPIKey
+from rest_framework import generics, status
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
 
-from core.models import CbJobsData, CbQnsData, CbBrowsingData, Company
+from core.instrumentation import timed
+from core.metrics import registry
+from core.models import CbJobsData, CbJobsDailyRollup, CbQnsData, \
+                        CbBrowsingData, Company, RollupWatermark
+from core.permissions import HasCompanyAPIKey
 
-from cbdata.serializers import CbJobsDataCreateSerializer, \
+from cbdata import spool
+from cbdata.export import EXPORT_FORMATS, export_lines, export_queryset
+from cbdata.serializers import CbDataExportQuerySerializer, \
+                               CbJobsDataCreateSerializer, \
+                               CbJobsFunnelQuerySerializer, \
                                CbQnsDataCreateSerializer, \
                                CbBrowsingDataCreateSerializer
 
 
+ingested_events = registry.counter(
+    'cbdata_ingested_events_total',
+    'Chatbot data events accepted, by company and type'
+)
+
+
+def spool_enabled():
+    """Return whether posted data is spooled rather than saved directly"""
+    return settings.CBDATA_INGEST_MODE == 'spool'
+
+
 class BasicCbDataCreateView(generics.CreateAPIView):
     """Base view set for creating new chatbot data objects in the database"""
-    permission_classes = (HasAPIKey,)
+    permission_classes = (HasCompanyAPIKey,)
+
+    def create(self, request, *args, **kwargs):
+        """Spool the validated data instead of saving it when enabled"""
+        if not spool_enabled():
+            with timed('serialize'):
+                return super().create(request, *args, **kwargs)
+
+        with timed('serialize'):
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+        model_name = self.get_queryset().model._meta.model_name
+        company_pk = self.kwargs.get("company_pk")
+        spool.append(model_name, company_pk, [serializer.validated_data])
+        ingested_events.inc(company=company_pk, type=model_name)
+
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
     def perform_create(self, serializer):
         """Over-rides the default perform_create as using ForeignKey"""
+        serializer.save(company_id=self.kwargs.get("company_pk"))
+        ingested_events.inc(
+            company=self.kwargs.get("company_pk"),
+            type=self.get_queryset().model._meta.model_name
+        )
+
+
+class BasicCbDataBatchCreateView(generics.GenericAPIView):
+    """Base view set for creating a batch of chatbot data objects
+
+    Valid items are written together and invalid ones are reported back
+    by their index in the posted list. When spooling, the valid items are
+    queued for drain_cbdata and 202 is returned instead.
+    """
+    permission_classes = (HasCompanyAPIKey,)
+
+    def post(self, request, *args, **kwargs):
+        """Validate each posted item and bulk create the valid ones"""
+        if not isinstance(request.data, list):
+            raise ParseError('Expected a list of items.')
+
+        if len(request.data) > settings.CBDATA_BATCH_MAX_SIZE:
+            raise ParseError(
+                f'Expected at most { settings.CBDATA_BATCH_MAX_SIZE } items.'
+            )
+
+        valid = []
+        errors = []
+        with timed('serialize'):
+            for index, item in enumerate(request.data):
+                serializer = self.get_serializer(data=item)
+                if serializer.is_valid():
+                    valid.append(serializer.validated_data)
+                else:
+                    errors.append(
+                        {'index': index, 'errors': serializer.errors}
+                    )
+
+        if errors and not valid:
+            return Response(
+                {'created': 0, 'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        model = self.get_queryset().model
         company_pk = self.kwargs.get("company_pk")
-        company = get_object_or_404(Company, pk=company_pk)
 
-        serializer.save(company=company)
+        if spool_enabled():
+            spool.append(model._meta.model_name, company_pk, valid)
+            ingested_events.inc(
+                len(valid), company=company_pk, type=model._meta.model_name
+            )
+            return Response(
+                {'queued': len(valid), 'errors': errors},
+                status=status.HTTP_202_ACCEPTED
+            )
+
+        with transaction.atomic():
+            model.objects.bulk_create(
+                [model(company_id=company_pk, **data) for data in valid]
+            )
+        ingested_events.inc(
+            len(valid), company=company_pk, type=model._meta.model_name
+        )
+
+        return Response(
+            {'created': len(valid), 'errors': errors},
+            status=status.HTTP_201_CREATED
+        )
 
 
 class CbJobsDataCreateView(BasicCbDataCreateView):
@@ -38,3 +144,123 @@ class CbBrowsingDataCreateView(BasicCbDataCreateView):
     """Create new chatbot quetion data objects in the database"""
     queryset = CbBrowsingData.objects.all()
     serializer_class = CbBrowsingDataCreateSerializer
+
+
+class CbJobsDataBatchCreateView(BasicCbDataBatchCreateView):
+    """Create a batch of chatbot job data objects in the database"""
+    queryset = CbJobsData.objects.all()
+    serializer_class = CbJobsDataCreateSerializer
+
+
+class CbQnsDataBatchCreateView(BasicCbDataBatchCreateView):
+    """Create a batch of chatbot question data objects in the database"""
+    queryset = CbQnsData.objects.all()
+    serializer_class = CbQnsDataCreateSerializer
+
+
+class CbBrowsingDataBatchCreateView(BasicCbDataBatchCreateView):
+    """Create a batch of chatbot browsing data objects in the database"""
+    queryset = CbBrowsingData.objects.all()
+    serializer_class = CbBrowsingDataCreateSerializer
+
+
+class CbJobsFunnelView(generics.GenericAPIView):
+    """Get the chatbot job funnel for a company over a date range
+
+    The counts come from the daily rollups, so they include data up to
+    the processed_until time returned with them. Like the exports, the
+    funnel is for staff users only, as the widget API keys are public.
+    """
+    permission_classes = (IsAdminUser,)
+    queryset = CbJobsDailyRollup.objects.all()
+    serializer_class = CbJobsFunnelQuerySerializer
+    funnel_fields = (
+        'sessions',
+        'found_job',
+        'saw_benefits',
+        'saw_job_video',
+        'add_to_pipeline',
+        'joined_pipeline',
+    )
+
+    def get(self, request, *args, **kwargs):
+        """Return the funnel counts summed over the requested days"""
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        query = serializer.validated_data
+
+        company = get_object_or_404(Company, pk=self.kwargs.get("company_pk"))
+        queryset = self.get_queryset().filter(
+            company=company,
+            date__range=(query['start'], query['end'])
+        )
+        for field in ('specialism_search', 'location_search'):
+            if field in query:
+                queryset = queryset.filter(**{field: query[field]})
+
+        totals = queryset.aggregate(
+            **{field: Sum(field) for field in self.funnel_fields}
+        )
+        watermark = RollupWatermark.objects.filter(name='cbjobsdata').first()
+
+        return Response({
+            'start': query['start'],
+            'end': query['end'],
+            'processed_until': watermark and watermark.processed_until,
+            'funnel': {
+                field: totals[field] or 0 for field in self.funnel_fields
+            },
+        })
+
+
+class BasicCbDataExportView(generics.GenericAPIView):
+    """Base view set for streaming a company's chatbot data as a file
+
+    Rows are sent as they are read, so the export starts straight away
+    and memory use stays flat however many rows there are. Exports hold
+    every row a company has, so they are for staff users only, not the
+    API keys the chatbot widgets send.
+    """
+    permission_classes = (IsAdminUser,)
+    serializer_class = CbDataExportQuerySerializer
+
+    def get(self, request, *args, **kwargs):
+        """Stream the company's data in the requested range and format"""
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        query = serializer.validated_data
+
+        company = get_object_or_404(Company, pk=self.kwargs.get("company_pk"))
+        model = self.get_queryset().model
+        queryset = export_queryset(
+            model,
+            company.pk,
+            start=query.get('start'),
+            end=query.get('end')
+        )
+        file_format = query['file_format']
+
+        response = StreamingHttpResponse(
+            export_lines(queryset, file_format),
+            content_type=EXPORT_FORMATS[file_format]
+        )
+        filename = f'{ model._meta.model_name }.{ file_format }'
+        response['Content-Disposition'] = \
+            f'attachment; filename="{ filename }"'
+
+        return response
+
+
+class CbJobsDataExportView(BasicCbDataExportView):
+    """Stream a company's chatbot job data"""
+    queryset = CbJobsData.objects.all()
+
+
+class CbQnsDataExportView(BasicCbDataExportView):
+    """Stream a company's chatbot question data"""
+    queryset = CbQnsData.objects.all()
+
+
+class CbBrowsingDataExportView(BasicCbDataExportView):
+    """Stream a company's chatbot browsing data"""
+    queryset = CbBrowsingData.objects.all()
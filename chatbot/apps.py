@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class ChatbotConfig(AppConfig):
     name = 'chatbot'
+
+    def ready(self):
+        from chatbot.signals import connect_signals
+
+        connect_signals()
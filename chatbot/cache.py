@@ -0,0 +1,45 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def get_cache():
+    """Return the cache backend used for chatbot responses"""
+    return caches[settings.CHATBOT_CACHE_ALIAS]
+
+
+def version_key(company_pk):
+    """Return the cache key holding the current version for a company"""
+    return f'chatbot:version:{ company_pk }'
+
+
+def get_company_version(company_pk):
+    """Return the current cache version for a company, creating one if new"""
+    cache = get_cache()
+    key = version_key(company_pk)
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+
+    return version
+
+
+def bump_company_version(company_pk):
+    """Invalidate every cached response for a company
+
+    A fresh random version is used rather than incrementing, so an evicted
+    version key can never bring back an older cached response.
+    """
+    get_cache().set(version_key(company_pk), uuid.uuid4().hex, None)
+
+
+def response_key(company_pk, path):
+    """Return the cache key for a request path at the company's version"""
+    version = get_company_version(company_pk)
+    digest = hashlib.md5(path.encode('utf-8')).hexdigest()
+
+    return f'chatbot:response:{ company_pk }:{ version }:{ digest }'
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from core.models import ChangeLog
+
+
+def position_field():
+    """Return the change log field syncs read changes in order of
+
+    On PostgreSQL changes commit in any order, so they are placed by the
+    transaction that logged them: once every transaction below an id has
+    finished, no more changes can turn up below it. Other databases run
+    one write transaction at a time, so changes commit in seq order.
+    """
+    return 'xid' if connection.vendor == 'postgresql' else 'seq'
+
+
+def get_horizon():
+    """Return the position no more changes can be logged at or below
+
+    Returns None where the log is always complete, as changes commit in
+    order. On PostgreSQL it is below the oldest transaction still
+    running, anywhere on the server, so a long transaction holds syncs
+    back until it finishes.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT txid_snapshot_xmin(txid_current_snapshot())')
+        return cursor.fetchone()[0] - 1
+
+
+def get_settled_changes():
+    """Return the logged changes and the position they are complete to"""
+    horizon = get_horizon()
+    if horizon is None:
+        return ChangeLog.objects.all(), None
+
+    return ChangeLog.objects.filter(**{
+        f'{ position_field() }__lte': horizon
+    }), horizon
+
+
+def is_expired(since):
+    """Return whether changes after a cursor may have been pruned
+
+    prune_changelog keeps the entries at the newest position it would
+    delete, so a cursor from before them always finds one still logged
+    past the retention. A client that hasn't synced in that long is
+    sent back to a full sync either way.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.CHATBOT_CHANGELOG_DAYS)
+
+    return ChangeLog.objects.filter(**{
+        'changed_at__lt': cutoff,
+        f'{ position_field() }__gt': since,
+    }).exists()
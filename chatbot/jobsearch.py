@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+
+from core.models import Job
+
+from chatbot.cache import get_company_version
+from chatbot.serializers import JobSerializer, prefetch_specialisms
+
+
+class JobSearchIndex:
+    """Active jobs for one company, indexed by the chatbot's search terms
+
+    Terms are matched case-insensitively. Searching intersects the job id
+    sets for each term given, so it runs without touching the database.
+    A category is matched within the specialism when one is given, and
+    across every specialism otherwise.
+    """
+
+    def __init__(self, jobs):
+        self.jobs = OrderedDict()
+        self.specialisms = defaultdict(set)
+        self.categories = defaultdict(lambda: defaultdict(set))
+        self.any_categories = defaultdict(set)
+        self.role_types = defaultdict(set)
+        self.cities = defaultdict(set)
+
+        for job, data in zip(jobs, JobSerializer(jobs, many=True).data):
+            self.jobs[job.pk] = data
+            self.role_types[job.role_type.role_type.lower()].add(job.pk)
+            self.cities[job.location.city.lower()].add(job.pk)
+            for jobmap in job.specialism.all():
+                specialism = jobmap.specialism.lower()
+                category = jobmap.category_one.lower()
+                self.specialisms[specialism].add(job.pk)
+                self.categories[specialism][category].add(job.pk)
+                self.any_categories[category].add(job.pk)
+
+    @classmethod
+    def build(cls, company_pk):
+        """Return the index of a company's active jobs"""
+        jobs = Job.objects.select_related('location', 'role_type') \
+                          .prefetch_related(prefetch_specialisms()) \
+                          .filter(company_id=company_pk, active_job=True) \
+                          .order_by('created_at', 'pk')
+
+        return cls(list(jobs))
+
+    def search(self, specialism=None, category=None, role_type=None,
+               city=None):
+        """Return the data of the jobs matching every term given"""
+        matches = []
+        if specialism:
+            specialism = specialism.lower()
+            if category:
+                matches.append(
+                    self.categories.get(specialism, {})
+                                   .get(category.lower(), set())
+                )
+            else:
+                matches.append(self.specialisms.get(specialism, set()))
+        elif category:
+            matches.append(self.any_categories.get(category.lower(), set()))
+        if role_type:
+            matches.append(self.role_types.get(role_type.lower(), set()))
+        if city:
+            matches.append(self.cities.get(city.lower(), set()))
+
+        if not matches:
+            return list(self.jobs.values())
+
+        found = set.intersection(*matches)
+        return [data for pk, data in self.jobs.items() if pk in found]
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_index(company_pk):
+    """Return the company's job search index, rebuilding it if stale
+
+    Indexes are kept per process against the company's cache version,
+    which the chatbot signals change whenever jobs or anything in them
+    change, and rebuilt after CHATBOT_JOBSEARCH_TIMEOUT seconds in case
+    the change was made where this process's cache can't see it. The
+    least recently used are dropped past CHATBOT_JOBSEARCH_MAX_COMPANIES.
+    """
+    version = get_company_version(company_pk)
+    key = str(company_pk)
+    now = time.monotonic()
+
+    with _lock:
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] == version and \
+                now - cached[1] < settings.CHATBOT_JOBSEARCH_TIMEOUT:
+            _indexes.move_to_end(key)
+            return cached[2]
+
+    index = JobSearchIndex.build(company_pk)
+
+    with _lock:
+        _indexes[key] = (version, now, index)
+        _indexes.move_to_end(key)
+        while len(_indexes) > settings.CHATBOT_JOBSEARCH_MAX_COMPANIES:
+            _indexes.popitem(last=False)
+
+    return index
+
+
+def clear_indexes():
+    """Drop every job search index held by this process"""
+    with _lock:
+        _indexes.clear()
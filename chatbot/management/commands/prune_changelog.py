@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from core.models import ChangeLog
+
+from chatbot.changelog import position_field
+
+
+class Command(BaseCommand):
+    """Delete change log entries older than CHATBOT_CHANGELOG_DAYS
+
+    The old entries at the newest position are kept, so syncs from a
+    cursor before them can tell changes were pruned. Keep --days to
+    CHATBOT_CHANGELOG_DAYS or more, which syncs take as the retention.
+    """
+    help = 'Delete change log entries older than CHATBOT_CHANGELOG_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.CHATBOT_CHANGELOG_DAYS,
+            help='Days of changes to keep'
+        )
+
+    def handle(self, *args, **options):
+        field = position_field()
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        old = ChangeLog.objects.filter(changed_at__lt=cutoff)
+
+        newest = old.aggregate(position=Max(field))['position']
+        if newest is None:
+            return
+
+        # Entries logged before xid was recorded have no position
+        deleted, _ = old.filter(
+            Q(**{f'{ field }__lt': newest}) | Q(**{f'{ field }__isnull': True})
+        ).delete()
+        self.stdout.write(f'Deleted { deleted } change log entries')
@@ -1,8 +1,24 @@
+import uuid
+from collections import defaultdict
+
+from django.db.models import Prefetch, QuerySet
+
 from rest_framework import serializers
 
 from core.models import Benefit, CompanyChatbot, Job, JobMap, Location, \
                         Question, QuestionTopic, RoleType
 
+# Order each job's specialisms are listed in
+JOBMAP_ORDERING = ('specialism', 'category_one', 'id')
+
+
+def prefetch_specialisms():
+    """Return a prefetch of each job's specialisms in listing order"""
+    return Prefetch(
+        'specialism',
+        queryset=JobMap.objects.order_by(*JOBMAP_ORDERING)
+    )
+
 
 class BenefitSerializer(serializers.ModelSerializer):
     """Serializer for Benefit objects"""
@@ -97,3 +113,205 @@ class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
         fields = ['topic', 'question', 'answer']
+
+
+class BenefitChangeSerializer(BenefitSerializer):
+    """Serializer for Benefit objects in a sync, with their ids"""
+
+    class Meta(BenefitSerializer.Meta):
+        fields = ['id', *BenefitSerializer.Meta.fields]
+
+
+class CompanyChatbotChangeSerializer(CompanyChatbotSerializer):
+    """Serializer for CompanyChatbot objects in a sync, with their ids"""
+
+    class Meta(CompanyChatbotSerializer.Meta):
+        fields = ['id', *CompanyChatbotSerializer.Meta.fields]
+
+
+class JobMapChangeSerializer(JobMapSerializer):
+    """Serializer for JobMap objects in a sync, with their ids"""
+
+    class Meta(JobMapSerializer.Meta):
+        fields = ['id', *JobMapSerializer.Meta.fields]
+
+
+class LocationChangeSerializer(LocationSerializer):
+    """Serializer for Location objects in a sync, with their ids"""
+
+    class Meta(LocationSerializer.Meta):
+        fields = ['id', *LocationSerializer.Meta.fields]
+
+
+class QuestionChangeSerializer(QuestionSerializer):
+    """Serializer for Question objects in a sync, with their ids"""
+
+    class Meta(QuestionSerializer.Meta):
+        fields = ['id', *QuestionSerializer.Meta.fields]
+
+
+class ChangesQuerySerializer(serializers.Serializer):
+    """Serializer to validate the query of a chatbot sync"""
+    since = serializers.IntegerField(required=False, min_value=0)
+
+
+class JobSearchQuerySerializer(serializers.Serializer):
+    """Serializer to validate the query of a job search"""
+    specialism = serializers.CharField(required=False)
+    category = serializers.CharField(required=False)
+    role_type = serializers.CharField(required=False)
+    city = serializers.CharField(required=False)
+
+
+class ValuesSerializer:
+    """Serialize a queryset to a DRF serializer's data using .values()
+
+    fields maps each output key to a values() lookup, or to a dict of
+    them for a nested object, in the DRF serializer's field order.
+    Lookups starting with an underscore are filled in by add_related.
+    Anything but a queryset, like a page of objects, is handed to
+    serializer_class.
+    """
+    fields = {}
+    serializer_class = None
+
+    def __init__(self, instance=None, many=False, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.kwargs = kwargs
+
+    @classmethod
+    def get_lookups(cls, fields=None):
+        """Return the values() lookups the fields read"""
+        lookups = []
+        for lookup in (fields or cls.fields).values():
+            if isinstance(lookup, dict):
+                lookups.extend(cls.get_lookups(lookup))
+            elif not lookup.startswith('_'):
+                lookups.append(lookup)
+
+        return lookups
+
+    @classmethod
+    def build(cls, row, fields):
+        """Return the output dict for a row of values"""
+        data = {}
+        for name, lookup in fields.items():
+            if isinstance(lookup, dict):
+                data[name] = cls.build(row, lookup)
+                continue
+
+            value = row[lookup]
+            data[name] = str(value) if isinstance(value, uuid.UUID) else value
+
+        return data
+
+    def add_related(self, rows):
+        """Add the values not read by the main query to the rows"""
+
+    @property
+    def data(self):
+        if not self.many or not isinstance(self.instance, QuerySet):
+            return self.serializer_class(
+                self.instance, many=self.many, **self.kwargs
+            ).data
+
+        rows = list(
+            self.instance.prefetch_related(None).values(*self.get_lookups())
+        )
+        self.add_related(rows)
+
+        return [self.build(row, self.fields) for row in rows]
+
+
+class FastBenefitSerializer(ValuesSerializer):
+    """Fast serializer for lists of Benefit objects"""
+    serializer_class = BenefitSerializer
+    fields = {
+        'title': 'title',
+        'blurb': 'blurb',
+        'icon_url': 'icon_url',
+    }
+
+
+class FastCompanyChatbotSerializer(ValuesSerializer):
+    """Fast serializer for lists of CompanyChatbot objects"""
+    serializer_class = CompanyChatbotSerializer
+    fields = {
+        'company': 'company__company_name',
+        'career_site_url': 'career_site_url',
+        'privacy_notice_url': 'privacy_notice_url',
+        'benefits_url': 'benefits_url',
+        'benefits_message': 'benefits_message',
+        'next_steps': 'next_steps',
+        'company_video_url': 'company_video_url',
+        'talent_email': 'talent_email',
+    }
+
+
+class FastLocationSerializer(ValuesSerializer):
+    """Fast serializer for lists of Location objects"""
+    serializer_class = LocationSerializer
+    fields = {
+        'street_address': 'street_address',
+        'city': 'city',
+        'country': 'country',
+    }
+
+
+class FastJobMapSerializer(ValuesSerializer):
+    """Fast serializer for lists of JobMap objects"""
+    serializer_class = JobMapSerializer
+    fields = {
+        'specialism': 'specialism',
+        'category_one': 'category_one',
+    }
+
+
+class FastJobSerializer(ValuesSerializer):
+    """Fast serializer for lists of Job objects"""
+    serializer_class = JobSerializer
+    fields = {
+        'id': 'id',
+        'location': {
+            'street_address': 'location__street_address',
+            'city': 'location__city',
+            'country': 'location__country',
+        },
+        'specialism': '_specialism',
+        'title': 'title',
+        'role_type': {
+            'role_type': 'role_type__role_type',
+        },
+        'description_url': 'description_url',
+        'apply_url': 'apply_url',
+        'video_url': 'video_url',
+        'intro': 'intro',
+    }
+
+    def add_related(self, rows):
+        """Add each job's specialisms in one query"""
+        specialisms = defaultdict(list)
+        jobmaps = JobMap.objects.filter(job__in=self.instance) \
+                                .order_by(*JOBMAP_ORDERING) \
+                                .values('job', *FastJobMapSerializer.fields)
+        for jobmap in jobmaps:
+            specialisms[jobmap['job']].append(
+                FastJobMapSerializer.build(jobmap, FastJobMapSerializer.fields)
+            )
+
+        for row in rows:
+            row['_specialism'] = specialisms[row['id']]
+
+
+class FastQuestionSerializer(ValuesSerializer):
+    """Fast serializer for lists of Question objects"""
+    serializer_class = QuestionSerializer
+    fields = {
+        'topic': {
+            'index': 'topic__index',
+            'string': 'topic__string',
+        },
+        'question': 'question',
+        'answer': 'answer',
+    }
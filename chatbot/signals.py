@@ -0,0 +1,153 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, \
+                                     pre_delete
+from django.utils import timezone
+
+from core.models import Benefit, ChangeLog, Company, CompanyChatbot, Job, \
+                        JobMap, Location, Question, QuestionTopic, RoleType
+
+from chatbot.cache import bump_company_version
+
+
+CHATBOT_MODELS = (
+    Benefit,
+    CompanyChatbot,
+    Job,
+    JobMap,
+    Location,
+    Question,
+    QuestionTopic,
+    RoleType,
+)
+
+
+def log_changes(company_pk, resource, object_ids, op):
+    """Add changes to the company's chatbot objects to the change log"""
+    ChangeLog.objects.bulk_create(
+        ChangeLog(
+            company_id=company_pk,
+            resource=resource,
+            object_id=object_id,
+            op=op
+        )
+        for object_id in object_ids
+    )
+
+
+def invalidate_company(company_pk):
+    """Invalidate the company's cached responses now and once committed
+
+    A request reading before the change commits can still cache the old
+    data under the version bumped now, so it is bumped again on commit.
+    """
+    bump_company_version(company_pk)
+    transaction.on_commit(lambda: bump_company_version(company_pk))
+
+
+def company_object_changed(sender, instance, **kwargs):
+    """Invalidate the cached responses of the object's company"""
+    invalidate_company(instance.company_id)
+
+
+def company_object_saved(sender, instance, created, **kwargs):
+    """Log a created or updated chatbot object"""
+    log_changes(
+        instance.company_id,
+        instance._meta.model_name,
+        [instance.pk],
+        ChangeLog.CREATE if created else ChangeLog.UPDATE
+    )
+
+
+def company_object_deleted(sender, instance, **kwargs):
+    """Log a deleted chatbot object"""
+    log_changes(
+        instance.company_id,
+        instance._meta.model_name,
+        [instance.pk],
+        ChangeLog.DELETE
+    )
+
+
+def company_changed(sender, instance, **kwargs):
+    """Invalidate the cached responses of a changed company"""
+    invalidate_company(instance.pk)
+
+
+def job_specialism_changed(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """Log and invalidate the cache for jobs whose specialisms change
+
+    Jobs aren't saved when only their specialisms change, so updated_at
+    is moved on here as well.
+    """
+    if not action.startswith('post_'):
+        return
+
+    invalidate_company(instance.company_id)
+    if reverse:
+        job_ids = list(pk_set or ())
+    else:
+        job_ids = [instance.pk]
+
+    Job.objects.filter(pk__in=job_ids).update(updated_at=timezone.now())
+    log_changes(instance.company_id, 'job', job_ids, ChangeLog.UPDATE)
+
+
+def jobmap_deleted(sender, instance, **kwargs):
+    """Log the jobs losing a specialism that is about to be deleted
+
+    The cascade removing the jobs' links sends no m2m_changed, so their
+    updated_at is moved on here for the view validators.
+    """
+    job_ids = list(
+        Job.objects.filter(specialism=instance).values_list('pk', flat=True)
+    )
+    Job.objects.filter(pk__in=job_ids).update(updated_at=timezone.now())
+    log_changes(instance.company_id, 'job', job_ids, ChangeLog.UPDATE)
+
+
+def connect_signals():
+    """Connect the cache and change log receivers to the chatbot models"""
+    for model in CHATBOT_MODELS:
+        post_save.connect(
+            company_object_changed,
+            sender=model,
+            dispatch_uid=f'chatbot-cache-saved-{ model.__name__ }'
+        )
+        post_delete.connect(
+            company_object_changed,
+            sender=model,
+            dispatch_uid=f'chatbot-cache-deleted-{ model.__name__ }'
+        )
+        post_save.connect(
+            company_object_saved,
+            sender=model,
+            dispatch_uid=f'chatbot-changelog-saved-{ model.__name__ }'
+        )
+        post_delete.connect(
+            company_object_deleted,
+            sender=model,
+            dispatch_uid=f'chatbot-changelog-deleted-{ model.__name__ }'
+        )
+
+    post_save.connect(
+        company_changed,
+        sender=Company,
+        dispatch_uid='chatbot-cache-saved-Company'
+    )
+    post_delete.connect(
+        company_changed,
+        sender=Company,
+        dispatch_uid='chatbot-cache-deleted-Company'
+    )
+    m2m_changed.connect(
+        job_specialism_changed,
+        sender=Job.specialism.through,
+        dispatch_uid='chatbot-cache-job-specialism'
+    )
+    pre_delete.connect(
+        jobmap_deleted,
+        sender=JobMap,
+        dispatch_uid='chatbot-changelog-jobmap-deleted'
+    )
@@ -0,0 +1,113 @@
+import uuid
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Benefit, Company, CompanyAPIKey, Job, Question
+
+from chatbot.serializers import BenefitSerializer, JobSerializer, \
+                                QuestionSerializer
+from chatbot.tests.test_job_api import sample_job
+from chatbot.tests.test_question_api import sample_question, \
+                                           sample_questiontopic
+
+
+def get_url(company_pk):
+    """Returns the get url to call for the bundle"""
+
+    keywords = {'company_pk': company_pk}
+    return reverse('chatbot:bundle-list', kwargs=keywords)
+
+
+class PublicBundleApiTests(TestCase):
+    """Test the publicly available bundle API"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_permission_required(self):
+        """Test that permission is required for accessing the bundle"""
+        company = Company.objects.create(company_name='PiedPiper')
+
+        res = self.client.get(get_url(company.id))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class PrivateBundleApiTests(TestCase):
+    """Test the private bundle API"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass'
+        )
+        self.company = Company.objects.create(company_name='PiedPiper')
+
+        api_key, key = CompanyAPIKey.objects.create_key(
+            name="PiedPiper API Key",
+            company=self.company
+        )
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + key)
+
+    def test_retrieving_bundle(self):
+        """Test the bundle matches the individual list endpoints"""
+        Benefit.objects.create(
+            user=self.user,
+            company=self.company,
+            title='Parental Leave',
+            active_benefit=True
+        )
+        sample_job(self.user, self.company, title='Front End Engineer')
+        topic = sample_questiontopic(self.user, self.company)
+        sample_question(self.user, self.company, topic)
+
+        res = self.client.get(get_url(self.company.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(res.data.keys()),
+            {'benefit', 'companychatbot', 'job', 'jobmap', 'location',
+             'question'}
+        )
+        self.assertEqual(
+            res.data['benefit'],
+            BenefitSerializer(Benefit.objects.all(), many=True).data
+        )
+        self.assertEqual(
+            res.data['job'],
+            JobSerializer(Job.objects.all(), many=True).data
+        )
+        self.assertEqual(
+            res.data['question'],
+            QuestionSerializer(Question.objects.all(), many=True).data
+        )
+
+    def test_bundle_limited_by_company(self):
+        """Test that only objects for the requested company are returned"""
+        company2 = Company.objects.create(company_name='Hooli')
+        sample_job(self.user, company2, title='Front End Engineer')
+        sample_job(self.user, self.company, title='Customer Success Manager',
+                   active_job=False)
+
+        res = self.client.get(get_url(self.company.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['job'], [])
+        self.assertEqual(len(res.data['location']), 1)
+
+    def test_bundle_other_company_forbidden(self):
+        """Test that the API key can't access another company's bundle"""
+        company2 = Company.objects.create(company_name='Hooli')
+
+        res1 = self.client.get(get_url(company2.id))
+        res2 = self.client.get(get_url(uuid.uuid4()))
+
+        self.assertEqual(res1.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(res2.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,187 @@
+import gzip
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Company, CompanyAPIKey, JobMap
+
+from chatbot.cache import get_company_version
+from chatbot.tests.test_job_api import sample_job
+
+
+def get_url(company):
+    """Returns the get url to call for the jobs"""
+
+    keywords = {'company_pk': company.id}
+    return reverse('chatbot:job-list', kwargs=keywords)
+
+
+class ChatbotCacheTests(TestCase):
+    """Test caching the rendered chatbot responses"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass'
+        )
+        self.company = Company.objects.create(company_name='PiedPiper')
+
+        api_key, key = CompanyAPIKey.objects.create_key(
+            name="PiedPiper API Key",
+            company=self.company
+        )
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + key)
+
+    def test_response_served_from_cache(self):
+        """Test that a repeat request runs no queries"""
+        sample_job(self.user, self.company, title='Front End Engineer')
+        JOB_URL = get_url(self.company)
+
+        res1 = self.client.get(JOB_URL)
+
+        with self.assertNumQueries(0):
+            res2 = self.client.get(JOB_URL)
+
+        self.assertEqual(res2.status_code, status.HTTP_200_OK)
+        self.assertEqual(res1.content, res2.content)
+
+    def test_bundle_served_from_cache(self):
+        """Test that a repeat bundle request runs no queries"""
+        sample_job(self.user, self.company, title='Front End Engineer')
+        BUNDLE_URL = reverse(
+            'chatbot:bundle-list',
+            kwargs={'company_pk': self.company.id}
+        )
+
+        res1 = self.client.get(BUNDLE_URL)
+
+        with self.assertNumQueries(0):
+            res2 = self.client.get(BUNDLE_URL)
+
+        self.assertEqual(res1.content, res2.content)
+
+    def test_cache_invalidated_on_save(self):
+        """Test that saving an object changes the cached response"""
+        job = sample_job(self.user, self.company, title='Front End Engineer')
+        JOB_URL = get_url(self.company)
+        self.client.get(JOB_URL)
+
+        job.title = 'Back End Engineer'
+        job.save()
+        res = self.client.get(JOB_URL)
+
+        self.assertEqual(res.json()[0]['title'], 'Back End Engineer')
+
+    def test_cache_invalidated_on_delete(self):
+        """Test that deleting an object changes the cached response"""
+        job = sample_job(self.user, self.company, title='Front End Engineer')
+        JOB_URL = get_url(self.company)
+        self.client.get(JOB_URL)
+
+        job.delete()
+        res = self.client.get(JOB_URL)
+
+        self.assertEqual(res.json(), [])
+
+    def test_cache_invalidated_on_specialism_change(self):
+        """Test that changing a job's specialisms invalidates the cache"""
+        job = sample_job(self.user, self.company, title='Front End Engineer')
+        jobmap = JobMap.objects.create(
+            user=self.user,
+            company=self.company,
+            specialism='Engineering',
+            category_one='Building the product'
+        )
+        version = get_company_version(self.company.id)
+
+        job.specialism.add(jobmap)
+
+        self.assertNotEqual(get_company_version(self.company.id), version)
+
+    def test_cache_limited_by_company(self):
+        """Test that changes for one company keep another's cache"""
+        company2 = Company.objects.create(company_name='Hooli')
+        version = get_company_version(self.company.id)
+
+        sample_job(self.user, company2, title='Front End Engineer')
+
+        self.assertEqual(get_company_version(self.company.id), version)
+
+    @override_settings(COMPRESSION_MIN_SIZE=0)
+    def test_compressed_response_served_from_cache(self):
+        """Test that compressed bytes are cached and reused"""
+        sample_job(self.user, self.company, title='Front End Engineer')
+        JOB_URL = get_url(self.company)
+
+        res1 = self.client.get(JOB_URL, HTTP_ACCEPT_ENCODING='gzip')
+        with mock.patch('chatbot.views.compress') as compress:
+            with self.assertNumQueries(0):
+                res2 = self.client.get(JOB_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        compress.assert_not_called()
+        self.assertEqual(res2['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res2['Vary'])
+        self.assertEqual(res1.content, res2.content)
+        self.assertEqual(
+            gzip.decompress(res2.content),
+            self.client.get(JOB_URL).content
+        )
+
+    @override_settings(COMPRESSION_MIN_SIZE=0)
+    def test_compressed_cache_invalidated_on_save(self):
+        """Test that saving an object changes the compressed response"""
+        job = sample_job(self.user, self.company, title='Front End Engineer')
+        JOB_URL = get_url(self.company)
+        self.client.get(JOB_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        job.title = 'Back End Engineer'
+        job.save()
+        res = self.client.get(JOB_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertIn(b'Back End Engineer', gzip.decompress(res.content))
+
+    @override_settings(COMPRESSION_MIN_SIZE=0)
+    def test_compressed_not_modified(self):
+        """Test that a compressed response's ETag still gives a 304"""
+        sample_job(self.user, self.company, title='Front End Engineer')
+        JOB_URL = get_url(self.company)
+        res1 = self.client.get(JOB_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        res2 = self.client.get(
+            JOB_URL,
+            HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=res1['ETag']
+        )
+
+        self.assertTrue(res1['ETag'].startswith('W/'))
+        self.assertEqual(res2.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(COMPRESSION_MIN_SIZE=10 ** 6)
+    def test_small_response_not_compressed(self):
+        """Test that responses under the minimum size aren't compressed"""
+        sample_job(self.user, self.company, title='Front End Engineer')
+        JOB_URL = get_url(self.company)
+        self.client.get(JOB_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        res = self.client.get(JOB_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+    def test_cache_invalidated_on_commit(self):
+        """Test that the version is bumped again once a change commits"""
+        job = sample_job(self.user, self.company, title='Front End Engineer')
+
+        with mock.patch('chatbot.signals.transaction.on_commit') as on_commit:
+            job.save()
+        version = get_company_version(self.company.id)
+        for args, kwargs in on_commit.call_args_list:
+            args[0]()
+
+        self.assertNotEqual(get_company_version(self.company.id), version)
@@ -0,0 +1,297 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import ChangeLog, Company, CompanyAPIKey, JobMap
+
+from chatbot.tests.test_job_api import sample_job
+
+
+def get_url(company_pk):
+    """Returns the get url to call for the changes"""
+
+    keywords = {'company_pk': company_pk}
+    return reverse('chatbot:changes-list', kwargs=keywords)
+
+
+class PublicChangesApiTests(TestCase):
+    """Test the publicly available changes API"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_permission_required(self):
+        """Test that permission is required for accessing the changes"""
+        company = Company.objects.create(company_name='PiedPiper')
+
+        res = self.client.get(get_url(company.id))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class PrivateChangesApiTests(TransactionTestCase):
+    """Test the private changes API
+
+    Changes are committed as they are made, as syncs on PostgreSQL only
+    return changes from finished transactions.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass'
+        )
+        self.company = Company.objects.create(company_name='PiedPiper')
+
+        api_key, key = CompanyAPIKey.objects.create_key(
+            name="PiedPiper API Key",
+            company=self.company
+        )
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + key)
+
+    def sample_job(self, title, **params):
+        """Create a job for the test company"""
+        return sample_job(
+            user=self.user, company=self.company, title=title, **params
+        )
+
+    def get_cursor(self):
+        """Return the cursor a full sync starts from now"""
+        return self.client.get(get_url(self.company.id)).data['cursor']
+
+    def get_changes(self, since):
+        """Return the sync from a cursor"""
+        return self.client.get(get_url(self.company.id), {'since': since})
+
+    def test_full_sync_without_cursor(self):
+        """Test that every visible object is returned without a cursor"""
+        job = self.sample_job('Engineer')
+        self.sample_job('Hidden', active_job=False)
+
+        res = self.client.get(get_url(self.company.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in res.data['changed']['job']],
+            [str(job.id)]
+        )
+        self.assertEqual(len(res.data['changed']['location']), 2)
+        self.assertIn('cursor', res.data)
+
+    def test_full_sync_cursor(self):
+        """Test a sync from the full sync's cursor returns later changes"""
+        self.sample_job('Engineer')
+        since = self.get_cursor()
+
+        res = self.get_changes(since)
+        self.assertEqual(res.data['changed']['job'], [])
+
+        job = self.sample_job('Designer')
+        res = self.get_changes(since)
+        self.assertEqual(
+            [item['id'] for item in res.data['changed']['job']],
+            [str(job.id)]
+        )
+
+    def test_only_changes_since_cursor(self):
+        """Test that only objects changed since the cursor are returned"""
+        self.sample_job('Old')
+        since = self.get_cursor()
+        new_job = self.sample_job('New')
+
+        res = self.get_changes(since)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in res.data['changed']['job']],
+            [str(new_job.id)]
+        )
+        self.assertEqual(
+            [item['id'] for item in res.data['changed']['location']],
+            [str(new_job.location.id)]
+        )
+        res = self.get_changes(res.data['cursor'])
+        self.assertEqual(res.data['changed']['job'], [])
+
+    def test_no_changes_keeps_cursor(self):
+        """Test the cursor doesn't go back when nothing has changed"""
+        self.sample_job('Engineer')
+        since = self.get_cursor()
+
+        res = self.get_changes(since)
+
+        self.assertGreaterEqual(res.data['cursor'], since)
+        self.assertEqual(res.data['changed']['job'], [])
+
+    def test_related_change_returns_job(self):
+        """Test a job is returned when its location changes"""
+        job = self.sample_job('Engineer')
+        since = self.get_cursor()
+
+        job.location.city = 'London'
+        job.location.save()
+        res = self.get_changes(since)
+
+        self.assertEqual(len(res.data['changed']['job']), 1)
+        self.assertEqual(res.data['changed']['job'][0]['location']['city'],
+                         'London')
+
+    def test_specialism_changes_return_job(self):
+        """Test a job is returned when its specialisms change"""
+        job = self.sample_job('Engineer')
+        jobmap = JobMap.objects.create(
+            user=self.user,
+            company=self.company,
+            specialism='Engineering',
+            category_one='Backend'
+        )
+        since = self.get_cursor()
+
+        job.specialism.add(jobmap)
+        res = self.get_changes(since)
+        self.assertEqual(len(res.data['changed']['job']), 1)
+
+        since = res.data['cursor']
+        jobmap_id = jobmap.id
+        jobmap.delete()
+        res = self.get_changes(since)
+        self.assertEqual(res.data['changed']['job'][0]['specialism'], [])
+        self.assertEqual(res.data['deleted']['jobmap'], [jobmap_id])
+
+    def test_deleted_and_hidden_objects(self):
+        """Test deleted and deactivated objects are listed as deleted"""
+        deleted_job = self.sample_job('Deleted')
+        hidden_job = self.sample_job('Hidden')
+        deleted_id = deleted_job.id
+        since = self.get_cursor()
+
+        deleted_job.delete()
+        hidden_job.active_job = False
+        hidden_job.save()
+        res = self.get_changes(since)
+
+        self.assertEqual(res.data['changed']['job'], [])
+        self.assertCountEqual(
+            res.data['deleted']['job'],
+            [deleted_id, hidden_job.id]
+        )
+
+    def test_created_then_deleted_only_deleted(self):
+        """Test only the last change to an object is returned"""
+        since = self.get_cursor()
+        job = self.sample_job('Engineer')
+        job_id = job.id
+        job.delete()
+
+        res = self.get_changes(since)
+
+        self.assertEqual(res.data['changed']['job'], [])
+        self.assertEqual(res.data['deleted']['job'], [job_id])
+
+    def test_other_company_changes_excluded(self):
+        """Test that changes for other companies aren't returned"""
+        since = self.get_cursor()
+        company2 = Company.objects.create(company_name='Hooli')
+        sample_job(user=self.user, company=company2, title='Other').delete()
+
+        res = self.get_changes(since)
+
+        self.assertEqual(res.data['deleted']['job'], [])
+        self.assertGreaterEqual(res.data['cursor'], since)
+
+    def prune(self):
+        """Age the logged changes past the retention and prune them"""
+        ChangeLog.objects.update(
+            changed_at=timezone.now() - timedelta(days=60)
+        )
+        call_command('prune_changelog', days=30, stdout=StringIO())
+
+    def test_expired_cursor(self):
+        """Test a cursor from before the pruned log is refused"""
+        since = self.get_cursor()
+        self.sample_job('First')
+        self.sample_job('Second')
+        self.prune()
+
+        res = self.get_changes(since)
+
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+
+    def test_cursor_after_pruned_log(self):
+        """Test a cursor from after the pruned changes still syncs"""
+        self.sample_job('First')
+        self.sample_job('Second')
+        self.prune()
+        since = self.get_cursor()
+
+        res = self.get_changes(since)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_gap_in_log_not_expired(self):
+        """Test positions skipped by rolled back changes aren't expiry"""
+        since = self.get_cursor()
+        try:
+            with transaction.atomic():
+                self.sample_job('Rolled back')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        job = self.sample_job('Engineer')
+
+        res = self.get_changes(since)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in res.data['changed']['job']],
+            [str(job.id)]
+        )
+
+    @skipUnless(connection.vendor == 'postgresql', 'Needs concurrent writes')
+    def test_change_committed_late_not_skipped(self):
+        """Test a change committed after a later one isn't passed over"""
+        since = self.get_cursor()
+        started = threading.Event()
+        release = threading.Event()
+        slow_jobs = []
+
+        def change():
+            try:
+                with transaction.atomic():
+                    slow_jobs.append(self.sample_job('Slow'))
+                    started.set()
+                    release.wait(timeout=10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=change)
+        thread.start()
+        self.assertTrue(started.wait(timeout=10))
+        fast_job = self.sample_job('Fast')
+
+        first = self.get_changes(since)
+        release.set()
+        thread.join()
+        second = self.get_changes(first.data['cursor'])
+
+        synced = [
+            item['id']
+            for res in (first, second)
+            for item in res.data['changed']['job']
+        ]
+        self.assertCountEqual(
+            synced, [str(fast_job.id), str(slow_jobs[0].id)]
+        )
@@ -0,0 +1,48 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from core.models import ChangeLog, Company
+
+
+def sample_change(company, **params):
+    """Create and return a sample change log entry"""
+    defaults = {
+        'resource': 'job',
+        'object_id': company.pk,
+        'op': ChangeLog.UPDATE
+    }
+    defaults.update(params)
+
+    return ChangeLog.objects.create(company=company, **defaults)
+
+
+class PruneChangeLogCommandTests(TransactionTestCase):
+    """Test the prune_changelog command
+
+    Each change is committed on its own, as on PostgreSQL the changes a
+    transaction logs share its position.
+    """
+
+    def test_old_changes_pruned(self):
+        """Test old entries are deleted but the newest of them is kept"""
+        company = Company.objects.create(company_name='PiedPiper')
+        old = [sample_change(company) for i in range(3)]
+        recent = sample_change(company)
+        ChangeLog.objects.filter(seq__in=[old[0].seq, old[1].seq]).update(
+            changed_at=timezone.now() - timedelta(days=60)
+        )
+        ChangeLog.objects.filter(seq=recent.seq).update(
+            changed_at=timezone.now() - timedelta(days=60)
+        )
+
+        call_command('prune_changelog', days=30, stdout=StringIO())
+
+        self.assertEqual(
+            list(ChangeLog.objects.values_list('seq', flat=True)
+                                  .order_by('seq')),
+            [old[2].seq, recent.seq]
+        )
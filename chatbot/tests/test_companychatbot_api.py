@@ -5,9 +5,7 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from rest_framework_api_key.models import APIKey
-
-from core.models import Company, CompanyChatbot
+from core.models import Company, CompanyAPIKey, CompanyChatbot
 
 from chatbot.serializers import CompanyChatbotSerializer
 
@@ -58,8 +56,9 @@ class PrivateCompanyChatbotApiTests(TestCase):
         )
         self.company = Company.objects.create(company_name='PiedPiper')
 
-        api_key, key = APIKey.objects.create_key(
+        api_key, key = CompanyAPIKey.objects.create_key(
             name="PiedPiper API Key",
+            company=self.company
         )
 
         self.client = APIClient()
@@ -0,0 +1,178 @@
+import time
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils.http import http_date
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Company, CompanyAPIKey, JobMap
+
+from chatbot.cache import bump_company_version
+from chatbot.tests.test_job_api import sample_job
+
+
+def get_url(company, name='job-list'):
+    """Returns the get url to call for the company"""
+
+    keywords = {'company_pk': company.id}
+    return reverse(f'chatbot:{ name }', kwargs=keywords)
+
+
+class ConditionalRequestTests(TestCase):
+    """Test answering conditional requests for chatbot data"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass'
+        )
+        self.company = Company.objects.create(company_name='PiedPiper')
+
+        api_key, key = CompanyAPIKey.objects.create_key(
+            name="PiedPiper API Key",
+            company=self.company
+        )
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + key)
+
+    def test_etag_returned(self):
+        """Test that responses include an ETag but no Last-Modified"""
+        sample_job(self.user, self.company, title='Front End Engineer')
+
+        res = self.client.get(get_url(self.company))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', res)
+        self.assertNotIn('Last-Modified', res)
+
+    def test_not_modified_from_cache(self):
+        """Test that a matching ETag returns 304 from the cache"""
+        sample_job(self.user, self.company, title='Front End Engineer')
+        JOB_URL = get_url(self.company)
+        etag = self.client.get(JOB_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(JOB_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_not_modified_without_cache(self):
+        """Test that a matching ETag returns 304 when the cache is empty"""
+        sample_job(self.user, self.company, title='Front End Engineer')
+        JOB_URL = get_url(self.company)
+        etag = self.client.get(JOB_URL)['ETag']
+        bump_company_version(self.company.id)
+
+        # Only the version - the jobs are never fetched
+        with self.assertNumQueries(1):
+            res = self.client.get(JOB_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_modified_after_change(self):
+        """Test that a changed job returns the new data and ETag"""
+        job = sample_job(self.user, self.company, title='Front End Engineer')
+        JOB_URL = get_url(self.company)
+        etag = self.client.get(JOB_URL)['ETag']
+
+        job.title = 'Back End Engineer'
+        job.save()
+        res = self.client.get(JOB_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(res.json()[0]['title'], 'Back End Engineer')
+
+    def test_modified_after_nested_change(self):
+        """Test that changing a job's location changes the ETag"""
+        job = sample_job(self.user, self.company, title='Front End Engineer')
+        JOB_URL = get_url(self.company)
+        etag = self.client.get(JOB_URL)['ETag']
+
+        job.location.city = 'London'
+        job.location.save()
+        res = self.client.get(JOB_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()[0]['location']['city'], 'London')
+
+    def test_modified_after_specialism_deleted(self):
+        """Test that deleting a job's specialism changes the ETag"""
+        job = sample_job(self.user, self.company, title='Front End Engineer')
+        jobmap = JobMap.objects.create(
+            user=self.user,
+            company=self.company,
+            specialism='Engineering',
+            category_one='Building the product'
+        )
+        job.specialism.add(jobmap)
+        # A newer specialism, so the deleted one isn't the latest update
+        JobMap.objects.create(
+            user=self.user,
+            company=self.company,
+            specialism='Design',
+            category_one='Designing the product'
+        )
+        JOB_URL = get_url(self.company)
+        etag = self.client.get(JOB_URL)['ETag']
+
+        jobmap.delete()
+        res = self.client.get(JOB_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(res.json()[0]['specialism'], [])
+
+    def test_bundle_not_modified(self):
+        """Test that the bundle answers conditional requests"""
+        sample_job(self.user, self.company, title='Front End Engineer')
+        BUNDLE_URL = get_url(self.company, 'bundle-list')
+        etag = self.client.get(BUNDLE_URL)['ETag']
+        bump_company_version(self.company.id)
+
+        res = self.client.get(BUNDLE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_modified_since_after_deactivation(self):
+        """Test that If-Modified-Since never hides a deactivated job"""
+        job = sample_job(self.user, self.company, title='Front End Engineer')
+        # A newer job, so the deactivated one isn't the latest update
+        sample_job(self.user, self.company, title='Back End Engineer')
+        JOB_URL = get_url(self.company)
+        self.client.get(JOB_URL)
+
+        job.active_job = False
+        job.save()
+        res = self.client.get(
+            JOB_URL,
+            HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 3600)
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['title'] for item in res.json()],
+            ['Back End Engineer']
+        )
+
+    def test_modified_since_after_deletion(self):
+        """Test that If-Modified-Since never hides a deleted job"""
+        job = sample_job(self.user, self.company, title='Front End Engineer')
+        sample_job(self.user, self.company, title='Back End Engineer')
+        JOB_URL = get_url(self.company)
+        self.client.get(JOB_URL)
+
+        job.delete()
+        res = self.client.get(
+            JOB_URL,
+            HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 3600)
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()), 1)
@@ -0,0 +1,136 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Benefit, Company, CompanyAPIKey, JobMap
+
+from chatbot.cache import bump_company_version
+from chatbot.tests.test_companychatbot_api import sample_company_chatbot_data
+from chatbot.tests.test_job_api import sample_job
+from chatbot.tests.test_question_api import sample_question, \
+                                           sample_questiontopic
+from chatbot.serializers import FastJobSerializer
+from chatbot.views import BundleView, JobView
+
+
+class FastSerializerParityTests(TestCase):
+    """Test the fast serializers render the same bytes as the DRF ones"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass'
+        )
+        self.company = Company.objects.create(company_name='PiedPiper')
+        api_key, key = CompanyAPIKey.objects.create_key(
+            name="PiedPiper API Key",
+            company=self.company
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + key)
+
+        sample_company_chatbot_data(
+            user=self.user,
+            company=self.company,
+            company_name='piedpiper',
+            benefits_message='Ünïcode “quotes” and \\ slashes'
+        )
+        jobmaps = [
+            JobMap.objects.create(
+                user=self.user,
+                company=self.company,
+                specialism=specialism,
+                category_one=category
+            )
+            for specialism, category in (
+                ('Engineering', 'Frontend'),
+                ('Engineering', 'Backend'),
+                ('Design', 'Product'),
+            )
+        ]
+        for i in range(4):
+            job = sample_job(
+                user=self.user,
+                company=self.company,
+                title=f'Engineer {i}',
+                intro='' if i % 2 else 'Join us',
+                active_job=i != 3
+            )
+            job.specialism.add(*jobmaps[:i])
+        for i in range(3):
+            Benefit.objects.create(
+                user=self.user,
+                company=self.company,
+                title=f'Benefit {i}',
+                active_benefit=i != 2
+            )
+        topic = sample_questiontopic(user=self.user, company=self.company)
+        sample_question(user=self.user, company=self.company, topic=topic)
+        sample_question(user=self.user, company=self.company, topic=topic,
+                        question='Hidden', active_question=False)
+
+        company2 = Company.objects.create(company_name='Hooli')
+        sample_job(user=self.user, company=company2, title='Other')
+
+    def test_views_render_identical_bytes(self):
+        """Test every fast serializer matches its DRF serializer"""
+        renderer = JSONRenderer()
+
+        for name, view in BundleView.bundle_views.items():
+            with self.subTest(view=name):
+                queryset = view.get_company_queryset(self.company.pk)
+                self.assertTrue(queryset.ordered)
+                drf = view.serializer_class(queryset, many=True).data
+                fast = view.fast_serializer_class(queryset, many=True).data
+
+                self.assertTrue(drf)
+                self.assertEqual(renderer.render(fast), renderer.render(drf))
+
+    def test_specialisms_read_by_subquery(self):
+        """Test job specialisms are read without listing every job id"""
+        queryset = JobView.get_company_queryset(self.company.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            FastJobSerializer(queryset, many=True).data
+
+        self.assertEqual(len(queries), 2)
+        self.assertIn('IN (SELECT', queries[1]['sql'])
+
+    def test_filtered_jobs_identical(self):
+        """Test filtered job lists match too"""
+        url = reverse('chatbot:job-list',
+                      kwargs={'company_pk': self.company.id})
+        params = {'specialism': 'Engineering'}
+
+        with override_settings(CHATBOT_FAST_SERIALIZERS=False):
+            drf = self.client.get(url, params)
+        bump_company_version(self.company.pk)
+        fast = self.client.get(url, params)
+
+        self.assertEqual(fast.content, drf.content)
+
+    def test_bundle_identical(self):
+        """Test the bundle endpoint renders the same with either mode"""
+        url = reverse('chatbot:bundle-list',
+                      kwargs={'company_pk': self.company.id})
+
+        with override_settings(CHATBOT_FAST_SERIALIZERS=False):
+            drf = self.client.get(url)
+        bump_company_version(self.company.pk)
+        fast = self.client.get(url)
+
+        self.assertEqual(fast.content, drf.content)
+
+    def test_pages_use_drf_serializer(self):
+        """Test a page of jobs, not a queryset, is still serialized"""
+        url = reverse('chatbot:job-list',
+                      kwargs={'company_pk': self.company.id})
+
+        res = self.client.get(url, {'page_size': 2})
+
+        self.assertEqual(len(res.data['results']), 2)
@@ -5,9 +5,7 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from rest_framework_api_key.models import APIKey
-
-from core.models import Company, Job, Location, RoleType
+from core.models import Company, CompanyAPIKey, Job, JobMap, Location, RoleType
 
 from chatbot.serializers import JobSerializer
 
@@ -95,8 +93,9 @@ class PrivateJobApiTests(TestCase):
         )
         self.company = Company.objects.create(company_name='PiedPiper')
 
-        api_key, key = APIKey.objects.create_key(
+        api_key, key = CompanyAPIKey.objects.create_key(
             name="PiedPiper API Key",
+            company=self.company
         )
 
         self.client = APIClient()
@@ -183,3 +182,102 @@ class PrivateJobApiTests(TestCase):
             res.data[0]['title'],
             data.title
         )
+
+    def test_job_list_query_count(self):
+        """Test that the number of queries doesn't grow with the jobs"""
+
+        for i in range(5):
+            job = sample_job(
+                user=self.user,
+                company=self.company,
+                title=f'Engineer {i}'
+            )
+            job.specialism.add(
+                JobMap.objects.create(
+                    user=self.user,
+                    company=self.company,
+                    specialism='Engineering',
+                    category_one=f'Category {i}'
+                )
+            )
+
+        keywords = {'company_pk': self.company.id}
+        JOB_URL = reverse('chatbot:job-list', kwargs=keywords)
+
+        # API key, version, jobs and the prefetched specialisms
+        with self.assertNumQueries(4):
+            res = self.client.get(JOB_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 5)
+        self.assertEqual(len(res.data[0]['specialism']), 1)
+
+    def test_filtering_jobs(self):
+        """Test that jobs can be filtered by the chatbot's search"""
+        london = sample_location(
+            user=self.user,
+            company=self.company,
+            city='London'
+        )
+        engineering = JobMap.objects.create(
+            user=self.user,
+            company=self.company,
+            specialism='Engineering',
+            category_one='Backend'
+        )
+        match = sample_job(
+            user=self.user,
+            company=self.company,
+            title='Backend Engineer',
+            location=london
+        )
+        match.specialism.add(engineering)
+        sample_job(
+            user=self.user,
+            company=self.company,
+            title='Frontend Engineer'
+        ).specialism.add(engineering)
+        sample_job(
+            user=self.user,
+            company=self.company,
+            title='Sales Lead',
+            location=london
+        )
+
+        keywords = {'company_pk': self.company.id}
+        JOB_URL = reverse('chatbot:job-list', kwargs=keywords)
+
+        res = self.client.get(JOB_URL, {
+            'specialism': 'engineering',
+            'location__city': 'london',
+            'role_type': 'Team leader',
+            'title': 'end eng'
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([job['id'] for job in res.data], [str(match.id)])
+
+    def test_paginating_jobs(self):
+        """Test that jobs are paged through with a cursor when asked"""
+        for i in range(3):
+            sample_job(
+                user=self.user,
+                company=self.company,
+                title=f'Engineer {i}'
+            )
+
+        keywords = {'company_pk': self.company.id}
+        JOB_URL = reverse('chatbot:job-list', kwargs=keywords)
+
+        res = self.client.get(JOB_URL, {'page_size': 2})
+
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNone(res.data['previous'])
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [job['title'] for job in res.data['results']],
+            ['Engineer 2']
+        )
+        self.assertIsNone(res.data['next'])
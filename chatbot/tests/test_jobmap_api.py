@@ -5,9 +5,7 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from rest_framework_api_key.models import APIKey
-
-from core.models import Company, JobMap
+from core.models import Company, CompanyAPIKey, JobMap
 
 from chatbot.serializers import JobMapSerializer
 
@@ -39,8 +37,9 @@ class PrivateJobMapApiTests(TestCase):
         )
         self.company = Company.objects.create(company_name='PiedPiper')
 
-        api_key, key = APIKey.objects.create_key(
+        api_key, key = CompanyAPIKey.objects.create_key(
             name="PiedPiper API Key",
+            company=self.company
         )
 
         self.client = APIClient()
@@ -0,0 +1,190 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Company, CompanyAPIKey, Job, JobMap
+
+from chatbot.jobsearch import clear_indexes
+from chatbot.tests.test_job_api import sample_job, sample_location, \
+                                      sample_roletype
+
+
+def get_url(company_pk):
+    """Returns the get url to call for the job search"""
+
+    keywords = {'company_pk': company_pk}
+    return reverse('chatbot:jobsearch-list', kwargs=keywords)
+
+
+class PublicJobSearchApiTests(TestCase):
+    """Test the publicly available job search API"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_permission_required(self):
+        """Test that permission is required for searching jobs"""
+        company = Company.objects.create(company_name='PiedPiper')
+
+        res = self.client.get(get_url(company.id))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class PrivateJobSearchApiTests(TestCase):
+    """Test the private job search API"""
+
+    def setUp(self):
+        self.addCleanup(clear_indexes)
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass'
+        )
+        self.company = Company.objects.create(company_name='PiedPiper')
+
+        api_key, key = CompanyAPIKey.objects.create_key(
+            name="PiedPiper API Key",
+            company=self.company
+        )
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + key)
+
+        london = sample_location(
+            user=self.user,
+            company=self.company,
+            city='London'
+        )
+        individual = sample_roletype(
+            user=self.user,
+            company=self.company,
+            role_type='Individual contributor'
+        )
+        backend = self.sample_jobmap('Engineering', 'Backend')
+        frontend = self.sample_jobmap('Engineering', 'Frontend')
+
+        self.backend_job = self.sample_job('Backend Engineer', backend,
+                                           location=london)
+        self.frontend_job = self.sample_job('Frontend Engineer', frontend,
+                                            role_type=individual)
+        self.sample_job('Sales Lead', location=london)
+        self.sample_job('Old Engineer', backend, active_job=False)
+
+    def sample_jobmap(self, specialism, category_one):
+        """Create a job map for the test company"""
+        return JobMap.objects.create(
+            user=self.user,
+            company=self.company,
+            specialism=specialism,
+            category_one=category_one
+        )
+
+    def sample_job(self, title, *jobmaps, **params):
+        """Create a job for the test company with the job maps"""
+        job = sample_job(
+            user=self.user, company=self.company, title=title, **params
+        )
+        job.specialism.add(*jobmaps)
+        return job
+
+    def search(self, **params):
+        """Return the titles of the jobs found by a search"""
+        res = self.client.get(get_url(self.company.id), params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [job['title'] for job in res.data]
+
+    def test_all_active_jobs_without_terms(self):
+        """Test every active job is returned when no terms are given"""
+        self.assertEqual(
+            self.search(),
+            ['Backend Engineer', 'Frontend Engineer', 'Sales Lead']
+        )
+
+    def test_search_terms_intersected(self):
+        """Test the jobs returned match every term given"""
+        self.assertEqual(
+            self.search(specialism='engineering'),
+            ['Backend Engineer', 'Frontend Engineer']
+        )
+        self.assertEqual(
+            self.search(specialism='Engineering', category='frontend'),
+            ['Frontend Engineer']
+        )
+        self.assertEqual(
+            self.search(specialism='Engineering', city='London'),
+            ['Backend Engineer']
+        )
+        self.assertEqual(
+            self.search(role_type='individual contributor'),
+            ['Frontend Engineer']
+        )
+        self.assertEqual(self.search(city='Berlin'), [])
+
+    def test_category_without_specialism(self):
+        """Test a category alone is matched across every specialism"""
+        design = self.sample_jobmap('Design', 'Frontend')
+        self.sample_job('Frontend Designer', design)
+
+        self.assertEqual(
+            self.search(category='Frontend'),
+            ['Frontend Engineer', 'Frontend Designer']
+        )
+        self.assertEqual(self.search(category='nonexistent'), [])
+
+    def test_specialisms_listed_as_on_job_list(self):
+        """Test each job's specialisms are in the job list's order"""
+        self.backend_job.specialism.add(*(
+            self.sample_jobmap(specialism, 'Systems')
+            for specialism in ('Data', 'Security', 'Architecture', 'Cloud')
+        ))
+        job_list = self.client.get(
+            reverse('chatbot:job-list',
+                    kwargs={'company_pk': self.company.id}),
+            {'title': 'Backend'}
+        ).json()
+
+        res = self.client.get(get_url(self.company.id), {'city': 'London'})
+
+        specialisms = res.json()[0]['specialism']
+        self.assertEqual(specialisms, job_list[0]['specialism'])
+        self.assertEqual(
+            [jobmap['specialism'] for jobmap in specialisms],
+            ['Architecture', 'Cloud', 'Data', 'Engineering', 'Security']
+        )
+
+    def test_search_uses_index(self):
+        """Test repeat searches are answered without the database"""
+        self.search(city='London')
+
+        with self.assertNumQueries(0):
+            self.search(specialism='Engineering')
+
+    def test_index_rebuilt_on_change(self):
+        """Test the index picks up changes to the company's jobs"""
+        self.search()
+
+        self.frontend_job.active_job = False
+        self.frontend_job.save()
+
+        self.assertEqual(
+            self.search(specialism='Engineering'),
+            ['Backend Engineer']
+        )
+
+    def test_index_rebuilt_after_timeout(self):
+        """Test changes this process wasn't told of are seen in time"""
+        with self.settings(CHATBOT_JOBSEARCH_TIMEOUT=0):
+            self.search()
+
+            # Updating the queryset sends no signals, so the company's
+            # cache version stays the same
+            Job.objects.filter(pk=self.frontend_job.pk) \
+                       .update(active_job=False)
+
+            self.assertEqual(
+                self.search(specialism='Engineering'),
+                ['Backend Engineer']
+            )
@@ -5,9 +5,7 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from rest_framework_api_key.models import APIKey
-
-from core.models import Company, Location
+from core.models import Company, CompanyAPIKey, Location
 
 from chatbot.serializers import LocationSerializer
 
@@ -57,8 +55,9 @@ class PrivateLocationApiTests(TestCase):
         )
         self.company = Company.objects.create(company_name='PiedPiper')
 
-        api_key, key = APIKey.objects.create_key(
+        api_key, key = CompanyAPIKey.objects.create_key(
             name="PiedPiper API Key",
+            company=self.company
         )
 
         self.client = APIClient()
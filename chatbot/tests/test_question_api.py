@@ -5,9 +5,7 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from rest_framework_api_key.models import APIKey
-
-from core.models import Company, Question, QuestionTopic
+from core.models import Company, CompanyAPIKey, Question, QuestionTopic
 
 from chatbot.serializers import QuestionSerializer
 
@@ -83,8 +81,9 @@ class PrivateQuestionApiTests(TestCase):
         self.company = Company.objects.create(company_name='PiedPiper')
         self.topic = sample_questiontopic(self.user, self.company)
 
-        api_key, key = APIKey.objects.create_key(
+        api_key, key = CompanyAPIKey.objects.create_key(
             name="PiedPiper API Key",
+            company=self.company
         )
 
         self.client = APIClient()
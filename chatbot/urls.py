@@ -1,7 +1,8 @@
 from django.urls import path
 
-from chatbot.views import BenefitView, CompanyChatbotView, JobView, \
-                          JobMapView, LocationView, QuestionView
+from chatbot.views import BenefitView, BundleView, ChangesView, \
+                          CompanyChatbotView, JobView, JobMapView, \
+                          JobSearchView, LocationView, QuestionView
 
 
 app_name = 'chatbot'
@@ -37,4 +38,19 @@ urlpatterns = [
         QuestionView.as_view(),
         name='question-list'
     ),
+    path(
+        'bundle/<uuid:company_pk>',
+        BundleView.as_view(),
+        name='bundle-list'
+    ),
+    path(
+        'changes/<uuid:company_pk>',
+        ChangesView.as_view(),
+        name='changes-list'
+    ),
+    path(
+        'jobsearch/<uuid:company_pk>',
+        JobSearchView.as_view(),
+        name='jobsearch-list'
+    ),
 ]
@@ -1,107 +1,482 @@
-from rest_framework import generics
-from rest_framework.generics import get_object_or_404
-
-from rest_framework_api_key.permissions import HasAPIKey
-
-from core.models import Benefit, Company, CompanyChatbot, Job, JobMap, \
+import hashlib
+import operator
+from collections import defaultdict
+from functools import reduce
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, \
+                              patch_vary_headers
+from django.utils.http import quote_etag
+
+from rest_framework import generics, status
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.compression import compress, encode_response, select_encoding, \
+                             should_compress
+from core.instrumentation import timed
+from core.metrics import cache_requests
+from core.models import Benefit, ChangeLog, CompanyChatbot, Job, JobMap, \
                         Location, Question
+from core.permissions import HasCompanyAPIKey
+
+from chatbot.cache import get_cache, response_key
+from chatbot.changelog import get_settled_changes, is_expired, \
+                              position_field
+from chatbot.jobsearch import get_index
+from chatbot.serializers import BenefitChangeSerializer, BenefitSerializer, \
+                                ChangesQuerySerializer, \
+                                CompanyChatbotChangeSerializer, \
+                                CompanyChatbotSerializer, \
+                                FastBenefitSerializer, \
+                                FastCompanyChatbotSerializer, \
+                                FastJobSerializer, FastJobMapSerializer, \
+                                FastLocationSerializer, \
+                                FastQuestionSerializer, JobSerializer, \
+                                JobMapChangeSerializer, JobMapSerializer, \
+                                JobSearchQuerySerializer, \
+                                LocationChangeSerializer, \
+                                LocationSerializer, \
+                                QuestionChangeSerializer, \
+                                QuestionSerializer, prefetch_specialisms
+
+
+def conditional_response(request, response, etag):
+    """Add the ETag to a response, or return 304 if it matches"""
+    response['ETag'] = etag
+
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def compress_cached(request, response, key, content):
+    """Compress a cached response body, caching the compressed bytes too
+
+    Each coding is compressed once per cached response and reused until
+    the company's cache version changes.
+    """
+    if response.status_code != 200 or not should_compress(content):
+        return
+
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = select_encoding(request)
+    if encoding is None:
+        return
+
+    cache = get_cache()
+    encoded_key = f'{ key }:{ encoding }'
+    compressed = cache.get(encoded_key)
+    if compressed is None:
+        compressed = compress(content, encoding)
+        cache.set(encoded_key, compressed, settings.CHATBOT_CACHE_TIMEOUT)
+
+    encode_response(response, compressed, encoding)
+
+
+def make_etag(*versions):
+    """Return an ETag from view versions"""
+    digest = hashlib.md5(repr(versions).encode('utf-8')).hexdigest()
+
+    return quote_etag(digest)
+
+
+class CompanyCacheMixin:
+    """Serve rendered JSON responses from the company's chatbot cache
+
+    Responses carry an ETag built from the company's data, so unchanged
+    data is answered with 304 without serializing. No Last-Modified is
+    sent: the latest update doesn't move when a row is hidden or deleted.
+    Large responses are compressed for the client from the cache as well.
+    """
+
+    def get_etag(self, company_pk):
+        """Return the ETag for the company's data"""
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        """Return the cached response, rendering and caching it on a miss"""
+        if request.accepted_renderer.format != 'json':
+            with timed('serialize'):
+                return self.list(request, *args, **kwargs)
+
+        cache = get_cache()
+        company_pk = self.kwargs.get("company_pk")
+        key = response_key(company_pk, request.get_full_path())
+
+        cached = cache.get(key)
+        cache_requests.inc(
+            cache='chatbot_response',
+            result='miss' if cached is None else 'hit'
+        )
+        if cached is not None:
+            content, content_type, etag = cached
+            response = HttpResponse(content, content_type=content_type)
+            response = conditional_response(request, response, etag)
+            compress_cached(request, response, key, content)
+            return response
+
+        etag = self.get_etag(company_pk)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
+        with timed('serialize'):
+            response = self.list(request, *args, **kwargs)
+
+        def cache_response(response):
+            if response.status_code == 200:
+                cache.set(
+                    key,
+                    (response.content, response['Content-Type'], etag),
+                    settings.CHATBOT_CACHE_TIMEOUT
+                )
+                compress_cached(request, response, key, response.content)
+
+        response.add_post_render_callback(cache_response)
+
+        return conditional_response(request, response, etag)
+
+
+class BasicChatbotListView(CompanyCacheMixin, generics.ListAPIView):
+    """Base view set for getting company objects from the database
+
+    Views with a fast_serializer_class use it for their lists while
+    CHATBOT_FAST_SERIALIZERS is on.
+    """
+    permission_classes = (HasCompanyAPIKey,)
+    fast_serializer_class = None
+    company_filter = {}
+    modified_fields = ('updated_at',)
+    ordering = ('created_at', 'id')
+
+    @classmethod
+    def get_list_serializer_class(cls):
+        """Return the serializer class used for the view's lists"""
+        if cls.fast_serializer_class and settings.CHATBOT_FAST_SERIALIZERS:
+            return cls.fast_serializer_class
+
+        return cls.serializer_class
+
+    @classmethod
+    def get_company_queryset(cls, company_pk):
+        """Return the objects the chatbot can see for the given company
+
+        They are ordered explicitly, so every serializer and database
+        lists them the same way.
+        """
+        return cls.queryset.filter(
+            company_id=company_pk,
+            **cls.company_filter
+        ).order_by(*cls.ordering)
+
+    @classmethod
+    def get_company_version(cls, company_pk):
+        """Return the row count and latest update of the company's objects"""
+        aggregates = {
+            f'modified_{ i }': Max(field)
+            for i, field in enumerate(cls.modified_fields)
+        }
+        version = cls.get_company_queryset(company_pk).order_by().aggregate(
+            count=Count('pk', distinct=True),
+            **aggregates
+        )
+        modified = [
+            version[f'modified_{ i }']
+            for i in range(len(cls.modified_fields))
+            if version[f'modified_{ i }'] is not None
+        ]
+
+        return version['count'], max(modified, default=None)
+
+    @classmethod
+    def get_company_changes(cls, company_pk, changed_ids):
+        """Return the objects affected by logged changes and the ids hidden
+
+        changed_ids holds the created or updated ids of each resource.
+        Objects count as changed when they, or anything serialized with
+        them, changed. Changed objects the chatbot can no longer see are
+        returned as hidden so clients drop them.
+        """
+        model = cls.queryset.model
+        conditions = []
+        if changed_ids.get(model._meta.model_name):
+            conditions.append(Q(pk__in=changed_ids[model._meta.model_name]))
+        for field in cls.modified_fields:
+            relation, _, _ = field.rpartition('__')
+            if not relation:
+                continue
+            related = model._meta.get_field(relation).related_model
+            if changed_ids.get(related._meta.model_name):
+                conditions.append(Q(**{
+                    f'{ relation }__in': changed_ids[related._meta.model_name]
+                }))
+
+        if not conditions:
+            return cls.queryset.none(), []
+
+        changed = cls.queryset.filter(
+            reduce(operator.or_, conditions),
+            company_id=company_pk
+        ).distinct()
+        if not cls.company_filter:
+            return changed, []
+
+        hidden = changed.exclude(**cls.company_filter) \
+                        .values_list('pk', flat=True)
+
+        return changed.filter(**cls.company_filter), list(hidden)
+
+    def get_etag(self, company_pk):
+        """Return the ETag for the company's data"""
+        return make_etag(
+            (self.__class__.__name__, *self.get_company_version(company_pk))
+        )
+
+    def get_serializer_class(self):
+        """Return the fast serializer class when the view uses one"""
+        return self.get_list_serializer_class()
 
-from chatbot.serializers import BenefitSerializer, CompanyChatbotSerializer, \
-                                JobSerializer, JobMapSerializer, \
-                                LocationSerializer, QuestionSerializer
+    def get_queryset(self):
+        """Return object for the current authenticated company only"""
+        return self.get_company_queryset(self.kwargs.get("company_pk"))
 
 
-class BenefitView(generics.ListAPIView):
+class BenefitView(BasicChatbotListView):
     """Base view set for getting benefit objects from the database"""
     queryset = Benefit.objects.all()
     serializer_class = BenefitSerializer
-    permission_classes = (HasAPIKey,)
-
-    def get_queryset(self):
-        """Return object for the current authenticated company only"""
-        company_pk = self.kwargs.get("company_pk")
-        company = get_object_or_404(Company, pk=company_pk)
-
-        queryset = self.queryset
+    fast_serializer_class = FastBenefitSerializer
+    change_serializer_class = BenefitChangeSerializer
+    company_filter = {'active_benefit': True}
 
-        return queryset.filter(company=company, active_benefit=True)
 
-
-class CompanyChatbotView(generics.ListAPIView):
+class CompanyChatbotView(BasicChatbotListView):
     """Base view set for getting company chatbot objects from the database"""
-    queryset = CompanyChatbot.objects.all()
+    queryset = CompanyChatbot.objects.select_related('company')
     serializer_class = CompanyChatbotSerializer
-    permission_classes = (HasAPIKey,)
+    fast_serializer_class = FastCompanyChatbotSerializer
+    change_serializer_class = CompanyChatbotChangeSerializer
 
-    def get_queryset(self):
-        """Return object for the current authenticated company only"""
-        company_pk = self.kwargs.get("company_pk")
-        company = get_object_or_404(Company, pk=company_pk)
 
-        queryset = self.queryset
+class OptionalCursorPagination(CursorPagination):
+    """Cursor pagination used only when the client asks for a page size"""
+    page_size = None
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('created_at', 'id')
 
-        return queryset.filter(company=company)
 
+class JobView(BasicChatbotListView):
+    """Base view set for getting job objects from the database
 
-class JobView(generics.ListAPIView):
-    """Base view set for getting job objects from the database"""
-    queryset = Job.objects.all()
+    Jobs can be filtered by the query params in job_filters, and paged
+    through by passing page_size.
+    """
+    queryset = Job.objects.select_related('location', 'role_type') \
+                          .prefetch_related(prefetch_specialisms())
     serializer_class = JobSerializer
-    permission_classes = (HasAPIKey,)
+    fast_serializer_class = FastJobSerializer
+    change_serializer_class = JobSerializer
+    pagination_class = OptionalCursorPagination
+    company_filter = {'active_job': True}
+    job_filters = {
+        'specialism': 'specialism__specialism__iexact',
+        'role_type': 'role_type__role_type__iexact',
+        'location__city': 'location__city__iexact',
+        'title': 'title__icontains',
+    }
+    modified_fields = (
+        'updated_at',
+        'location__updated_at',
+        'role_type__updated_at',
+        'specialism__updated_at',
+    )
 
     def get_queryset(self):
-        """Return active objects for the current authenticated company only"""
-        company_pk = self.kwargs.get("company_pk")
-        company = get_object_or_404(Company, pk=company_pk)
+        """Return the company's jobs matching the query params"""
+        queryset = super().get_queryset()
+        filters = {
+            lookup: self.request.query_params[param]
+            for param, lookup in self.job_filters.items()
+            if self.request.query_params.get(param)
+        }
+        if not filters:
+            return queryset
 
-        queryset = self.queryset
+        queryset = queryset.filter(**filters)
+        if self.request.query_params.get('specialism'):
+            queryset = queryset.distinct()
 
-        return queryset.filter(company=company, active_job=True)
+        return queryset
 
 
-class JobMapView(generics.ListAPIView):
+class JobMapView(BasicChatbotListView):
     """Base view set for getting jobmap objects from the database"""
     queryset = JobMap.objects.all()
     serializer_class = JobMapSerializer
-    permission_classes = (HasAPIKey,)
+    fast_serializer_class = FastJobMapSerializer
+    change_serializer_class = JobMapChangeSerializer
 
-    def get_queryset(self):
-        """Return object for the current authenticated company only"""
-        company_pk = self.kwargs.get("company_pk")
-        company = get_object_or_404(Company, pk=company_pk)
-
-        queryset = self.queryset
-
-        return queryset.filter(company=company)
 
-
-class LocationView(generics.ListAPIView):
+class LocationView(BasicChatbotListView):
     """Base view set for getting location objects from the database"""
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
-    permission_classes = (HasAPIKey,)
+    fast_serializer_class = FastLocationSerializer
+    change_serializer_class = LocationChangeSerializer
 
-    def get_queryset(self):
-        """Return object for the current authenticated company only"""
-        company_pk = self.kwargs.get("company_pk")
-        company = get_object_or_404(Company, pk=company_pk)
 
-        queryset = self.queryset
-
-        return queryset.filter(company=company)
-
-
-class QuestionView(generics.ListAPIView):
+class QuestionView(BasicChatbotListView):
     """Base view set for getting question objects from the database"""
-    queryset = Question.objects.all()
+    queryset = Question.objects.select_related('topic')
     serializer_class = QuestionSerializer
-    permission_classes = (HasAPIKey,)
-
-    def get_queryset(self):
-        """Return object for the current authenticated company only"""
+    fast_serializer_class = FastQuestionSerializer
+    change_serializer_class = QuestionChangeSerializer
+    company_filter = {'active_question': True}
+    modified_fields = ('updated_at', 'topic__updated_at')
+
+
+class BundleView(CompanyCacheMixin, APIView):
+    """Get all the chatbot objects for a company in a single response"""
+    permission_classes = (HasCompanyAPIKey,)
+    bundle_views = {
+        'benefit': BenefitView,
+        'companychatbot': CompanyChatbotView,
+        'job': JobView,
+        'jobmap': JobMapView,
+        'location': LocationView,
+        'question': QuestionView,
+    }
+
+    def get_etag(self, company_pk):
+        """Return the ETag for the company's data"""
+        return make_etag(*(
+            (name, *view.get_company_version(company_pk))
+            for name, view in self.bundle_views.items()
+        ))
+
+    def list(self, request, *args, **kwargs):
+        """Return each list view's data keyed by its url name"""
         company_pk = self.kwargs.get("company_pk")
-        company = get_object_or_404(Company, pk=company_pk)
 
-        queryset = self.queryset
+        data = {}
+        for name, view in self.bundle_views.items():
+            queryset = view.get_company_queryset(company_pk)
+            data[name] = view.get_list_serializer_class()(
+                queryset, many=True
+            ).data
+
+        return Response(data)
+
+
+class ChangesView(APIView):
+    """Get the chatbot objects changed or deleted since a cursor
+
+    The cursor is a position in the change log. Without one every object
+    the chatbot can see is returned. Changes are only returned once no
+    change can still be committed before them, so a cursor never passes
+    over one. A cursor older than the pruned log gets 410, and the
+    client starts again without one.
+    """
+    permission_classes = (HasCompanyAPIKey,)
+    change_views = BundleView.bundle_views
+
+    def get(self, request, *args, **kwargs):
+        """Return the changed objects and deleted ids keyed by url name"""
+        serializer = ChangesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        since = serializer.validated_data.get('since')
+        company_pk = self.kwargs.get("company_pk")
 
-        return queryset.filter(company=company, active_question=True)
+        settled, horizon = get_settled_changes()
+
+        if since is None:
+            return self.get_all(company_pk, settled, horizon)
+
+        if is_expired(since):
+            return Response(
+                {'detail': 'Cursor expired, sync again without since.'},
+                status=status.HTTP_410_GONE
+            )
+
+        entries = settled.filter(**{
+            'company_id': company_pk,
+            f'{ position_field() }__gt': since,
+        }).order_by('seq').values_list('seq', 'resource', 'object_id', 'op')
+
+        # Only the last change to each object matters
+        last_ops = {}
+        cursor = since
+        for seq, resource, object_id, op in entries:
+            last_ops[(resource, object_id)] = op
+            cursor = seq
+        if horizon is not None:
+            cursor = max(since, horizon)
+
+        changed_ids = defaultdict(list)
+        deleted_ids = defaultdict(list)
+        for (resource, object_id), op in last_ops.items():
+            if op == ChangeLog.DELETE:
+                deleted_ids[resource].append(object_id)
+            else:
+                changed_ids[resource].append(object_id)
+
+        changed = {}
+        deleted = {}
+        with timed('serialize'):
+            for name, view in self.change_views.items():
+                queryset, hidden = view.get_company_changes(
+                    company_pk, changed_ids
+                )
+                changed[name] = view.change_serializer_class(
+                    queryset, many=True
+                ).data
+                deleted[name] = deleted_ids[name] + hidden
+
+        return Response({
+            'cursor': cursor,
+            'changed': changed,
+            'deleted': deleted,
+        })
+
+    def get_all(self, company_pk, settled, horizon):
+        """Return every visible object and the latest cursor"""
+        if horizon is None:
+            cursor = settled.aggregate(seq=Max('seq'))['seq'] or 0
+        else:
+            cursor = horizon
+
+        with timed('serialize'):
+            changed = {
+                name: view.change_serializer_class(
+                    view.get_company_queryset(company_pk), many=True
+                ).data
+                for name, view in self.change_views.items()
+            }
+
+        return Response({
+            'cursor': cursor,
+            'changed': changed,
+            'deleted': {name: [] for name in self.change_views},
+        })
+
+
+class JobSearchView(APIView):
+    """Search a company's active jobs by the chatbot's search terms
+
+    Searches run against an in-memory index of the company's jobs, so
+    repeat searches don't query the database.
+    """
+    permission_classes = (HasCompanyAPIKey,)
+
+    def get(self, request, *args, **kwargs):
+        """Return the jobs matching every search term given"""
+        serializer = JobSearchQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        index = get_index(self.kwargs.get("company_pk"))
+
+        return Response(index.search(**serializer.validated_data))
@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext as _
 
+from rest_framework_api_key.admin import APIKeyModelAdmin
+
 from core import models
 
 
@@ -25,11 +27,21 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class CompanyAPIKeyAdmin(APIKeyModelAdmin):
+    list_display = [*APIKeyModelAdmin.list_display, 'company']
+    list_filter = [*APIKeyModelAdmin.list_filter, 'company']
+
+
 admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Company)
+admin.site.register(models.CompanyAPIKey, CompanyAPIKeyAdmin)
 admin.site.register(models.CbJobsData)
 admin.site.register(models.CbQnsData)
 admin.site.register(models.CbBrowsingData)
+admin.site.register(models.CbJobsDailyRollup)
+admin.site.register(models.CbQnsDailyRollup)
+admin.site.register(models.CbBrowsingDailyRollup)
+admin.site.register(models.ChangeLog)
 admin.site.register(models.Location)
 admin.site.register(models.Job)
 admin.site.register(models.CompanyChatbot)
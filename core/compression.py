@@ -0,0 +1,99 @@
+import gzip
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from django.conf import settings
+
+# gzip level and brotli quality trading size against time for responses
+# compressed while the client waits
+GZIP_LEVEL = 6
+
+BROTLI_QUALITY = 5
+
+STRONG_ETAG = re.compile(r'^"')
+
+
+def get_encodings():
+    """Return the supported content codings, most preferred first"""
+    if brotli is None:
+        return ('gzip',)
+
+    return ('br', 'gzip')
+
+
+def parse_accept_encoding(header):
+    """Return the quality the Accept-Encoding header gives each coding"""
+    qualities = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        quality = 1.0
+        name, _, value = params.partition('=')
+        if name.strip().lower() == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+
+    return qualities
+
+
+def select_encoding(request):
+    """Return the supported coding the request prefers, or None"""
+    qualities = parse_accept_encoding(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    )
+
+    best, best_quality = None, 0.0
+    for encoding in get_encodings():
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+
+def is_json(response):
+    """Return whether a response is a JSON API response
+
+    Only JSON is compressed: HTML pages can reflect request data next to
+    secrets like CSRF tokens, which compression leaks through the
+    response size (BREACH).
+    """
+    content_type = response.get('Content-Type', '')
+    media_type = content_type.partition(';')[0].strip().lower()
+
+    return media_type == 'application/json' or media_type.endswith('+json')
+
+
+def should_compress(content):
+    """Return whether a response body is big enough to compress"""
+    return len(content) >= settings.COMPRESSION_MIN_SIZE
+
+
+def compress(content, encoding):
+    """Return the content compressed with a supported coding"""
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def encode_response(response, compressed, encoding):
+    """Replace a response's body with its compressed form"""
+    response.content = compressed
+    response['Content-Length'] = str(len(compressed))
+    response['Content-Encoding'] = encoding
+
+    # The compressed body differs byte for byte, so a strong ETag for
+    # the uncompressed body no longer holds
+    if response.has_header('ETag'):
+        response['ETag'] = STRONG_ETAG.sub('W/"', response['ETag'])
@@ -0,0 +1,265 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+
+import requests
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+
+from core.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+# Responses worth trying again; anything else is final
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+deliveries = registry.counter(
+    'hook_deliveries_total', 'Webhook delivery attempts by outcome'
+)
+
+
+class HookDeliverer:
+    """Send rest_hooks payloads from a pool of background threads
+
+    Each thread keeps its own requests session, so repeat deliveries to a
+    target reuse the connection. Failed deliveries are retried after a
+    growing delay without holding up a thread. Deliveries are only kept
+    in memory; see shutdown for what happens to them when the process
+    exits.
+    """
+
+    def __init__(self, workers, timeout, retries, backoff, max_queued):
+        self.workers = workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_queued = max_queued
+
+        self.pid = None
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.pending = 0
+
+    def start(self):
+        """Start the worker threads, again in a process forked since"""
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+
+            self.queue = queue.Queue(self.max_queued)
+            self.pending = 0
+            for i in range(self.workers):
+                threading.Thread(
+                    target=self.work,
+                    name=f'hook-deliverer-{ i }',
+                    daemon=True
+                ).start()
+            self.pid = os.getpid()
+
+    def enqueue(self, hook, body, attempt=0):
+        """Queue a JSON body to post to the hook's target"""
+        self.start()
+        with self.lock:
+            self.pending += 1
+        try:
+            self.queue.put_nowait((hook, body, attempt))
+        except queue.Full:
+            logger.error('Hook queue full, dropping delivery to %s',
+                         hook.target)
+            deliveries.inc(outcome='dropped')
+            self.done()
+
+    def done(self):
+        """Mark a delivery as finished, whether or not it was sent"""
+        with self.lock:
+            self.pending -= 1
+            if not self.pending:
+                self.idle.notify_all()
+
+    def flush(self, timeout=None):
+        """Wait for the queued deliveries, returning whether they finished"""
+        with self.lock:
+            return self.idle.wait_for(lambda: not self.pending, timeout)
+
+    def work(self):
+        """Post queued deliveries until the process exits"""
+        session = requests.Session()
+        while True:
+            hook, body, attempt = self.queue.get()
+            try:
+                self.deliver(session, hook, body, attempt)
+            except Exception:
+                logger.exception('Hook delivery to %s failed', hook.target)
+                deliveries.inc(outcome='error')
+                self.done()
+
+    def deliver(self, session, hook, body, attempt):
+        """Post one delivery, then retry, unsubscribe or finish it"""
+        try:
+            response = session.post(
+                hook.target,
+                data=body,
+                headers={'Content-Type': 'application/json'},
+                timeout=self.timeout
+            )
+            status = response.status_code
+        except requests.RequestException as e:
+            logger.warning('Hook delivery to %s failed: %s', hook.target, e)
+            status = None
+
+        if status == 410:
+            deliveries.inc(outcome='unsubscribed')
+            self.unsubscribe(hook)
+        elif (status is None or status in RETRY_STATUSES) \
+                and attempt < self.retries:
+            deliveries.inc(outcome='retried')
+            delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+            timer = threading.Timer(
+                delay, self.retry, (hook, body, attempt + 1)
+            )
+            timer.daemon = True
+            timer.start()
+            return
+        elif status is None or status >= 400:
+            logger.error('Giving up on hook delivery to %s after %s tries',
+                         hook.target, attempt + 1)
+            deliveries.inc(outcome='failed')
+        else:
+            deliveries.inc(outcome='delivered')
+
+        self.done()
+
+    def unsubscribe(self, hook):
+        """Delete a hook whose subscriber has gone, as REST Hooks expects"""
+        type(hook).objects.filter(pk=hook.pk).delete()
+        connections.close_all()
+
+    def retry(self, hook, body, attempt):
+        """Queue a delivery again without counting it as new"""
+        try:
+            self.queue.put_nowait((hook, body, attempt))
+        except queue.Full:
+            logger.error('Hook queue full, dropping retry to %s', hook.target)
+            deliveries.inc(outcome='dropped')
+            self.done()
+
+
+class ChangeNotifier:
+    """Collapse a company's changes into one notification per subscriber
+
+    A subscriber has a hook for each event, all posting to one target,
+    so changes are collected by the hooks' user and target. The first
+    change for a target and company starts the window, and every change
+    until it closes is sent with it as the list of resources that
+    changed, whichever of the subscriber's hooks it fired.
+    """
+
+    def __init__(self, deliverer, window):
+        self.deliverer = deliverer
+        self.window = window
+
+        self.lock = threading.Lock()
+        self.pending = {}
+
+    def notify(self, hook, company_pk, resource):
+        """Add a changed resource to the hook's next notification"""
+        key = (hook.user_id, hook.target, str(company_pk))
+        with self.lock:
+            if key not in self.pending:
+                timer = threading.Timer(self.window, self.send, (key,))
+                timer.daemon = True
+                self.pending[key] = (hook, set(), timer)
+                timer.start()
+            self.pending[key][1].add(resource)
+
+    def send(self, key):
+        """Queue the notification for a closed window"""
+        with self.lock:
+            entry = self.pending.pop(key, None)
+        if entry is None:
+            return
+
+        hook, resources, timer = entry
+        payload = {
+            'hook': hook.dict(),
+            'data': {
+                'change': True,
+                'company': key[2],
+                'resources': sorted(resources),
+            }
+        }
+        self.deliverer.enqueue(
+            hook, json.dumps(payload, cls=DjangoJSONEncoder)
+        )
+
+    def flush(self):
+        """Send every pending notification without waiting"""
+        with self.lock:
+            keys = list(self.pending)
+            for key in keys:
+                self.pending[key][2].cancel()
+
+        for key in keys:
+            self.send(key)
+
+
+deliverer = HookDeliverer(
+    workers=settings.HOOK_DELIVERY_WORKERS,
+    timeout=settings.HOOK_DELIVERY_TIMEOUT,
+    retries=settings.HOOK_DELIVERY_RETRIES,
+    backoff=settings.HOOK_DELIVERY_BACKOFF,
+    max_queued=settings.HOOK_DELIVERY_MAX_QUEUED
+)
+
+notifier = ChangeNotifier(deliverer, settings.HOOK_DEBOUNCE_WINDOW)
+
+
+def deliver_hook(target, payload, instance=None, hook=None):
+    """HOOK_DELIVERER that queues the payload once the save is committed
+
+    Changes to a company's chatbot content are debounced into one
+    notification per window. Nothing is sent for changes that are rolled
+    back, and the request or admin action making the change never waits
+    on the subscriber.
+    """
+    company_pk = getattr(instance, 'company_id', None)
+    if settings.HOOK_DEBOUNCE_WINDOW and company_pk is not None:
+        resource = instance._meta.model_name
+        transaction.on_commit(
+            lambda: notifier.notify(hook, company_pk, resource)
+        )
+        return
+
+    body = json.dumps(payload, cls=DjangoJSONEncoder)
+    transaction.on_commit(lambda: deliverer.enqueue(hook, body))
+
+
+def shutdown(timeout=None):
+    """Send what is still pending before the process exits
+
+    Registered to run at exit, so a gunicorn worker or management
+    command that stops cleanly first sends the notifications waiting on
+    their window, then waits up to HOOK_SHUTDOWN_TIMEOUT seconds for the
+    queued deliveries and retries. Deliveries are still lost when they
+    aren't finished by then, which a slow subscriber being retried can
+    take longer than, and when the process is killed without exiting,
+    such as by SIGKILL or running out of memory.
+    """
+    if timeout is None:
+        timeout = settings.HOOK_SHUTDOWN_TIMEOUT
+
+    notifier.flush()
+    if not deliverer.flush(timeout):
+        logger.error('Exiting with %s hook deliveries unsent',
+                     deliverer.pending)
+        deliveries.inc(deliverer.pending, outcome='dropped')
+
+
+atexit.register(shutdown)
@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from core.metrics import registry
+
+# Histogram bucket upper bounds, in seconds for timings
+TIME_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# What is recorded for each request, and the buckets each is counted in
+REQUEST_METRICS = {
+    'queries': QUERY_BUCKETS,
+    'db_seconds': TIME_BUCKETS,
+    'serialize_seconds': TIME_BUCKETS,
+    'render_seconds': TIME_BUCKETS,
+    'duration_seconds': TIME_BUCKETS,
+}
+
+local = threading.local()
+
+
+class RequestMetrics:
+    """The queries and time spent on one request
+
+    Installed as an execute_wrapper, it counts every query the request
+    runs and the time spent waiting on them.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.timings = defaultdict(float)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - start
+
+
+def get_metrics():
+    """Return the metrics of the request running in this thread, or None"""
+    return getattr(local, 'metrics', None)
+
+
+@contextmanager
+def collect_metrics():
+    """Collect the metrics of the request running in this thread"""
+    metrics = RequestMetrics()
+    local.metrics = metrics
+    try:
+        yield metrics
+    finally:
+        local.metrics = None
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block, less queries, to a request timing
+
+    Query time is left out so that, say, serializing a lazy queryset
+    counts only the Python time towards serializing.
+    """
+    metrics = get_metrics()
+    if metrics is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    db = metrics.db
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start - (metrics.db - db)
+        metrics.timings[name] += elapsed
+
+
+REQUEST_HISTOGRAMS = {
+    name: registry.histogram(
+        f'http_request_{ name }', documentation, REQUEST_METRICS[name]
+    )
+    for name, documentation in (
+        ('queries', 'Queries run per request, by url name'),
+        ('db_seconds', 'Time spent on queries per request, by url name'),
+        ('serialize_seconds', 'Time spent serializing, by url name'),
+        ('render_seconds', 'Time spent rendering, by url name'),
+        ('duration_seconds', 'Time taken per request, by url name'),
+    )
+}
+
+requests_total = registry.counter(
+    'http_requests_total', 'Requests by url name, method and status'
+)
+
+
+def record(request, response, metrics, total):
+    """Count a finished request and its metrics towards its view"""
+    view = request.resolver_match.view_name
+    requests_total.inc(
+        view=view, method=request.method, status=response.status_code
+    )
+
+    values = {
+        'queries': metrics.queries,
+        'db_seconds': metrics.db,
+        'serialize_seconds': metrics.timings['serialize'],
+        'render_seconds': metrics.timings['render'],
+        'duration_seconds': total,
+    }
+    for name, histogram in REQUEST_HISTOGRAMS.items():
+        histogram.observe(values[name], view=view)
+
+
+def get_view_histograms():
+    """Return each view's request histograms keyed by metric"""
+    values = registry.collect()
+
+    views = defaultdict(dict)
+    for name, histogram in REQUEST_HISTOGRAMS.items():
+        for labels, snapshot in histogram.snapshots(values).items():
+            views[dict(labels)['view']][name] = snapshot
+
+    return dict(views)
+
+
+def server_timing(metrics, total):
+    """Return a Server-Timing header value for a request's metrics"""
+    timings = [
+        f'db;desc="{ metrics.queries } queries";dur={ metrics.db * 1000:.1f}'
+    ]
+    for name in ('serialize', 'render'):
+        if name in metrics.timings:
+            timings.append(f'{ name };dur={ metrics.timings[name] * 1000:.1f}')
+    timings.append(f'total;dur={ total * 1000:.1f}')
+
+    return ', '.join(timings)
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework_api_key.models import APIKey
+
+from core.models import Company, CompanyAPIKey
+
+
+class Command(BaseCommand):
+    """Copy a plain API key to a company API key
+
+    The chatbot endpoints only accept company API keys. Migrating copies
+    the plain keys whose company it can tell; run this for the rest. The
+    copy has the same prefix and hash, so widgets keep sending the same
+    key. Without arguments, the plain keys not copied yet are listed.
+    """
+    help = 'Copy a plain API key to a company API key'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'prefix',
+            nargs='?',
+            help='Prefix of the plain API key to copy'
+        )
+        parser.add_argument(
+            'company',
+            nargs='?',
+            help='Name of the company the key belongs to'
+        )
+
+    def handle(self, *args, **options):
+        copied = CompanyAPIKey.objects.values('prefix')
+        keys = APIKey.objects.get_usable_keys().exclude(prefix__in=copied)
+
+        if options['prefix'] is None:
+            for api_key in keys:
+                self.stdout.write(f'{ api_key.prefix } { api_key.name }')
+            return
+
+        if options['company'] is None:
+            raise CommandError('Give the company the key belongs to.')
+
+        try:
+            api_key = keys.get(prefix=options['prefix'])
+        except APIKey.DoesNotExist:
+            raise CommandError(
+                f'No plain API key { options["prefix"] } left to copy.'
+            )
+        try:
+            company = Company.objects.get(company_name=options['company'])
+        except Company.DoesNotExist:
+            raise CommandError(f'No company { options["company"] }.')
+
+        CompanyAPIKey.objects.create(
+            id=api_key.id,
+            prefix=api_key.prefix,
+            hashed_key=api_key.hashed_key,
+            name=api_key.name,
+            expiry_date=api_key.expiry_date,
+            company=company
+        )
+        self.stdout.write(
+            f'Copied API key { api_key.prefix } to { company.company_name }'
+        )
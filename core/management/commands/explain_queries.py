@@ -0,0 +1,127 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.models import Benefit, CbBrowsingData, CbJobsData, CbQnsData, \
+                        Company, Job, Question
+
+
+class Command(BaseCommand):
+    """Print the plans of the hot chatbot and analytics queries
+
+    Seed a copy of the database, then run this before and after migrating
+    core past 0003_query_indexes to compare the plans.
+    """
+    help = 'Print the query plans of the hot chatbot and analytics queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Add this many rows to each chatbot data table first'
+        )
+        parser.add_argument(
+            '--companies',
+            type=int,
+            default=50,
+            help='Number of companies the seeded rows are spread over'
+        )
+        parser.add_argument(
+            '--company',
+            help='Company to explain the queries for (default: any)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help='Days of chatbot data queried'
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Run the queries and show actual times (PostgreSQL)'
+        )
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'], options['companies'])
+
+        if options['company']:
+            company = Company.objects.filter(pk=options['company']).first()
+        else:
+            company = Company.objects.order_by('?').first()
+        if company is None:
+            raise CommandError('No company to explain the queries for')
+
+        since = timezone.now() - timedelta(days=options['days'])
+        queries = {
+            'Active jobs': Job.objects.filter(
+                company=company, active_job=True
+            ),
+            'Active benefits': Benefit.objects.filter(
+                company=company, active_benefit=True
+            ),
+            'Active questions': Question.objects.filter(
+                company=company, active_question=True
+            ),
+            'Job data in range': CbJobsData.objects.filter(
+                company=company, date_time__gte=since
+            ),
+            'Question data in range': CbQnsData.objects.filter(
+                company=company, date_time__gte=since
+            ),
+            'Browsing data in range': CbBrowsingData.objects.filter(
+                company=company, date_time__gte=since
+            ),
+        }
+
+        explain_options = {'analyze': True} if options['analyze'] else {}
+        for name, queryset in queries.items():
+            start = time.perf_counter()
+            plan = queryset.explain(**explain_options)
+            elapsed = (time.perf_counter() - start) * 1000
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{ name } ({ elapsed:.1f} ms)'
+            ))
+            self.stdout.write(plan)
+
+    def seed(self, rows, company_count):
+        """Bulk create chatbot data spread over new companies and a year"""
+        companies = Company.objects.bulk_create(
+            Company(company_name=f'Benchmark { time.time_ns() }-{ i }')
+            for i in range(company_count)
+        )
+        now = timezone.now()
+        batch_size = 10000
+
+        for model, fields in (
+            (CbJobsData, {'specialism_search': 'Engineering',
+                          'location_search': 'London',
+                          'role_type_search': 'Individual contributor'}),
+            (CbQnsData, {'has_question': True}),
+            (CbBrowsingData, {'is_browsing': True}),
+        ):
+            for offset in range(0, rows, batch_size):
+                model.objects.bulk_create(
+                    model(
+                        company=random.choice(companies),
+                        chatbot_user_id=f'benchmark-{ offset + i }',
+                        date_time=now - timedelta(
+                            seconds=random.randrange(365 * 24 * 60 * 60)
+                        ),
+                        **fields
+                    )
+                    for i in range(min(batch_size, rows - offset))
+                )
+            self.stdout.write(f'Seeded { rows } { model.__name__ } rows')
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for model in (CbJobsData, CbQnsData, CbBrowsingData):
+                    cursor.execute(f'ANALYZE { model._meta.db_table }')
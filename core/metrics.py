@@ -0,0 +1,276 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+
+
+def format_value(value):
+    """Return a sample or bucket value as Prometheus text"""
+    if isinstance(value, float):
+        return repr(value)
+
+    return str(value)
+
+
+def format_labels(labels):
+    """Return a series' labels as Prometheus text"""
+    if not labels:
+        return ''
+
+    pairs = ','.join(
+        '{}="{}"'.format(name, value.replace('\\', r'\\')
+                                    .replace('"', r'\"')
+                                    .replace('\n', r'\n'))
+        for name, value in labels
+    )
+    return f'{{{ pairs }}}'
+
+
+def label_key(labels):
+    """Return the labels of a series as a sorted tuple of pairs"""
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class Counter:
+    """A count that only goes up, for each set of labels"""
+    type = 'counter'
+
+    def __init__(self, registry, name, documentation):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+
+    def inc(self, amount=1, **labels):
+        self.registry.add((self.name, label_key(labels)), amount)
+
+    def samples(self, values):
+        """Return the (name, labels, value) of each series"""
+        return [
+            (name, labels, value)
+            for (name, labels), value in sorted(values.items())
+            if name == self.name
+        ]
+
+
+class Histogram:
+    """Counts of observed values in buckets, for each set of labels
+
+    Each observation is stored in its own bucket only, and the buckets
+    are made cumulative when read, after processes are added up.
+    """
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, buckets):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.bounds = tuple(repr(float(b)) for b in buckets) + ('+Inf',)
+
+    def observe(self, value, **labels):
+        labels = label_key(labels)
+        le = self.bounds[bisect_left(self.buckets, value)]
+        shard = self.registry.get_shard()
+        for key, amount in (
+            ((f'{ self.name }_bucket', labels + (('le', le),)), 1),
+            ((f'{ self.name }_sum', labels), value),
+            ((f'{ self.name }_count', labels), 1),
+        ):
+            shard[key] = shard.get(key, 0) + amount
+
+    def snapshots(self, values):
+        """Return the count, sum and cumulative buckets for each label set"""
+        snapshots = {}
+        for (name, labels), count in sorted(values.items()):
+            if name != f'{ self.name }_count':
+                continue
+
+            cumulative = []
+            total = 0
+            for bucket, le in zip(self.buckets + ('+Inf',), self.bounds):
+                key = (f'{ self.name }_bucket', labels + (('le', le),))
+                total += values.get(key, 0)
+                cumulative.append((bucket, total))
+
+            snapshots[labels] = {
+                'count': count,
+                'sum': values.get((f'{ self.name }_sum', labels), 0),
+                'buckets': cumulative,
+            }
+
+        return snapshots
+
+    def samples(self, values):
+        """Return the (name, labels, value) of each series"""
+        samples = []
+        for labels, snapshot in self.snapshots(values).items():
+            for (_, count), le in zip(snapshot['buckets'], self.bounds):
+                samples.append(
+                    (f'{ self.name }_bucket', labels + (('le', le),), count)
+                )
+            samples.append((f'{ self.name }_sum', labels, snapshot['sum']))
+            samples.append(
+                (f'{ self.name }_count', labels, snapshot['count'])
+            )
+
+        return samples
+
+
+class Registry:
+    """This process's metrics, kept per thread so updates take no lock
+
+    Each thread adds to its own dict of series, and reads add the dicts
+    up. With METRICS_MULTIPROC_DIR set, every process also writes its
+    totals to a file of its own there, and reads add up all the files,
+    so the gunicorn workers are scraped as one. Files of workers that
+    have exited are still counted, so counts don't go backwards; the
+    directory should be emptied when the app is restarted.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.reset()
+
+        os.register_at_fork(after_in_child=self.reset)
+        atexit.register(self.write)
+
+    def reset(self):
+        """Start with no series, as in a newly forked process"""
+        # Names this process's file along with its pid, as a worker
+        # started later can be given the pid of one that has exited
+        self.token = uuid.uuid4().hex
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.shards = []
+        self.flusher = None
+
+    def counter(self, name, documentation):
+        return self.register(Counter(self, name, documentation))
+
+    def histogram(self, name, documentation, buckets):
+        return self.register(Histogram(self, name, documentation, buckets))
+
+    def register(self, metric):
+        """Add a metric, or return the one already added by its name"""
+        return self.metrics.setdefault(metric.name, metric)
+
+    def get_shard(self):
+        """Return the dict of series this thread adds to"""
+        shard = getattr(self.local, 'shard', None)
+        if shard is None:
+            shard = self.local.shard = {}
+            with self.lock:
+                self.shards.append(shard)
+                self.start()
+
+        return shard
+
+    def add(self, key, amount):
+        shard = self.get_shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def start(self):
+        """Start writing this process's totals out, in multiprocess mode"""
+        if self.flusher is not None or not settings.METRICS_MULTIPROC_DIR:
+            return
+
+        self.flusher = threading.Thread(
+            target=self.flush,
+            name='metrics-flusher',
+            daemon=True
+        )
+        self.flusher.start()
+
+    def flush(self):
+        """Write this process's totals out every flush interval"""
+        stopped = threading.Event()
+        while not stopped.wait(settings.METRICS_FLUSH_INTERVAL):
+            self.write()
+
+    def get_totals(self):
+        """Return this process's value for each series"""
+        totals = defaultdict(int)
+        for shard in list(self.shards):
+            # Copying is atomic, so threads can keep adding meanwhile
+            for key, value in shard.copy().items():
+                totals[key] += value
+
+        return totals
+
+    def path(self):
+        """Return the file this process writes its totals to"""
+        return os.path.join(
+            settings.METRICS_MULTIPROC_DIR,
+            f'metrics-{ os.getpid() }-{ self.token }.json'
+        )
+
+    def write(self):
+        """Replace this process's file with its current totals"""
+        if not settings.METRICS_MULTIPROC_DIR or not self.shards:
+            return
+
+        series = [
+            [name, labels, value]
+            for (name, labels), value in self.get_totals().items()
+        ]
+        os.makedirs(settings.METRICS_MULTIPROC_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(
+            dir=settings.METRICS_MULTIPROC_DIR, suffix='.tmp'
+        )
+        with os.fdopen(fd, 'w') as f:
+            json.dump(series, f)
+        os.replace(tmp, self.path())
+
+    def collect(self):
+        """Return the value of each series, over every process if shared"""
+        if not settings.METRICS_MULTIPROC_DIR:
+            return dict(self.get_totals())
+
+        self.write()
+        totals = defaultdict(int)
+        for entry in os.scandir(settings.METRICS_MULTIPROC_DIR):
+            if not entry.name.endswith('.json'):
+                continue
+            with open(entry.path) as f:
+                for name, labels, value in json.load(f):
+                    key = (name, tuple(tuple(label) for label in labels))
+                    totals[key] += value
+
+        return dict(totals)
+
+    def clear(self):
+        """Forget this process's series"""
+        for shard in list(self.shards):
+            shard.clear()
+        if settings.METRICS_MULTIPROC_DIR and os.path.exists(self.path()):
+            os.remove(self.path())
+
+    def exposition(self):
+        """Return every metric in the Prometheus text format"""
+        values = self.collect()
+
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP { name } { metric.documentation }')
+            lines.append(f'# TYPE { name } { metric.type }')
+            for sample, labels, value in metric.samples(values):
+                lines.append(
+                    f'{ sample }{ format_labels(labels) } '
+                    f'{ format_value(value) }'
+                )
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+# Lookups in the caches whose hit ratio is worth watching
+cache_requests = registry.counter(
+    'cache_requests_total', 'Cache lookups by cache and result'
+)
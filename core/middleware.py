@@ -0,0 +1,70 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from core.compression import compress, encode_response, is_json, \
+                             select_encoding, should_compress
+from core.instrumentation import collect_metrics, record, server_timing
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress JSON responses with the best coding the client accepts
+
+    Like Django's GZipMiddleware, with brotli when it is installed and a
+    minimum size below which compression isn't worth it. Only JSON API
+    responses are compressed, never HTML such as the admin. Responses that
+    already have a Content-Encoding, such as the chatbot responses
+    compressed from the cache, are passed through.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or not is_json(response) or \
+                not should_compress(response.content):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.has_header('Content-Encoding'):
+            return response
+
+        encoding = select_encoding(request)
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) < len(response.content):
+            encode_response(response, compressed, encoding)
+
+        return response
+
+
+class InstrumentationMiddleware:
+    """Record each request's queries and timings against its view
+
+    The metrics are added to the request histograms by url name, and
+    sent back in a Server-Timing header when INSTRUMENTATION_SERVER_TIMING
+    is on. Requests that don't resolve to a view aren't recorded, and
+    streamed responses are timed only until they start streaming.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with collect_metrics() as metrics, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        if settings.INSTRUMENTATION_SERVER_TIMING:
+            response['Server-Timing'] = server_timing(metrics, total)
+
+        if request.resolver_match is not None:
+            record(request, response, metrics, total)
+
+        return response
@@ -0,0 +1,58 @@
+# Generated by Django 3.1.14 on 2026-10-18 11:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from core.operations import AddIndexConcurrentlyIfPostgres
+
+
+class Migration(migrations.Migration):
+
+    # Concurrent index builds can't run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0002_companyapikey'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='benefit',
+            index=models.Index(condition=models.Q(active_benefit=True), fields=['company'], name='benefit_company_active_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='cbbrowsingdata',
+            index=models.Index(fields=['company', 'date_time'], name='cbbrowsing_company_date_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='cbjobsdata',
+            index=models.Index(fields=['company', 'date_time'], name='cbjobs_company_date_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='cbqnsdata',
+            index=models.Index(fields=['company', 'date_time'], name='cbqns_company_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(active_job=True), fields=['company'], name='job_company_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(condition=models.Q(active_question=True), fields=['company'], name='question_company_active_idx'),
+        ),
+        migrations.AlterField(
+            model_name='cbbrowsingdata',
+            name='company',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.company'),
+        ),
+        migrations.AlterField(
+            model_name='cbjobsdata',
+            name='company',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.company'),
+        ),
+        migrations.AlterField(
+            model_name='cbqnsdata',
+            name='company',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.company'),
+        ),
+    ]
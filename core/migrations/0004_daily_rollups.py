@@ -0,0 +1,173 @@
+# Generated by Django 3.1.14 on 2026-10-18 11:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+from core.operations import AddIndexConcurrentlyIfPostgres
+
+# Rows whose created_at is backfilled per transaction
+BACKFILL_BATCH_SIZE = 10000
+
+
+def backfill_created_at(apps, schema_editor):
+    """Date existing chatbot data as created when it was posted
+
+    Every existing row is given the migration's time as its created_at,
+    so the first rollup run would count the whole history in a single
+    window. Moving it back to the row's date_time spreads the history
+    over the daily windows instead. Rows dated in the future keep the
+    migration's time, so they are still counted on the first run.
+
+    Rows are updated in batches of primary keys, each committed on its
+    own, so posts aren't held up behind one long update.
+    """
+    for model_name in ('CbBrowsingData', 'CbJobsData', 'CbQnsData'):
+        model = apps.get_model('core', model_name)
+        last = None
+        while True:
+            queryset = model.objects.order_by('pk')
+            if last is not None:
+                queryset = queryset.filter(pk__gt=last)
+            pks = list(
+                queryset.values_list('pk', flat=True)[:BACKFILL_BATCH_SIZE]
+            )
+            if not pks:
+                break
+
+            model.objects.filter(
+                pk__in=pks,
+                created_at__gt=models.F('date_time')
+            ).update(created_at=models.F('date_time'))
+            last = pks[-1]
+
+
+class Migration(migrations.Migration):
+
+    # Concurrent index builds can't run in a transaction, and the
+    # backfill commits each batch
+    atomic = False
+
+    dependencies = [
+        ('core', '0003_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CbBrowsingDailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('why_on_site', models.CharField(blank=True, max_length=100)),
+                ('conversations', models.PositiveIntegerField(default=0)),
+                ('is_browsing', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Chatbot browsing daily rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='CbJobsDailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('specialism_search', models.CharField(max_length=100)),
+                ('location_search', models.CharField(max_length=60)),
+                ('sessions', models.PositiveIntegerField(default=0)),
+                ('found_job', models.PositiveIntegerField(default=0)),
+                ('saw_benefits', models.PositiveIntegerField(default=0)),
+                ('saw_company_video', models.PositiveIntegerField(default=0)),
+                ('saw_job_video', models.PositiveIntegerField(default=0)),
+                ('add_to_pipeline', models.PositiveIntegerField(default=0)),
+                ('joined_pipeline', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Chatbot job daily rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='CbQnsDailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('conversations', models.PositiveIntegerField(default=0)),
+                ('has_question', models.PositiveIntegerField(default=0)),
+                ('question_helpful', models.PositiveIntegerField(default=0)),
+                ('wants_reply', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Chatbot question daily rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=60, unique=True)),
+                ('processed_until', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='cbbrowsingdata',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='cbjobsdata',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='cbqnsdata',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(
+            backfill_created_at,
+            migrations.RunPython.noop,
+            atomic=False
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='cbbrowsingdata',
+            index=models.Index(fields=['created_at'], name='cbbrowsing_created_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='cbjobsdata',
+            index=models.Index(fields=['created_at'], name='cbjobs_created_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='cbqnsdata',
+            index=models.Index(fields=['created_at'], name='cbqns_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='cbqnsdailyrollup',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.company'),
+        ),
+        migrations.AddField(
+            model_name='cbjobsdailyrollup',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.company'),
+        ),
+        migrations.AddField(
+            model_name='cbbrowsingdailyrollup',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.company'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='cbqnsdailyrollup',
+            unique_together={('company', 'date')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='cbjobsdailyrollup',
+            unique_together={('company', 'date', 'specialism_search', 'location_search')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='cbbrowsingdailyrollup',
+            unique_together={('company', 'date', 'why_on_site')},
+        ),
+    ]
@@ -0,0 +1,230 @@
+from datetime import datetime, timezone
+
+from django.db import migrations, transaction
+
+# Needs PostgreSQL 11 or later. Other databases keep plain tables.
+PARTITIONED_MODELS = ('CbJobsData', 'CbQnsData', 'CbBrowsingData')
+
+# Months of partitions created after the legacy partition
+MONTHS_AHEAD = 3
+
+
+def add_months(value, months):
+    """Return the first of the month the given months after value"""
+    month = value.month - 1 + months
+    return value.replace(
+        year=value.year + month // 12, month=month % 12 + 1, day=1,
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def get_constraints(cursor, table, kind):
+    """Return the (name, definition) of the table's constraints of a kind"""
+    cursor.execute(
+        'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+        'WHERE conrelid = %s::regclass AND contype = %s',
+        [table, kind]
+    )
+    return cursor.fetchall()
+
+
+def is_partitioned(cursor, table):
+    """Return whether the table is a partitioned table"""
+    cursor.execute(
+        'SELECT relkind FROM pg_class WHERE oid = %s::regclass',
+        [table]
+    )
+    return cursor.fetchone()[0] == 'p'
+
+
+def table_exists(cursor, table):
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [table])
+    return cursor.fetchone()[0]
+
+
+def key_index_name(model):
+    return f'{ model._meta.db_table }_id_date_uniq'
+
+
+def add_key_index(schema_editor, model):
+    """Build the (id, date_time) index the partitioned primary key needs
+
+    It is built concurrently, outside the swap, so writes go on while it
+    builds. The swap then makes it the table's primary key, which
+    attaching adopts instead of building one under an exclusive lock.
+    An index left invalid by an interrupted build is replaced.
+    """
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    name = key_index_name(model)
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS { qn(name) }')
+        cursor.execute(
+            f'CREATE UNIQUE INDEX CONCURRENTLY { qn(name) } '
+            f'ON { qn(table) } ("id", "date_time")'
+        )
+
+
+def partition_table(schema_editor, model):
+    """Swap the table for one partitioned by month on date_time
+
+    The existing table is attached as a legacy partition holding
+    everything before next month, so no rows are copied. Rows dated
+    later than that are moved into the new partitions. Writes to the
+    table wait on the swap, which scans the table once to check the
+    legacy partition's bounds.
+
+    Each table is swapped in a transaction of its own, so a run that
+    failed part way has swapped some tables and not others. Tables
+    already partitioned, or with a legacy table, are skipped when it is
+    run again.
+    """
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    legacy = f'{ table }_legacy'
+    cutoff = add_months(datetime.now(timezone.utc), 1)
+
+    with schema_editor.connection.cursor() as cursor:
+        if is_partitioned(cursor, table) or table_exists(cursor, legacy):
+            return
+
+    add_key_index(schema_editor, model)
+
+    with transaction.atomic(using=schema_editor.connection.alias), \
+            schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE { qn(table) } RENAME TO { qn(legacy) }')
+        # Key the legacy partition by the index built above, so that
+        # attaching it adopts that index for the new primary key
+        for name, definition in get_constraints(cursor, legacy, 'p'):
+            cursor.execute(
+                f'ALTER TABLE { qn(legacy) } DROP CONSTRAINT { qn(name) }'
+            )
+        cursor.execute(
+            f'ALTER TABLE { qn(legacy) } '
+            f'ADD CONSTRAINT { qn(legacy + "_pkey") } '
+            f'PRIMARY KEY USING INDEX { qn(key_index_name(model)) }'
+        )
+        for index in model._meta.indexes:
+            cursor.execute(
+                f'ALTER INDEX { qn(index.name) } '
+                f'RENAME TO { qn(index.name + "_legacy") }'
+            )
+
+        cursor.execute(
+            f'CREATE TABLE { qn(table) } (LIKE { qn(legacy) } '
+            f'INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE ("date_time")'
+        )
+        # Unique constraints on a partitioned table must hold the
+        # partition key
+        cursor.execute(
+            f'ALTER TABLE { qn(table) } ADD CONSTRAINT { qn(table + "_pkey") } '
+            f'PRIMARY KEY ("id", "date_time")'
+        )
+        for name, definition in get_constraints(cursor, legacy, 'f'):
+            cursor.execute(
+                f'ALTER TABLE { qn(table) } '
+                f'ADD CONSTRAINT { qn(name) } { definition }'
+            )
+        # Matching indexes on the legacy table are attached, not rebuilt
+        for index in model._meta.indexes:
+            schema_editor.add_index(model, index)
+
+        for month in range(MONTHS_AHEAD + 1):
+            start = add_months(cutoff, month)
+            cursor.execute(
+                f'CREATE TABLE { qn(table + start.strftime("_p%Y%m")) } '
+                f'PARTITION OF { qn(table) } FOR VALUES FROM (%s) TO (%s)',
+                [start.isoformat(), add_months(start, 1).isoformat()]
+            )
+        cursor.execute(
+            f'CREATE TABLE { qn(table + "_default") } '
+            f'PARTITION OF { qn(table) } DEFAULT'
+        )
+
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE "moved" AS '
+            f'WITH "rows" AS (DELETE FROM { qn(legacy) } '
+            f'WHERE "date_time" >= %s RETURNING *) SELECT * FROM "rows"',
+            [cutoff.isoformat()]
+        )
+        cursor.execute(
+            f'ALTER TABLE { qn(table) } ATTACH PARTITION { qn(legacy) } '
+            f'FOR VALUES FROM (MINVALUE) TO (%s)',
+            [cutoff.isoformat()]
+        )
+        cursor.execute(f'INSERT INTO { qn(table) } SELECT * FROM "moved"')
+        cursor.execute('DROP TABLE "moved"')
+
+
+def unpartition_table(schema_editor, model):
+    """Copy the partitioned table's rows back into a plain table
+
+    Only the attached partitions are copied; ones detached by
+    manage_partitions are left as they are. Tables that are already
+    plain are skipped.
+    """
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    partitioned = f'{ table }_partitioned'
+
+    with transaction.atomic(using=schema_editor.connection.alias), \
+            schema_editor.connection.cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            return
+
+        cursor.execute(
+            f'ALTER TABLE { qn(table) } RENAME TO { qn(partitioned) }'
+        )
+        foreign_keys = get_constraints(cursor, partitioned, 'f')
+        cursor.execute(
+            f'CREATE TABLE { qn(table) } (LIKE { qn(partitioned) } '
+            f'INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        cursor.execute(
+            f'INSERT INTO { qn(table) } SELECT * FROM { qn(partitioned) }'
+        )
+        cursor.execute(f'DROP TABLE { qn(partitioned) } CASCADE')
+
+        cursor.execute(
+            f'ALTER TABLE { qn(table) } ADD CONSTRAINT { qn(table + "_pkey") } '
+            f'PRIMARY KEY ("id")'
+        )
+        for name, definition in foreign_keys:
+            cursor.execute(
+                f'ALTER TABLE { qn(table) } '
+                f'ADD CONSTRAINT { qn(name) } { definition }'
+            )
+        for index in model._meta.indexes:
+            schema_editor.add_index(model, index)
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for model_name in PARTITIONED_MODELS:
+        partition_table(schema_editor, apps.get_model('core', model_name))
+
+
+def unpartition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for model_name in PARTITIONED_MODELS:
+        unpartition_table(schema_editor, apps.get_model('core', model_name))
+
+
+class Migration(migrations.Migration):
+    # The key indexes are built concurrently, and each table is swapped
+    # in a transaction of its own
+    atomic = False
+
+    dependencies = [
+        ('core', '0004_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-18 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_partition_cbdata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='data_retention_days',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.1.14 on 2026-10-18 12:41
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_changelog'),
+    ]
+
+    operations = [
+        # The default is an expression for each insert, which can't be
+        # a column default, so the column is added without one
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.AddField(
+                    model_name='changelog',
+                    name='xid',
+                    field=models.BigIntegerField(editable=False, null=True),
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='changelog',
+                    name='xid',
+                    field=models.BigIntegerField(default=core.models.current_xid, editable=False, null=True),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['company', 'xid'], name='changelog_company_xid_idx'),
+        ),
+    ]
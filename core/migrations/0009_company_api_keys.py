@@ -0,0 +1,60 @@
+from django.db import migrations
+
+
+def copy_api_keys(apps, schema_editor):
+    """Issue a company API key for each plain API key in use
+
+    The chatbot endpoints only accept company API keys, so existing
+    widgets sending a plain key would be refused. Each usable plain key
+    whose company can be told, from being named after it or from there
+    being just one company, is copied to a company key with the same
+    prefix and hash, so the widget's key keeps working for that company
+    only. Other keys are left for the copy_api_key command.
+    """
+    APIKey = apps.get_model('rest_framework_api_key', 'APIKey')
+    Company = apps.get_model('core', 'Company')
+    CompanyAPIKey = apps.get_model('core', 'CompanyAPIKey')
+
+    companies = list(Company.objects.all())
+    by_name = {company.company_name.lower(): company for company in companies}
+    copied = set(CompanyAPIKey.objects.values_list('prefix', flat=True))
+
+    for api_key in APIKey.objects.filter(revoked=False):
+        if api_key.prefix in copied:
+            continue
+
+        company = by_name.get(api_key.name.lower())
+        if company is None and len(companies) == 1:
+            company = companies[0]
+        if company is None:
+            continue
+
+        CompanyAPIKey.objects.create(
+            id=api_key.id,
+            prefix=api_key.prefix,
+            hashed_key=api_key.hashed_key,
+            name=api_key.name,
+            expiry_date=api_key.expiry_date,
+            company=company
+        )
+
+
+def delete_copied_keys(apps, schema_editor):
+    APIKey = apps.get_model('rest_framework_api_key', 'APIKey')
+    CompanyAPIKey = apps.get_model('core', 'CompanyAPIKey')
+
+    CompanyAPIKey.objects.filter(
+        id__in=APIKey.objects.values('id')
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_changelog_xid'),
+        ('rest_framework_api_key', '0004_prefix_hashed_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_api_keys, delete_copied_keys),
+    ]
@@ -1,10 +1,13 @@
 import uuid
 
-from django.db import models
+from django.db import connection, models
+from django.db.models.expressions import RawSQL
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
     PermissionsMixin
 from django.conf import settings
 
+from rest_framework_api_key.models import AbstractAPIKey
+
 
 class UserManager(BaseUserManager):
 
@@ -46,6 +49,8 @@ class Company(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     company_name = models.CharField(max_length=255, unique=True)
     is_active = models.BooleanField(default=True)
+    # Days of chatbot data kept, overriding CBDATA_RETENTION_DAYS
+    data_retention_days = models.PositiveIntegerField(null=True, blank=True)
 
     class Meta:
         verbose_name_plural = "Companies"
@@ -54,10 +59,27 @@ class Company(models.Model):
         return self.company_name
 
 
+class CompanyAPIKey(AbstractAPIKey):
+    """API keys that can only access the data of their company"""
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name='api_keys'
+    )
+
+    class Meta(AbstractAPIKey.Meta):
+        verbose_name = "Company API key"
+        verbose_name_plural = "Company API keys"
+
+
 class CbJobsData(models.Model):
     """Jobs data from chatbot conversations"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        db_index=False
+    )
     chatbot_user_id = models.CharField(max_length=60)
     date_time = models.DateTimeField()
     specialism_search = models.CharField(max_length=100)
@@ -69,9 +91,20 @@ class CbJobsData(models.Model):
     saw_job_video = models.NullBooleanField()
     add_to_pipeline = models.NullBooleanField()
     joined_pipeline = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name_plural = "Chatbot job data"
+        indexes = [
+            models.Index(
+                fields=['company', 'date_time'],
+                name='cbjobs_company_date_idx'
+            ),
+            models.Index(
+                fields=['created_at'],
+                name='cbjobs_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{ self.company.company_name } - { self.date_time }'
@@ -80,7 +113,11 @@ class CbJobsData(models.Model):
 class CbQnsData(models.Model):
     """Questions data from chatbot conversations"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        db_index=False
+    )
     chatbot_user_id = models.CharField(max_length=60)
     date_time = models.DateTimeField()
     has_question = models.BooleanField(default=False)
@@ -88,9 +125,20 @@ class CbQnsData(models.Model):
     question_helpful = models.NullBooleanField()
     wants_reply = models.NullBooleanField()
     question_left = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name_plural = "Chatbot question data"
+        indexes = [
+            models.Index(
+                fields=['company', 'date_time'],
+                name='cbqns_company_date_idx'
+            ),
+            models.Index(
+                fields=['created_at'],
+                name='cbqns_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{ self.company.company_name } - { self.date_time }'
@@ -99,19 +147,162 @@ class CbQnsData(models.Model):
 class CbBrowsingData(models.Model):
     """Browsing data from chatbot conversations"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        db_index=False
+    )
     chatbot_user_id = models.CharField(max_length=60)
     date_time = models.DateTimeField()
     is_browsing = models.BooleanField(default=False)
     why_on_site = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name_plural = "Chatbot browsing data"
+        indexes = [
+            models.Index(
+                fields=['company', 'date_time'],
+                name='cbbrowsing_company_date_idx'
+            ),
+            models.Index(
+                fields=['created_at'],
+                name='cbbrowsing_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{ self.company.company_name } - { self.date_time }'
 
 
+class CbJobsDailyRollup(models.Model):
+    """Daily counts of chatbot job data for each company and search"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    date = models.DateField()
+    specialism_search = models.CharField(max_length=100)
+    location_search = models.CharField(max_length=60)
+    sessions = models.PositiveIntegerField(default=0)
+    found_job = models.PositiveIntegerField(default=0)
+    saw_benefits = models.PositiveIntegerField(default=0)
+    saw_company_video = models.PositiveIntegerField(default=0)
+    saw_job_video = models.PositiveIntegerField(default=0)
+    add_to_pipeline = models.PositiveIntegerField(default=0)
+    joined_pipeline = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Chatbot job daily rollups"
+        unique_together = [
+            ['company', 'date', 'specialism_search', 'location_search'],
+        ]
+
+    def __str__(self):
+        return f'{ self.company.company_name } - { self.date }'
+
+
+class CbQnsDailyRollup(models.Model):
+    """Daily counts of chatbot question data for each company"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    date = models.DateField()
+    conversations = models.PositiveIntegerField(default=0)
+    has_question = models.PositiveIntegerField(default=0)
+    question_helpful = models.PositiveIntegerField(default=0)
+    wants_reply = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Chatbot question daily rollups"
+        unique_together = [['company', 'date']]
+
+    def __str__(self):
+        return f'{ self.company.company_name } - { self.date }'
+
+
+class CbBrowsingDailyRollup(models.Model):
+    """Daily counts of chatbot browsing data for each company and reason"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    date = models.DateField()
+    why_on_site = models.CharField(max_length=100, blank=True)
+    conversations = models.PositiveIntegerField(default=0)
+    is_browsing = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Chatbot browsing daily rollups"
+        unique_together = [['company', 'date', 'why_on_site']]
+
+    def __str__(self):
+        return f'{ self.company.company_name } - { self.date }'
+
+
+class RollupWatermark(models.Model):
+    """How far the chatbot data has been added to each rollup"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=60, unique=True)
+    processed_until = models.DateTimeField()
+
+    def __str__(self):
+        return f'{ self.name } - { self.processed_until }'
+
+
+def current_xid():
+    """Return the id of the transaction saving a row, on PostgreSQL"""
+    if connection.vendor != 'postgresql':
+        return None
+
+    return RawSQL('txid_current()', [])
+
+
+class ChangeLog(models.Model):
+    """Ordered record of changes to a company's chatbot objects"""
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    OP_CHOICES = [
+        (CREATE, 'Create'),
+        (UPDATE, 'Update'),
+        (DELETE, 'Delete'),
+    ]
+
+    # Increases with every change, so clients sync from the last one seen
+    seq = models.BigAutoField(primary_key=True)
+    # No constraint, so changes logged while a company is deleted don't
+    # block it
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    resource = models.CharField(max_length=60)
+    object_id = models.UUIDField()
+    op = models.CharField(max_length=6, choices=OP_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+    # The transaction that logged the change, on PostgreSQL, as changes
+    # don't commit in the order of seq there
+    xid = models.BigIntegerField(null=True, default=current_xid,
+                                 editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['company', 'seq'],
+                name='changelog_company_seq_idx'
+            ),
+            models.Index(
+                fields=['company', 'xid'],
+                name='changelog_company_xid_idx'
+            ),
+            models.Index(
+                fields=['changed_at'],
+                name='changelog_changed_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{ self.seq } { self.op } { self.resource } { self.object_id }'
+
+
 class Location(models.Model):
     """Office locations for each company"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -202,6 +393,15 @@ class Job(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['company'],
+                condition=models.Q(active_job=True),
+                name='job_company_active_idx'
+            ),
+        ]
+
     def __str__(self):
         return f'{ self.company.company_name } - { self.title }'
 
@@ -261,6 +461,15 @@ class Benefit(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['company'],
+                condition=models.Q(active_benefit=True),
+                name='benefit_company_active_idx'
+            ),
+        ]
+
     def __str__(self):
         return f'{ self.company.company_name } - { self.title }'
 
@@ -306,6 +515,15 @@ class Question(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['company'],
+                condition=models.Q(active_question=True),
+                name='question_company_active_idx'
+            ),
+        ]
+
     def __str__(self):
         return f'{ self.company.company_name } - { self.question }'
 
@@ -1,6 +1,114 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from rest_framework.permissions import BasePermission
 from rest_framework_api_key.permissions import BaseHasAPIKey
+
+from .metrics import cache_requests
 from .models import CompanyAPIKey
 
 
-class HasCompanyAPIKey(BaseHasAPIKey):
+def api_key_cache_key(model, prefix):
+    """Return the cache key for a verified API key"""
+    return f'apikey:{ model._meta.label_lower }:{ prefix }'
+
+
+def api_key_digest(key):
+    """Return a fast digest of a presented API key"""
+    return salted_hmac('core.permissions.api_key_digest', key).hexdigest()
+
+
+class CachedAPIKeyMixin:
+    """Remember verified API keys so repeat requests skip the slow hash
+
+    Only successful checks are cached, by key prefix, and the entry is
+    removed when the key is changed or deleted.
+    """
+
+    def get_verified_key(self, key):
+        """Return the usable API key matching the presented key, or None"""
+        prefix, _, _ = key.partition('.')
+
+        try:
+            api_key = self.model.objects.get_usable_keys().get(prefix=prefix)
+        except self.model.DoesNotExist:
+            return None
+
+        if not api_key.is_valid(key) or api_key.has_expired:
+            return None
+
+        return api_key
+
+    def get_key_details(self, api_key):
+        """Return the details of a verified key that are cached"""
+        return {'expiry_date': api_key.expiry_date}
+
+    def has_key_permission(self, request, view, details):
+        """Return whether a verified key can be used for the request"""
+        return True
+
+    def has_permission(self, request, view):
+        key = self.get_key(request)
+        if not key:
+            return False
+
+        prefix, _, _ = key.partition('.')
+        cache_key = api_key_cache_key(self.model, prefix)
+        digest = api_key_digest(key)
+
+        details = cache.get(cache_key)
+        if details is None or \
+                not constant_time_compare(details['digest'], digest):
+            cache_requests.inc(cache='api_key', result='miss')
+            api_key = self.get_verified_key(key)
+            if api_key is None:
+                return False
+
+            details = {'digest': digest, **self.get_key_details(api_key)}
+            cache.set(cache_key, details, settings.API_KEY_CACHE_TIMEOUT)
+        else:
+            cache_requests.inc(cache='api_key', result='hit')
+
+        expiry_date = details['expiry_date']
+        if expiry_date is not None and expiry_date < timezone.now():
+            return False
+
+        return self.has_key_permission(request, view, details)
+
+
+class HasMetricsToken(BasePermission):
+    """Allow staff users, or a scraper presenting the METRICS_TOKEN"""
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+
+        token = settings.METRICS_TOKEN
+        keyword, _, presented = request.META.get(
+            'HTTP_AUTHORIZATION', ''
+        ).partition(' ')
+
+        return bool(token) and keyword == 'Bearer' and \
+            constant_time_compare(presented, token)
+
+
+class HasCompanyAPIKey(CachedAPIKeyMixin, BaseHasAPIKey):
+    """Allow only API keys belonging to the company in the url
+
+    As the key's company must match company_pk, views can trust that the
+    company exists without looking it up again.
+    """
     model = CompanyAPIKey
+
+    def get_key_details(self, api_key):
+        """Return the details of a verified key that are cached"""
+        details = super().get_key_details(api_key)
+        details['company_id'] = api_key.company_id
+
+        return details
+
+    def has_key_permission(self, request, view, details):
+        """Return whether the key belongs to the requested company"""
+        return details['company_id'] == view.kwargs.get('company_pk')
@@ -0,0 +1,24 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from core.models import CompanyAPIKey
+from core.permissions import api_key_cache_key
+
+
+def api_key_changed(sender, instance, **kwargs):
+    """Forget a cached API key once it is revoked, changed or deleted"""
+    cache.delete(api_key_cache_key(sender, instance.prefix))
+
+
+def connect_signals():
+    """Connect the API key cache receivers"""
+    post_save.connect(
+        api_key_changed,
+        sender=CompanyAPIKey,
+        dispatch_uid='core-apikey-saved'
+    )
+    post_delete.connect(
+        api_key_changed,
+        sender=CompanyAPIKey,
+        dispatch_uid='core-apikey-deleted'
+    )
@@ -0,0 +1,88 @@
+from importlib import import_module
+from io import StringIO
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import RequestFactory, TestCase
+
+from rest_framework_api_key.models import APIKey
+
+from core.models import CbJobsData, Company, CompanyAPIKey
+from core.permissions import HasCompanyAPIKey
+
+
+class ExplainQueriesCommandTests(TestCase):
+    """Test the explain_queries command"""
+
+    def test_seed_and_explain(self):
+        """Test seeding chatbot data and printing the query plans"""
+        out = StringIO()
+
+        call_command('explain_queries', seed=20, companies=2, stdout=out)
+
+        self.assertEqual(CbJobsData.objects.count(), 20)
+        self.assertIn('Job data in range', out.getvalue())
+
+
+class CopyAPIKeyTests(TestCase):
+    """Test copying plain API keys to company API keys"""
+
+    def setUp(self):
+        self.company = Company.objects.create(company_name='PiedPiper')
+        self.company2 = Company.objects.create(company_name='Hooli')
+        self.api_key, self.key = APIKey.objects.create_key(name='piedpiper')
+
+    def has_permission(self, company):
+        """Check the plain key's permission for a company's data"""
+        request = RequestFactory().get(
+            '/',
+            HTTP_AUTHORIZATION='Api-Key ' + self.key
+        )
+        view = SimpleNamespace(kwargs={'company_pk': company.id})
+        return HasCompanyAPIKey().has_permission(request, view)
+
+    def copy_api_keys(self):
+        """Run the migration copying plain keys to company keys"""
+        migration = import_module('core.migrations.0009_company_api_keys')
+        migration.copy_api_keys(apps, None)
+
+    def test_migration_copies_key_named_for_company(self):
+        """Test a key named after its company keeps working for it only"""
+        self.assertFalse(self.has_permission(self.company))
+
+        self.copy_api_keys()
+
+        self.assertTrue(self.has_permission(self.company))
+        self.assertFalse(self.has_permission(self.company2))
+
+    def test_migration_leaves_unknown_keys(self):
+        """Test keys that can't be tied to a company aren't copied"""
+        APIKey.objects.create_key(name='Widget')
+        self.api_key.delete()
+
+        self.copy_api_keys()
+
+        self.assertFalse(CompanyAPIKey.objects.exists())
+
+    def test_command_copies_key(self):
+        """Test the command copies a key to the company given"""
+        out = StringIO()
+        self.api_key.name = 'Widget'
+        self.api_key.save()
+
+        call_command('copy_api_key', stdout=out)
+        self.assertIn(self.api_key.prefix, out.getvalue())
+        call_command('copy_api_key', self.api_key.prefix, 'Hooli', stdout=out)
+
+        self.assertTrue(self.has_permission(self.company2))
+        self.assertFalse(self.has_permission(self.company))
+
+    def test_command_copies_key_once(self):
+        """Test a key already copied can't be copied again"""
+        self.copy_api_keys()
+
+        with self.assertRaises(CommandError):
+            call_command('copy_api_key', self.api_key.prefix, 'Hooli',
+                         stdout=StringIO())
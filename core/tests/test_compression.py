@@ -0,0 +1,189 @@
+import gzip
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, \
+                        override_settings
+from django.urls import reverse
+
+from core.compression import parse_accept_encoding, select_encoding
+from core.middleware import CompressionMiddleware
+
+CONTENT = b'{"answer": "' + b'We offer flexible working. ' * 100 + b'"}'
+
+
+def get_response(request):
+    """Return a large JSON response with a strong ETag"""
+    response = HttpResponse(CONTENT, content_type='application/json')
+    response['ETag'] = '"abc"'
+    return response
+
+
+class AcceptEncodingTests(SimpleTestCase):
+    """Test choosing a content coding from Accept-Encoding"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def select(self, header):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=header)
+        return select_encoding(request)
+
+    def test_parse_qualities(self):
+        """Test parsing codings and their quality values"""
+        qualities = parse_accept_encoding('gzip;q=0.5, BR, *;q=0, x;q=bad')
+
+        self.assertEqual(
+            qualities,
+            {'gzip': 0.5, 'br': 1.0, '*': 0.0, 'x': 0.0}
+        )
+
+    def test_select_gzip(self):
+        """Test that gzip is chosen when brotli isn't installed"""
+        with mock.patch('core.compression.brotli', None):
+            self.assertEqual(self.select('gzip, deflate, br'), 'gzip')
+
+    def test_select_brotli(self):
+        """Test that brotli is preferred when installed"""
+        with mock.patch('core.compression.brotli'):
+            self.assertEqual(self.select('gzip, deflate, br'), 'br')
+            self.assertEqual(self.select('gzip, br;q=0.5'), 'gzip')
+
+    def test_select_none(self):
+        """Test that no coding is chosen unless one is accepted"""
+        self.assertIsNone(self.select(''))
+        self.assertIsNone(self.select('deflate'))
+        self.assertIsNone(self.select('gzip;q=0'))
+        self.assertIsNone(self.select('*;q=0'))
+
+    def test_select_wildcard(self):
+        """Test that a wildcard accepts any supported coding"""
+        with mock.patch('core.compression.brotli', None):
+            self.assertEqual(self.select('*'), 'gzip')
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test compressing responses in the middleware"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = CompressionMiddleware(get_response)
+
+    @mock.patch('core.compression.brotli', None)
+    def test_gzip_response(self):
+        """Test that large responses are gzipped for clients accepting it"""
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+        response = self.middleware(request)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertEqual(
+            int(response['Content-Length']), len(response.content)
+        )
+        self.assertEqual(gzip.decompress(response.content), CONTENT)
+
+    def test_brotli_response(self):
+        """Test that brotli is used when installed and accepted"""
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+
+        with mock.patch('core.compression.brotli') as brotli:
+            brotli.compress.return_value = b'compressed'
+            response = self.middleware(request)
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response.content, b'compressed')
+
+    def test_not_accepted(self):
+        """Test that responses are left alone when no coding is accepted"""
+        request = self.factory.get('/')
+
+        response = self.middleware(request)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, CONTENT)
+
+    @override_settings(COMPRESSION_MIN_SIZE=10 ** 6)
+    def test_small_response(self):
+        """Test that responses under the minimum size aren't compressed"""
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+        response = self.middleware(request)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Vary'))
+
+    def test_already_encoded(self):
+        """Test that responses with a Content-Encoding are left alone"""
+        def encoded(request):
+            response = get_response(request)
+            response['Content-Encoding'] = 'gzip'
+            return response
+
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+        response = CompressionMiddleware(encoded)(request)
+
+        self.assertEqual(response.content, CONTENT)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_streaming_response(self):
+        """Test that streaming responses are left alone"""
+        def streaming(request):
+            return StreamingHttpResponse(iter([CONTENT]))
+
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+        response = CompressionMiddleware(streaming)(request)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_html_response(self):
+        """Test that HTML responses are never compressed"""
+        def html(request):
+            return HttpResponse(CONTENT, content_type='text/html')
+
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+        response = CompressionMiddleware(html)(request)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, CONTENT)
+
+    def test_json_suffix_response(self):
+        """Test that +json media types are compressed"""
+        def problem(request):
+            return HttpResponse(
+                CONTENT,
+                content_type='application/problem+json; charset=utf-8'
+            )
+
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+        response = CompressionMiddleware(problem)(request)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+
+class AdminCompressionTests(TestCase):
+    """Test that admin pages holding CSRF tokens aren't compressed"""
+
+    def test_admin_not_compressed(self):
+        """Test that admin pages are sent uncompressed"""
+        user = get_user_model().objects.create_superuser(
+            email='admin@email.com',
+            password='admin123'
+        )
+        self.client.force_login(user)
+
+        res = self.client.get(
+            reverse('admin:core_user_add'),
+            HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn(b'csrfmiddlewaretoken', res.content)
+        self.assertFalse(res.has_header('Content-Encoding'))
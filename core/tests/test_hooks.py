@@ -0,0 +1,222 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_hooks.models import Hook
+
+from core import hooks
+from core.hooks import ChangeNotifier, HookDeliverer
+
+
+def mock_response(status_code):
+    """Return a mock response with the status code"""
+    return mock.Mock(status_code=status_code)
+
+
+@mock.patch('core.hooks.requests.Session.post')
+class HookDelivererTests(TestCase):
+    """Test delivering hooks from background threads"""
+
+    def setUp(self):
+        self.hook = mock.Mock(target='https://example.com/hook')
+        self.deliverer = HookDeliverer(
+            workers=2, timeout=1, retries=2, backoff=0, max_queued=10
+        )
+
+    def deliver(self, body='{}'):
+        """Queue a delivery and wait for it to finish"""
+        self.deliverer.enqueue(self.hook, body)
+        self.assertTrue(self.deliverer.flush(timeout=5))
+
+    def test_payload_posted(self, post):
+        """Test the body is posted to the target with a timeout"""
+        post.return_value = mock_response(200)
+
+        self.deliver('{"id": 1}')
+
+        post.assert_called_once_with(
+            'https://example.com/hook',
+            data='{"id": 1}',
+            headers={'Content-Type': 'application/json'},
+            timeout=1
+        )
+
+    def test_failures_retried(self, post):
+        """Test failed deliveries are retried until they succeed"""
+        post.side_effect = [mock_response(503), mock_response(200)]
+
+        self.deliver()
+
+        self.assertEqual(post.call_count, 2)
+
+    def test_retries_limited(self, post):
+        """Test a failing target is given up on after the retries"""
+        post.return_value = mock_response(500)
+
+        self.deliver()
+
+        self.assertEqual(post.call_count, 3)
+
+    def test_client_errors_not_retried(self, post):
+        """Test a delivery the subscriber rejects isn't retried"""
+        post.return_value = mock_response(400)
+
+        self.deliver()
+
+        self.assertEqual(post.call_count, 1)
+
+    @mock.patch('core.hooks.HookDeliverer.unsubscribe')
+    def test_gone_target_unsubscribed(self, unsubscribe, post):
+        """Test the hook is deleted when the target responds 410"""
+        post.return_value = mock_response(410)
+
+        self.deliver()
+
+        unsubscribe.assert_called_once_with(self.hook)
+        self.assertEqual(post.call_count, 1)
+
+
+class ChangeNotifierTests(TestCase):
+    """Test debouncing change notifications"""
+
+    def setUp(self):
+        self.deliverer = mock.Mock()
+        self.notifier = ChangeNotifier(self.deliverer, window=60)
+        self.hook = mock.Mock(pk=1)
+        self.hook.dict.return_value = {'id': 1}
+
+    def get_payloads(self):
+        """Return the payloads queued with the deliverer"""
+        return [
+            json.loads(call[0][1])
+            for call in self.deliverer.enqueue.call_args_list
+        ]
+
+    def test_changes_collapsed(self):
+        """Test a company's changes are sent as one notification"""
+        user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass'
+        )
+        job_hook = Hook.objects.create(
+            user=user,
+            event='job.changed',
+            target='https://example.com/hook'
+        )
+        benefit_hook = Hook.objects.create(
+            user=user,
+            event='benefit.changed',
+            target='https://example.com/hook'
+        )
+
+        for hook, resource in ((job_hook, 'job'), (job_hook, 'job'),
+                               (benefit_hook, 'benefit'), (job_hook, 'job')):
+            self.notifier.notify(hook, 'company-1', resource)
+
+        self.notifier.flush()
+
+        self.assertEqual(self.get_payloads(), [{
+            'hook': job_hook.dict(),
+            'data': {
+                'change': True,
+                'company': 'company-1',
+                'resources': ['benefit', 'job'],
+            }
+        }])
+
+    def test_targets_notified_separately(self):
+        """Test each target gets its own notification of the changes"""
+        other_hook = mock.Mock(pk=2, user_id=self.hook.user_id)
+        other_hook.dict.return_value = {'id': 2}
+
+        self.notifier.notify(self.hook, 'company-1', 'job')
+        self.notifier.notify(other_hook, 'company-1', 'job')
+
+        self.notifier.flush()
+
+        self.assertEqual(len(self.get_payloads()), 2)
+
+    def test_companies_notified_separately(self):
+        """Test each company's changes are sent in their own notification"""
+        self.notifier.notify(self.hook, 'company-1', 'job')
+        self.notifier.notify(self.hook, 'company-2', 'location')
+
+        self.notifier.flush()
+
+        self.assertEqual(len(self.get_payloads()), 2)
+
+    def test_sent_when_window_closes(self):
+        """Test the notification is sent once the window has passed"""
+        notifier = ChangeNotifier(self.deliverer, window=0.01)
+
+        notifier.notify(self.hook, 'company-1', 'job')
+        for timer in [entry[2] for entry in notifier.pending.values()]:
+            timer.join(timeout=5)
+
+        self.assertEqual(self.get_payloads()[0]['data']['resources'],
+                         ['job'])
+        self.assertEqual(notifier.pending, {})
+
+
+class DeliverHookTests(TestCase):
+    """Test the HOOK_DELIVERER function"""
+
+    @mock.patch('core.hooks.notifier')
+    @mock.patch('core.hooks.transaction.on_commit', lambda func: func())
+    def test_company_changes_debounced(self, notifier):
+        """Test changes to company content go to the notifier"""
+        hook = mock.Mock()
+        instance = mock.Mock(company_id='company-1')
+        instance._meta.model_name = 'job'
+
+        hooks.deliver_hook(hook.target, {}, instance=instance, hook=hook)
+
+        notifier.notify.assert_called_once_with(hook, 'company-1', 'job')
+
+    @mock.patch('core.hooks.deliverer')
+    @mock.patch('core.hooks.transaction.on_commit', lambda func: func())
+    def test_payload_queued(self, deliverer):
+        """Test the payload is queued as JSON once committed"""
+        hook = mock.Mock()
+
+        hooks.deliver_hook(hook.target, {'id': 1}, hook=hook)
+
+        hook_arg, body = deliverer.enqueue.call_args[0]
+        self.assertEqual(hook_arg, hook)
+        self.assertEqual(json.loads(body), {'id': 1})
+
+
+class ShutdownTests(TestCase):
+    """Test sending pending hooks when the process exits"""
+
+    @mock.patch('core.hooks.deliverer')
+    @mock.patch('core.hooks.notifier')
+    def test_pending_sent_at_exit(self, notifier, deliverer):
+        """Test pending notifications are sent and deliveries waited on"""
+        deliverer.flush.return_value = True
+
+        hooks.shutdown(timeout=3)
+
+        notifier.flush.assert_called_once_with()
+        deliverer.flush.assert_called_once_with(3)
+
+    @mock.patch('core.hooks.requests.Session.post')
+    def test_queued_delivery_sent_at_exit(self, post):
+        """Test a delivery still queued at exit is posted before exiting"""
+        post.return_value = mock_response(200)
+        deliverer = HookDeliverer(
+            workers=1, timeout=1, retries=0, backoff=0, max_queued=10
+        )
+        notifier = ChangeNotifier(deliverer, window=60)
+        hook = mock.Mock(pk=1, target='https://example.com/hook')
+        hook.dict.return_value = {'id': 1}
+        notifier.notify(hook, 'company-1', 'job')
+
+        with mock.patch('core.hooks.deliverer', deliverer), \
+                mock.patch('core.hooks.notifier', notifier):
+            hooks.shutdown(timeout=5)
+
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(deliverer.pending, 0)
@@ -0,0 +1,140 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.instrumentation import RequestMetrics, collect_metrics, \
+                                 get_view_histograms, timed
+from core.metrics import registry
+from core.models import Company, CompanyAPIKey
+
+from chatbot.tests.test_job_api import sample_job
+
+METRICS_URL = reverse('core:request-metrics')
+
+
+class InstrumentationTests(SimpleTestCase):
+    """Test collecting and counting request metrics"""
+
+    def test_timed_without_request(self):
+        """Test that timing outside a request does nothing"""
+        with timed('serialize'):
+            pass
+
+    def test_timed_excludes_queries(self):
+        """Test that query time is taken off a timing"""
+        with collect_metrics() as metrics:
+            with timed('serialize'):
+                metrics.db += 10
+
+        self.assertLess(metrics.timings['serialize'], 0)
+
+    def test_metrics_counts_queries(self):
+        """Test that the execute wrapper counts queries and their time"""
+        metrics = RequestMetrics()
+
+        result = metrics(lambda *args: 'rows', 'SELECT 1', None, False, {})
+
+        self.assertEqual(result, 'rows')
+        self.assertEqual(metrics.queries, 1)
+        self.assertGreaterEqual(metrics.db, 0)
+
+
+class InstrumentationMiddlewareTests(TestCase):
+    """Test recording metrics for requests to the API"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass'
+        )
+        self.company = Company.objects.create(company_name='PiedPiper')
+
+        api_key, key = CompanyAPIKey.objects.create_key(
+            name="PiedPiper API Key",
+            company=self.company
+        )
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + key)
+        self.url = reverse(
+            'chatbot:changes-list',
+            kwargs={'company_pk': self.company.id}
+        )
+        registry.clear()
+
+    def test_request_recorded(self):
+        """Test that a request's metrics are counted against its view"""
+        sample_job(self.user, self.company, title='Front End Engineer')
+
+        self.client.get(self.url)
+
+        metrics = get_view_histograms()['chatbot:changes-list']
+        self.assertEqual(set(metrics), {
+            'queries', 'db_seconds', 'serialize_seconds', 'render_seconds',
+            'duration_seconds'
+        })
+        self.assertEqual(metrics['duration_seconds']['count'], 1)
+        self.assertGreater(metrics['queries']['sum'], 0)
+
+    def test_unresolved_not_recorded(self):
+        """Test that requests not matching a view aren't recorded"""
+        self.client.get('/api/missing')
+
+        self.assertEqual(get_view_histograms(), {})
+
+    @override_settings(INSTRUMENTATION_SERVER_TIMING=False)
+    def test_no_server_timing_when_off(self):
+        """Test that the Server-Timing header is only sent when enabled"""
+        res = self.client.get(self.url)
+
+        self.assertFalse(res.has_header('Server-Timing'))
+
+    @override_settings(INSTRUMENTATION_SERVER_TIMING=True)
+    def test_server_timing(self):
+        """Test that the Server-Timing header gives the request's metrics"""
+        res = self.client.get(self.url)
+
+        timings = res['Server-Timing']
+        self.assertRegex(timings, r'^db;desc="\d+ queries";dur=[\d.]+, ')
+        self.assertIn('serialize;dur=', timings)
+        self.assertIn('render;dur=', timings)
+        self.assertRegex(timings, r'total;dur=[\d.]+$')
+
+
+class RequestMetricsApiTests(TestCase):
+    """Test the request metrics endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        registry.clear()
+
+    def test_login_required(self):
+        """Test that the metrics need a staff user"""
+        user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass'
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_retrieve_metrics(self):
+        """Test that staff users get the histograms by view"""
+        user = get_user_model().objects.create_superuser(
+            'admin@email.com',
+            'testpass'
+        )
+        self.client.force_authenticate(user)
+        self.client.get(METRICS_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        total = res.json()['core:request-metrics']['duration_seconds']
+        self.assertEqual(total['count'], 1)
+        self.assertEqual(total['buckets'][-1], ['+Inf', 1])
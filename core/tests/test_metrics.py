@@ -0,0 +1,223 @@
+import json
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core import hooks
+from core.hooks import HookDeliverer
+from core.metrics import Registry, registry
+from core.models import Company, CompanyAPIKey
+
+METRICS_URL = reverse('metrics')
+
+
+class RegistryTests(SimpleTestCase):
+    """Test keeping metrics and writing them in the Prometheus format"""
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_exposition(self):
+        """Test that counters are written with their labels"""
+        counter = self.registry.counter('events_total', 'Events by type')
+        counter.inc(type='job')
+        counter.inc(2, type='job')
+        counter.inc(type='say "hi"')
+
+        self.assertEqual(self.registry.exposition(), (
+            '# HELP events_total Events by type\n'
+            '# TYPE events_total counter\n'
+            'events_total{type="job"} 3\n'
+            'events_total{type="say \\"hi\\""} 1\n'
+        ))
+
+    def test_histogram_exposition(self):
+        """Test that histograms are written with cumulative buckets"""
+        histogram = self.registry.histogram('size', 'Sizes', (1, 5))
+        for value in (0, 1, 3, 10):
+            histogram.observe(value)
+
+        self.assertEqual(self.registry.exposition(), (
+            '# HELP size Sizes\n'
+            '# TYPE size histogram\n'
+            'size_bucket{le="1.0"} 2\n'
+            'size_bucket{le="5.0"} 3\n'
+            'size_bucket{le="+Inf"} 4\n'
+            'size_sum 14\n'
+            'size_count 4\n'
+        ))
+
+    def test_threads_added_up(self):
+        """Test that each thread's counts are added together"""
+        counter = self.registry.counter('events_total', 'Events')
+
+        def count():
+            for i in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=count) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(
+            self.registry.collect(), {('events_total', ()): 4000}
+        )
+
+    def test_processes_added_up(self):
+        """Test that every process's file is added up in multiprocess mode"""
+        counter = self.registry.counter('events_total', 'Events')
+        counter.inc(type='job')
+
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(METRICS_MULTIPROC_DIR=directory):
+            with open(os.path.join(directory, 'metrics-1.json'), 'w') as f:
+                json.dump([['events_total', [['type', 'job']], 2]], f)
+
+            values = self.registry.collect()
+            written = os.path.exists(self.registry.path())
+
+        self.assertEqual(values, {('events_total', (('type', 'job'),)): 3})
+        self.assertTrue(written)
+
+    def test_reused_pid_kept(self):
+        """Test a process given an exited one's pid keeps its counts"""
+        exited = Registry()
+        exited.counter('events_total', 'Events').inc(2)
+        self.registry.counter('events_total', 'Events').inc()
+
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(METRICS_MULTIPROC_DIR=directory):
+            exited.write()
+            values = self.registry.collect()
+
+        self.assertEqual(values, {('events_total', ()): 3})
+
+
+class MetricsApiTests(TestCase):
+    """Test scraping the metrics endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(company_name='PiedPiper')
+        api_key, self.key = CompanyAPIKey.objects.create_key(
+            name='tests',
+            company=self.company
+        )
+        registry.clear()
+
+    def scrape(self):
+        """Return the metrics text using the scraper's token"""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer secret')
+        with override_settings(METRICS_TOKEN='secret'):
+            res = client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.content.decode()
+
+    def test_token_required(self):
+        """Test that the metrics need the token or a staff user"""
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer wrong')
+        with override_settings(METRICS_TOKEN='secret'):
+            res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_no_token_set(self):
+        """Test that no token is accepted when none is set"""
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ')
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_staff_allowed(self):
+        """Test that staff users can read the metrics"""
+        user = get_user_model().objects.create_superuser(
+            'admin@email.com',
+            'testpass'
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+
+    def test_requests_counted(self):
+        """Test that requests are counted by url name and status"""
+        self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + self.key)
+        url = reverse('chatbot:job-list', kwargs={
+            'company_pk': self.company.id
+        })
+        self.client.get(url)
+        self.client.get(url)
+
+        metrics = self.scrape()
+
+        self.assertIn(
+            'http_requests_total{method="GET",status="200",'
+            'view="chatbot:job-list"} 2', metrics
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{view="chatbot:job-list"} 2',
+            metrics
+        )
+        self.assertIn(
+            'cache_requests_total{cache="chatbot_response",result="hit"} 1',
+            metrics
+        )
+        self.assertIn(
+            'cache_requests_total{cache="api_key",result="hit"} 1', metrics
+        )
+
+    def test_ingest_counted(self):
+        """Test that chatbot data events are counted by company and type"""
+        self.client.credentials(HTTP_AUTHORIZATION='Api-Key ' + self.key)
+        url = reverse('cbdata:cbjobsdata-batch-create', kwargs={
+            'company_pk': self.company.id
+        })
+        item = {
+            'chatbot_user_id': 'abc123-3',
+            'date_time': '2019-12-03T12:34:56Z',
+            'specialism_search': 'Product',
+            'location_search': 'London',
+            'role_type_search': 'Individual contributor',
+            'found_job': True
+        }
+        self.client.post(url, [item, item], format='json')
+
+        self.assertIn(
+            'cbdata_ingested_events_total{company="%s",type="cbjobsdata"} 2'
+            % self.company.id,
+            self.scrape()
+        )
+
+    @mock.patch('core.hooks.requests.Session.post')
+    def test_hook_outcomes_counted(self, post):
+        """Test that webhook deliveries are counted by outcome"""
+        post.side_effect = [mock.Mock(status_code=503),
+                            mock.Mock(status_code=200)]
+        deliverer = HookDeliverer(
+            workers=1, timeout=1, retries=2, backoff=0, max_queued=10
+        )
+
+        deliverer.enqueue(mock.Mock(target='https://example.com/hook'), '{}')
+        self.assertTrue(deliverer.flush(timeout=5))
+
+        values = registry.collect()
+        self.assertEqual(
+            values[(hooks.deliveries.name, (('outcome', 'retried'),))], 1
+        )
+        self.assertEqual(
+            values[(hooks.deliveries.name, (('outcome', 'delivered'),))], 1
+        )
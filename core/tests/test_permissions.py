@@ -0,0 +1,128 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase, RequestFactory
+from django.utils import timezone
+
+from rest_framework_api_key.crypto import KeyGenerator
+from rest_framework_api_key.models import APIKey
+
+from core.models import Company, CompanyAPIKey
+from core.permissions import HasCompanyAPIKey
+
+
+class CachedAPIKeyTests(TestCase):
+    """Test caching verified API keys"""
+
+    def setUp(self):
+        self.company = Company.objects.create(company_name='PiedPiper')
+        self.api_key, self.key = CompanyAPIKey.objects.create_key(
+            name="tests",
+            company=self.company
+        )
+        self.permission = HasCompanyAPIKey()
+        self.factory = RequestFactory()
+
+    def has_permission(self, key):
+        """Check the permission for a request made with the given key"""
+        request = self.factory.get('/', HTTP_AUTHORIZATION='Api-Key ' + key)
+        view = SimpleNamespace(kwargs={'company_pk': self.company.id})
+        return self.permission.has_permission(request, view)
+
+    def test_repeat_request_skips_hash(self):
+        """Test that a verified key isn't hashed or queried again"""
+        self.assertTrue(self.has_permission(self.key))
+
+        with mock.patch.object(KeyGenerator, 'verify') as verify, \
+                self.assertNumQueries(0):
+            self.assertTrue(self.has_permission(self.key))
+
+        verify.assert_not_called()
+
+    def test_wrong_secret_rejected(self):
+        """Test that a cached prefix doesn't accept a different secret"""
+        self.assertTrue(self.has_permission(self.key))
+        prefix, _, _ = self.key.partition('.')
+
+        self.assertFalse(self.has_permission(prefix + '.wrong'))
+
+    def test_revoked_key_rejected(self):
+        """Test that revoking a key removes it from the cache"""
+        self.assertTrue(self.has_permission(self.key))
+
+        self.api_key.revoked = True
+        self.api_key.save()
+
+        self.assertFalse(self.has_permission(self.key))
+
+    def test_deleted_key_rejected(self):
+        """Test that deleting a key removes it from the cache"""
+        self.assertTrue(self.has_permission(self.key))
+
+        self.api_key.delete()
+
+        self.assertFalse(self.has_permission(self.key))
+
+    def test_expired_key_rejected(self):
+        """Test that a cached key stops working once it expires"""
+        self.api_key.expiry_date = timezone.now() + timedelta(minutes=1)
+        self.api_key.save()
+        self.assertTrue(self.has_permission(self.key))
+
+        later = timezone.now() + timedelta(minutes=2)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertFalse(self.has_permission(self.key))
+
+
+class CompanyAPIKeyTests(TestCase):
+    """Test API keys that belong to a company"""
+
+    def setUp(self):
+        self.company = Company.objects.create(company_name='PiedPiper')
+        self.api_key, self.key = CompanyAPIKey.objects.create_key(
+            name="tests",
+            company=self.company
+        )
+        self.permission = HasCompanyAPIKey()
+        self.factory = RequestFactory()
+
+    def has_permission(self, company_pk):
+        """Check the permission for a request for the given company"""
+        request = self.factory.get(
+            '/',
+            HTTP_AUTHORIZATION='Api-Key ' + self.key
+        )
+        view = SimpleNamespace(kwargs={'company_pk': company_pk})
+        return self.permission.has_permission(request, view)
+
+    def test_own_company_allowed(self):
+        """Test that the key can access its own company, cached or not"""
+        self.assertTrue(self.has_permission(self.company.id))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.has_permission(self.company.id))
+
+    def test_other_company_forbidden(self):
+        """Test that the key can't access another company"""
+        company2 = Company.objects.create(company_name='Hooli')
+        self.assertTrue(self.has_permission(self.company.id))
+
+        self.assertFalse(self.has_permission(company2.id))
+
+    def test_deleted_company_forbidden(self):
+        """Test that deleting the company removes its cached keys"""
+        company_pk = self.company.id
+        self.assertTrue(self.has_permission(company_pk))
+
+        self.company.delete()
+
+        self.assertFalse(self.has_permission(company_pk))
+
+    def test_plain_api_key_forbidden(self):
+        """Test that a key not tied to a company isn't accepted"""
+        api_key, key = APIKey.objects.create_key(name="tests")
+        request = self.factory.get('/', HTTP_AUTHORIZATION='Api-Key ' + key)
+        view = SimpleNamespace(kwargs={'company_pk': self.company.id})
+
+        self.assertFalse(self.permission.has_permission(request, view))
@@ -0,0 +1,99 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+
+def sample_data():
+    """Return data using the types the API responses contain"""
+    return {
+        'id': uuid.uuid4(),
+        'created_at': datetime.datetime(
+            2020, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc
+        ),
+        'date': datetime.date(2020, 1, 2),
+        'time': datetime.time(3, 4, 5),
+        'amount': Decimal('1.50'),
+        'message': gettext_lazy('Not found.'),
+        'text': 'Ünïcode “quotes” \u2028\u2029 and \\ slashes',
+        'jobs': ReturnList([{'title': 'Engineer', 'active': True}],
+                           serializer=None),
+        'empty': None,
+    }
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test the orjson backed renderer"""
+
+    def test_matches_json_renderer(self):
+        """Test the output is byte for byte the same as JSONRenderer"""
+        data = sample_data()
+
+        self.assertEqual(
+            FastJSONRenderer().render(data),
+            JSONRenderer().render(data)
+        )
+
+    def test_indented_output(self):
+        """Test indented output is still rendered by JSONRenderer"""
+        data = sample_data()
+        media_type = 'application/json; indent=2'
+
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type)
+        )
+
+    @mock.patch('core.renderers.orjson', None)
+    def test_without_orjson(self):
+        """Test the renderer falls back when orjson isn't installed"""
+        data = sample_data()
+
+        self.assertEqual(
+            FastJSONRenderer().render(data),
+            JSONRenderer().render(data)
+        )
+
+
+class FastJSONParserTests(SimpleTestCase):
+    """Test the orjson backed parser"""
+
+    def parse(self, parser, body):
+        """Parse a request body"""
+        return parser.parse(io.BytesIO(body), 'application/json', {})
+
+    def test_matches_json_parser(self):
+        """Test the parsed data is the same as JSONParser's"""
+        body = '[{"id": 1, "text": "Ünïcode", "x": 1.5, "y": null}]' \
+            .encode('utf-8')
+
+        self.assertEqual(
+            self.parse(FastJSONParser(), body),
+            self.parse(JSONParser(), body)
+        )
+
+    def test_invalid_json(self):
+        """Test invalid and non-standard JSON is rejected"""
+        for body in (b'{"id": ', b'{"value": NaN}'):
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError):
+                    self.parse(FastJSONParser(), body)
+
+    @mock.patch('core.parsers.orjson', None)
+    def test_without_orjson(self):
+        """Test the parser falls back when orjson isn't installed"""
+        self.assertEqual(self.parse(FastJSONParser(), b'{"id": 1}'),
+                         {'id': 1})
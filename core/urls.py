@@ -0,0 +1,14 @@
+from django.urls import path
+
+from core.views import RequestMetricsView
+
+
+app_name = 'core'
+
+urlpatterns = [
+    path(
+        'metrics/requests',
+        RequestMetricsView.as_view(),
+        name='request-metrics'
+    ),
+]
@@ -0,0 +1,34 @@
+from django.http import HttpResponse
+
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.instrumentation import get_view_histograms
+from core.metrics import registry
+from core.permissions import HasMetricsToken
+
+
+class RequestMetricsView(APIView):
+    """Get the request metric histograms for each view
+
+    Each view has histograms of its query count, query time, serializing
+    and rendering time, and total time, in seconds.
+    """
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        """Return the histograms keyed by url name then metric"""
+        return Response(get_view_histograms())
+
+
+class MetricsView(APIView):
+    """Get every metric in the Prometheus text format for scraping"""
+    permission_classes = (HasMetricsToken,)
+
+    def get(self, request, *args, **kwargs):
+        """Return the metrics of every worker process"""
+        return HttpResponse(
+            registry.exposition(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
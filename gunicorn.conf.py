@@ -0,0 +1,9 @@
+import os
+import shutil
+
+
+def on_starting(server):
+    """Clear the metrics left by the workers of an earlier run"""
+    directory = os.environ.get('METRICS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)